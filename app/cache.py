@@ -0,0 +1,621 @@
+import asyncio
+import gzip
+import hashlib
+import inspect
+import pickle
+import time
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from enum import Enum
+from functools import wraps
+from math import ceil
+from typing import Any, Awaitable, Callable, Optional, ParamSpec, TypeVar
+
+import orjson
+from fastapi_cache import FastAPICache
+from fastapi_cache.decorator import cache as fastapi_cache
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Receive, Scope, Send
+
+from .config import Settings, logger
+from .redis import Redis
+from .redis.helpers.cache_generation import get_cache_generations, unlink_keys
+from .redis.helpers.repo_version import get_data_version
+from .routers.static import get_accepted_encodings
+
+
+settings = Settings()
+
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+# How often the workers check if the data version and the cache generations
+# have changed in seconds
+DATA_VERSION_CHECK_INTERVAL = 1.0
+# How long other workers wait for a worker computing a response in seconds
+SINGLE_FLIGHT_TIMEOUT = 15
+SINGLE_FLIGHT_POLL_INTERVAL = 0.05
+# First byte of the values encoded by ResponseCoder
+RESPONSE_PREFIX = b"R"
+PICKLE_PREFIX = b"P"
+CACHE_GZIP_COMPRESS_LEVEL = 6
+# The calls of the cached functions are counted in windows of this length in seconds
+HOT_CALL_WINDOW = 3600
+# How often the workers add their call counts to redis in seconds
+HOT_CALL_FLUSH_INTERVAL = 10
+CACHE_WARMER_CONCURRENCY = 4
+
+
+# Decorated cached functions by get_function_name, used by the cache warmer
+cached_functions: dict[str, Callable[..., Awaitable[Any]]] = {}
+# Dependencies that aren't part of the dumped calls, like in the cache keys. The
+# cache warmer passes its own redis client.
+CALL_DEPENDENCIES = {"request", "response", "conn", "redis"}
+
+
+class RedisBackend:  # pragma: no cover
+    def __init__(self, redis: Redis):
+        self.redis: Redis = redis
+
+    async def get_with_ttl(self, key: str) -> tuple[int, str]:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            return await pipe.ttl(key).get(key).execute()  # type: ignore
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.redis.get(key)
+
+    async def set(self, key: str, value: str, expire: int | None = None) -> bool | None:
+        return await self.redis.set(key, value, ex=expire)
+
+    async def clear(self, namespace: str | None = None, key: str | None = None) -> int:
+        if namespace:
+            return await unlink_keys(self.redis, f"{namespace}:*")
+        elif key:
+            return await self.redis.delete(key)
+
+        raise ValueError("Either namespace or key must be specified.")
+
+
+class CachedResponse(Response):
+    """Response decoded from the cache.
+
+    A gzip compressed body is sent as is if the client accepts gzip and
+    decompressed otherwise. Requests with a matching If-None-Match get a 304.
+    """
+
+    def __init__(
+        self,
+        stored_body: bytes,
+        status_code: int,
+        media_type: Optional[str],
+        etag: str,
+        content_encoding: Optional[str] = None,
+    ) -> None:
+        super().__init__(stored_body, status_code=status_code, media_type=media_type)
+        self.etag = etag
+        self.content_encoding = content_encoding
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        body, etag, headers = self.body, self.etag, {}
+        if self.content_encoding is not None:
+            headers["vary"] = "Accept-Encoding"
+            accepted_encodings = get_accepted_encodings(
+                request_headers.get("accept-encoding", "")
+            )
+            if self.content_encoding in accepted_encodings:
+                headers["content-encoding"] = self.content_encoding
+                etag = f'{etag[:-1]}-{self.content_encoding}"'
+            else:
+                body = gzip.decompress(body)
+        headers["etag"] = etag
+
+        if_none_match = request_headers.get("if-none-match", "")
+        if etag in [tag.strip(" W/") for tag in if_none_match.split(",")]:
+            response: Response = NotModifiedResponse(Headers(headers))
+        else:
+            response = Response(
+                body,
+                status_code=self.status_code,
+                headers=headers,
+                media_type=self.media_type,
+            )
+        await response(scope, receive, send)
+
+
+class ResponseCoder:
+    """Store Responses as the body bytes after a small JSON header envelope.
+
+    Other values are pickled.
+    """
+
+    @classmethod
+    def encode(cls, value: Any) -> bytes:
+        if type(value) is not Response or value.background is not None:
+            return PICKLE_PREFIX + pickle.dumps(value)
+
+        body = value.body
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        # Set the ETag of the first response too, it's the response returned by
+        # fastapi_cache on a cache miss
+        value.headers["etag"] = etag
+        envelope: dict[str, Any] = {
+            "status_code": value.status_code,
+            "media_type": value.media_type,
+            "etag": etag,
+        }
+        if settings.cache_compression:
+            body = gzip.compress(body, compresslevel=CACHE_GZIP_COMPRESS_LEVEL)
+            envelope["content_encoding"] = "gzip"
+
+        return RESPONSE_PREFIX + orjson.dumps(envelope) + b"\n" + body
+
+    @classmethod
+    def decode(cls, value: bytes) -> Any:
+        prefix, data = value[:1], value[1:]
+        if prefix == RESPONSE_PREFIX:
+            envelope, _, body = data.partition(b"\n")
+            return CachedResponse(body, **orjson.loads(envelope))
+        if prefix == PICKLE_PREFIX:
+            return pickle.loads(data)
+        # Values cached before the prefixes were added
+        return pickle.loads(value)  # pragma: no cover
+
+
+def get_lock_key(key: str) -> str:
+    return f"{key}:lock"
+
+
+# Whether fastapi_cache won't store the result of the current call. Such calls
+# don't take the single flight lock since the other workers would wait for a
+# value that never comes.
+cache_bypassed: ContextVar[bool] = ContextVar("cache_bypassed", default=False)
+# Key fastapi_cache built for the current call. The single flight lock is taken on
+# the same key the value is set with even if the cache generations change in
+# between.
+call_cache_key: ContextVar[Optional[str]] = ContextVar("call_cache_key", default=None)
+
+
+def is_cache_bypassed(request: Optional[Request]) -> bool:
+    """Whether fastapi_cache calls the function without caching the result."""
+    if request is None:
+        return False
+    return request.method != "GET" or request.headers.get("Cache-Control") in (
+        "no-store",
+        "no-cache",
+    )
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+
+class LocalCache:
+    """LRU cache of encoded responses limited by the total size of the values.
+
+    Entries expire after the TTL they are set with.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self.size = 0
+        self.stats = CacheStats()
+
+    def get(self, key: str) -> Optional[tuple[int, bytes]]:
+        """Return the remaining TTL and the value of the key if it's cached."""
+        entry = self.entries.get(key)
+        now = time.monotonic()
+        if entry is None or entry[1] <= now:
+            if entry is not None:
+                self.pop(key)
+            self.stats.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.stats.hits += 1
+        return ceil(entry[1] - now), entry[0]
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self.pop(key)
+        if ttl <= 0 or len(value) > self.max_bytes:
+            return
+
+        self.entries[key] = (value, time.monotonic() + ttl)
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, (evicted_value, _) = self.entries.popitem(last=False)
+            self.size -= len(evicted_value)
+
+    def pop(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.size = 0
+
+
+def get_function_name(func: Callable[..., Any]) -> str:
+    return f"{func.__module__}:{func.__qualname__}"
+
+
+def dump_call(func_name: str, kwargs: dict[str, Any]) -> Optional[str]:
+    """Dump the call as JSON if all the arguments are JSON values or enums.
+
+    The dependencies in `CALL_DEPENDENCIES` are left out.
+    """
+    call_kwargs: dict[str, Any] = {}
+    for name, value in kwargs.items():
+        if name in CALL_DEPENDENCIES:
+            continue
+        if isinstance(value, Enum):
+            call_kwargs[name] = value.value
+        elif value is None or isinstance(value, (str, int, float)):
+            call_kwargs[name] = value
+        else:
+            return None
+    return orjson.dumps({"func": func_name, "kwargs": call_kwargs}).decode()
+
+
+def load_call(
+    call: bytes | str, redis: Optional[Redis] = None
+) -> Optional[tuple[Callable[..., Awaitable[Any]], dict[str, Any]]]:
+    """Load the function and the arguments of a call dumped by dump_call.
+
+    `redis` is passed to the functions with a `redis` parameter. Return None if
+    the function doesn't exist or has different parameters now.
+    """
+    call_data = orjson.loads(call)
+    func = cached_functions.get(call_data["func"])
+    if func is None:
+        return None
+
+    parameters = inspect.signature(func).parameters
+    kwargs: dict[str, Any] = {}
+    for name, value in call_data["kwargs"].items():
+        if name not in parameters:
+            return None
+        annotation = parameters[name].annotation
+        if isinstance(annotation, type) and issubclass(annotation, Enum):
+            kwargs[name] = annotation(value)
+        else:
+            kwargs[name] = value
+    if "redis" in parameters:
+        if redis is None:
+            return None
+        kwargs["redis"] = redis
+    return func, kwargs
+
+
+def get_hot_calls_key(window: int) -> str:
+    return f"{settings.redis_prefix}:hot_calls:{window}"
+
+
+class HotCallRecorder:
+    """Count the calls of the cached functions.
+
+    The counts are added to a redis sorted set of the current window every
+    HOT_CALL_FLUSH_INTERVAL seconds to not add a round trip to every request.
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+        self.counts: Counter[str] = Counter()
+        self.next_flush = time.monotonic() + HOT_CALL_FLUSH_INTERVAL
+        self.flush_task: Optional[asyncio.Task[None]] = None
+
+    def record(self, call: str) -> None:
+        self.counts[call] += 1
+
+        now = time.monotonic()
+        if now >= self.next_flush and (
+            self.flush_task is None or self.flush_task.done()
+        ):
+            self.next_flush = now + HOT_CALL_FLUSH_INTERVAL
+            counts, self.counts = self.counts, Counter()
+            self.flush_task = asyncio.create_task(self.flush(counts))
+
+    async def flush(self, counts: Counter[str]) -> None:  # pragma: no cover
+        key = get_hot_calls_key(int(time.time() // HOT_CALL_WINDOW))
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for call, count in counts.items():
+                    pipe.zincrby(key, count, call)
+                pipe.expire(key, 2 * HOT_CALL_WINDOW)
+                await pipe.execute()
+        except Exception:
+            logger.exception("Failed to save the cached calls counts.")
+
+
+async def get_hot_calls(redis: Redis, count: int) -> list[bytes]:  # pragma: no cover
+    """Most called cached calls of the current and previous windows."""
+    window = int(time.time() // HOT_CALL_WINDOW)
+    async with redis.pipeline(transaction=False) as pipe:
+        for hot_calls_window in (window - 1, window):
+            pipe.zrange(
+                get_hot_calls_key(hot_calls_window),
+                0,
+                count - 1,
+                desc=True,
+                withscores=True,
+            )
+        windows_calls = await pipe.execute()
+
+    counts: Counter[bytes] = Counter()
+    for window_calls in windows_calls:
+        for call, score in window_calls:
+            counts[call] += int(score)
+    return [call for call, _ in counts.most_common(count)]
+
+
+class TwoTierBackend:
+    """FastAPICache backend with a per worker LocalCache in front of redis.
+
+    The local cache is cleared when the data version in redis changes. The cache
+    generations of the regions used in the cache keys are refreshed at the same
+    time.
+    """
+
+    def __init__(self, backend: RedisBackend, redis: Redis, max_bytes: int) -> None:
+        self.backend = backend
+        self.redis = redis
+        self.local = LocalCache(max_bytes)
+        self.redis_stats = CacheStats()
+        self.data_version: Optional[int] = None
+        self.generations: dict[str, int] = {}
+        self.next_version_check = 0.0
+        self.hot_calls = HotCallRecorder(redis)
+
+    async def check_versions(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if now < self.next_version_check and not force:
+            return
+        self.next_version_check = now + DATA_VERSION_CHECK_INTERVAL
+
+        data_version, self.generations = await asyncio.gather(
+            get_data_version(self.redis), get_cache_generations(self.redis)
+        )
+        if data_version != self.data_version:
+            self.local.clear()
+            self.data_version = data_version
+
+    def get_generation(self, region: str) -> int:
+        return self.generations.get(region, 0)
+
+    async def get_with_ttl(self, key: str) -> tuple[int, Any]:
+        await self.check_versions()
+        if self.local.max_bytes > 0:
+            cached = self.local.get(key)
+            if cached is not None:
+                return cached
+
+        ttl, value = await self.backend.get_with_ttl(key)
+        if value is None:
+            self.redis_stats.misses += 1
+        else:
+            self.redis_stats.hits += 1
+            self.local.set(key, value, ttl)  # type: ignore[arg-type]
+        return ttl, value
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.backend.get(key)
+
+    async def set(self, key: str, value: str, expire: int | None = None) -> bool | None:
+        # The single flight lock is released in the same transaction so the other
+        # workers always see either the lock or the value
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                result, _ = await (
+                    pipe.set(key, value, ex=expire).delete(get_lock_key(key)).execute()
+                )
+        except BaseException:  # pragma: no cover
+            # fastapi_cache swallows the error, don't leave the other workers
+            # waiting for the value
+            await self.release_lock(key)
+            raise
+        if expire is not None:
+            self.local.set(key, value, expire)  # type: ignore[arg-type]
+        return result  # type: ignore[no-any-return]
+
+    async def acquire_lock(self, key: str) -> bool:  # pragma: no cover
+        return bool(
+            await self.redis.set(
+                get_lock_key(key), 1, nx=True, ex=SINGLE_FLIGHT_TIMEOUT
+            )
+        )
+
+    async def release_lock(self, key: str) -> None:  # pragma: no cover
+        await self.redis.delete(get_lock_key(key))
+
+    async def wait_for_value(self, key: str) -> Optional[bytes]:  # pragma: no cover
+        """Wait for the worker holding the lock of the key to set the value.
+
+        Return None if the lock is released or expires without a value.
+        """
+        deadline = time.monotonic() + SINGLE_FLIGHT_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                value, locked = await pipe.get(key).exists(get_lock_key(key)).execute()
+            if value is not None:
+                self.redis_stats.hits += 1
+                return value  # type: ignore[no-any-return]
+            if not locked:
+                return None
+        return None
+
+    async def clear(self, namespace: str | None = None, key: str | None = None) -> int:
+        self.local.clear()
+        return await self.backend.clear(namespace, key)
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "local": asdict(self.local.stats)
+            | {"entries": len(self.local.entries), "bytes": self.local.size},
+            "redis": asdict(self.redis_stats),
+        }
+
+
+def build_call_cache_key(*args: Any, **kwargs: Any) -> str:
+    """fastapi_cache key builder that saves the key for `single_flight`."""
+    cache_key: str = FastAPICache.get_key_builder()(*args, **kwargs)
+    call_cache_key.set(cache_key)
+    return cache_key
+
+
+def single_flight(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+    """Coalesce concurrent calls of a cached function with the same cache key.
+
+    Calls in the same worker wait for the result of the first call. Calls in other
+    workers wait for the first call to put its result in the cache.
+    """
+    in_flight: dict[str, asyncio.Future[R]] = {}
+
+    async def compute(cache_key: str, *args: P.args, **kwargs: P.kwargs) -> R:
+        backend = FastAPICache.get_backend()
+        if not isinstance(backend, TwoTierBackend):  # pragma: no cover
+            return await func(*args, **kwargs)
+
+        if await backend.acquire_lock(cache_key):
+            try:
+                return await func(*args, **kwargs)
+            except BaseException:
+                await backend.release_lock(cache_key)
+                raise
+
+        value = await backend.wait_for_value(cache_key)
+        if value is not None:  # pragma: no cover
+            return FastAPICache.get_coder().decode(value)
+        return await func(*args, **kwargs)  # pragma: no cover
+
+    @wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        cache_key = call_cache_key.get()
+        if cache_key is None or cache_bypassed.get():  # pragma: no cover
+            return await func(*args, **kwargs)
+
+        if cache_key in in_flight:
+            future = in_flight[cache_key]
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():  # pragma: no cover
+                    raise
+                # The first call was cancelled so this call has to do the work
+                return await compute(cache_key, *args, **kwargs)
+
+        future = asyncio.get_running_loop().create_future()
+        in_flight[cache_key] = future
+        try:
+            result = await compute(cache_key, *args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case no call is waiting for it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            in_flight.pop(cache_key, None)
+
+    return wrapper
+
+
+def record_hot_call(func_name: str, kwargs: dict[str, Any]) -> None:
+    if settings.cache_warmer_size > 0:
+        backend = FastAPICache.get_backend()
+        call = dump_call(func_name, kwargs)
+        if isinstance(backend, TwoTierBackend) and call is not None:
+            backend.hot_calls.record(call)
+
+
+def cache_warmer(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+    """Let the cache warmer call `func` to warm cached functions that can't be
+    warmed directly, e.g. because they take a db connection.
+
+    The calls have to be recorded with `record_hot_call`.
+    """
+    cached_functions[get_function_name(func)] = func
+    return func
+
+
+def cache(
+    expire: Optional[int] = None,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """fastapi_cache's cache decorator with the cache misses coalesced."""
+
+    def wrapper(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        cached = fastapi_cache(expire=expire, key_builder=build_call_cache_key)(
+            single_flight(func)
+        )
+        func_name = get_function_name(func)
+
+        @wraps(cached)
+        async def record_call(*args: P.args, **kwargs: P.kwargs) -> R:
+            # Only the endpoint calls have a request, not the cache warmer calls
+            if "request" in kwargs:
+                record_hot_call(func_name, kwargs)
+            request = kwargs.get("request")
+            bypassed_token = cache_bypassed.set(
+                is_cache_bypassed(request if isinstance(request, Request) else None)
+            )
+            key_token = call_cache_key.set(None)
+            try:
+                backend = FastAPICache.get_backend()
+                if isinstance(backend, TwoTierBackend):
+                    # Build the cache key with the current cache generations
+                    await backend.check_versions()
+                return await cached(*args, **kwargs)
+            finally:
+                call_cache_key.reset(key_token)
+                cache_bypassed.reset(bypassed_token)
+
+        cached_functions[func_name] = record_call
+        return record_call
+
+    return wrapper
+
+
+async def warm_cache(redis: Redis) -> None:  # pragma: no cover
+    """Call the most called cached functions again after the cache is cleared."""
+    start_time = time.perf_counter()
+    backend = FastAPICache.get_backend()
+    if isinstance(backend, TwoTierBackend):
+        # Build the cache keys with the new cache generations
+        await backend.check_versions(force=True)
+
+    hot_calls = await get_hot_calls(redis, settings.cache_warmer_size)
+    semaphore = asyncio.Semaphore(CACHE_WARMER_CONCURRENCY)
+
+    async def warm(call: bytes) -> bool:
+        loaded_call = load_call(call, redis)
+        if loaded_call is None:
+            return False
+        func, kwargs = loaded_call
+        async with semaphore:
+            try:
+                await func(**kwargs)
+            except Exception:
+                logger.exception(f"Failed to warm the cache of {call!r}.")
+                return False
+        return True
+
+    warmed = await asyncio.gather(*(warm(call) for call in hot_calls))
+    logger.info(
+        f"Warmed the cache of {sum(warmed)} calls "
+        f"in {time.perf_counter() - start_time:.2f}s."
+    )
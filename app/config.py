@@ -48,18 +48,35 @@ class Settings(BaseSettings):
     rayshift_api_key: SecretStr = SecretStr("")
     rayshift_api_url: HttpUrl = parse_obj_as(HttpUrl, "https://rayshift.io/api/v1/")
     quest_cache_length: int = 3600
+    local_cache_max_mb: int = 0
+    cache_compression: bool = False
+    cache_warmer_size: int = 0
     db_pool_size: int = 3
     db_max_overflow: int = 10
+    db_fan_out_connections: int = 3
+    validate_db_rows: bool = False
     write_postgres_data: bool = True
     write_redis_data: bool = True
+    parallel_db_load: bool = False
+    db_load_workers: int = 2
+    db_copy_load: bool = False
+    db_staging_load: bool = False
+    incremental_data_update: bool = False
+    skip_unchanged_load: bool = False
+    master_snapshot: bool = False
+    columnar_store: bool = False
     asset_url: HttpUrl = parse_obj_as(
         HttpUrl, "https://assets.atlasacademy.io/GameData/"
     )
     openapi_url: Optional[HttpUrl] = None
     export_all_nice: bool = False
+    export_workers: int = 4
+    export_svt_processes: int = 0
+    export_precompressed: bool = False
     documentation_all_nice: bool = False
     github_webhook_secret: SecretStr = SecretStr("")
     github_webhook_git_pull: bool = False
+    update_worker: bool = False
     webhooks: list[str] = []
 
     @validator("asset_url", "rayshift_api_url")
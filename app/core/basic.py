@@ -1,4 +1,6 @@
+import asyncio
 from collections import defaultdict
+from dataclasses import dataclass
 from typing import Any, Callable, Generator, Iterable, Optional
 
 from fastapi import HTTPException
@@ -68,6 +70,7 @@ from ..schemas.raw import (
     MstSkill,
     MstSvt,
     MstSvtExtra,
+    MstSvtLimit,
     MstTreasureDevice,
     MstWar,
 )
@@ -348,10 +351,9 @@ async def get_basic_skill(
         )
 
         skill_reverse = BasicReversedSkillTd(
-            servant=[
-                await get_basic_servant(redis, region, svt_id, lang=lang)
-                for svt_id in sorted(activeSkills | passiveSkills)
-            ],
+            servant=await get_basic_servants(
+                redis, region, sorted(activeSkills | passiveSkills), lang=lang
+            ),
             MC=[await get_basic_mc(redis, region, mc_id, lang) for mc_id in mc_ids],
             CC=[await get_basic_cc(redis, region, cc_id, lang) for cc_id in cc_ids],
         )
@@ -383,15 +385,43 @@ async def get_basic_td(
     if reverse and reverseDepth >= ReverseDepth.servant:
         svt_ids = await get_reverse_ids(redis, region, RedisReverse.TD_TO_SVT, td_id)
         td_reverse = BasicReversedSkillTd(
-            servant=[
-                await get_basic_servant(redis, region, svt_id, lang=lang)
-                for svt_id in svt_ids
-            ]
+            servant=await get_basic_servants(redis, region, svt_ids, lang=lang)
         )
         basic_td.reverse = BasicReversedSkillTdType(basic=td_reverse)
     return basic_td
 
 
+@dataclass
+class BasicSvtRedisData:
+    mstSvt: dict[int, MstSvt]
+    mstSvtLimit: dict[int, list[MstSvtLimit]]
+    mstSvtExtra: dict[int, MstSvtExtra]
+
+
+async def fetch_basic_svt_redis_data(
+    redis: Redis,
+    region: Region,
+    svt_ids: Iterable[int],
+    mstSvts: Iterable[MstSvt] = (),
+) -> BasicSvtRedisData:
+    """Fetch the redis data of multiple basic svts at once.
+
+    MstSvt is only fetched for the svts not in `mstSvts`.
+    """
+    known_svts = {svt.id: svt for svt in mstSvts}
+    all_svt_ids = set(svt_ids) | known_svts.keys()
+
+    fetched_svts, mstSvtLimit, mstSvtExtra = await asyncio.gather(
+        pydantic_object.fetch_ids(
+            redis, region, MstSvt, all_svt_ids - known_svts.keys()
+        ),
+        pydantic_object.fetch_mstSvtLimits(redis, region, all_svt_ids),
+        pydantic_object.fetch_ids(redis, region, MstSvtExtra, all_svt_ids),
+    )
+
+    return BasicSvtRedisData(known_svts | fetched_svts, mstSvtLimit, mstSvtExtra)
+
+
 async def get_basic_svt(
     redis: Redis,
     region: Region,
@@ -399,21 +429,27 @@ async def get_basic_svt(
     svt_limit: Optional[int] = None,
     lang: Optional[Language] = None,
     mstSvt: Optional[MstSvt] = None,
+    redis_data: Optional[BasicSvtRedisData] = None,
 ) -> dict[str, Any]:
+    if redis_data is None:
+        redis_data = await fetch_basic_svt_redis_data(
+            redis, region, [svt_id], [mstSvt] if mstSvt else []
+        )
+
     if not mstSvt:
-        mstSvt = await pydantic_object.fetch_id(redis, region, MstSvt, svt_id)
+        mstSvt = redis_data.mstSvt.get(svt_id)
 
     if not mstSvt:
         raise HTTPException(status_code=404, detail="Svt not found")
 
-    mstSvtLimit = await pydantic_object.fetch_mstSvtLimit(
-        redis, region, svt_id, svt_limit, mstSvt.isServant()
+    mstSvtLimit = pydantic_object.select_mstSvtLimit(
+        redis_data.mstSvtLimit.get(svt_id, []), svt_limit, mstSvt.isServant()
     )
 
     if not mstSvtLimit:  # pragma: no cover
         raise HTTPException(status_code=404, detail="Svt not found")
 
-    svtExtra = await pydantic_object.fetch_id(redis, region, MstSvtExtra, svt_id)
+    svtExtra = redis_data.mstSvtExtra.get(svt_id)
 
     basic_servant = {
         "id": svt_id,
@@ -510,18 +546,43 @@ async def get_basic_servant(
     svt_limit: Optional[int] = None,
     lang: Optional[Language] = None,
     mstSvt: Optional[MstSvt] = None,
+    redis_data: Optional[BasicSvtRedisData] = None,
 ) -> BasicServant:
     return BasicServant.parse_obj(
-        await get_basic_svt(redis, region, item_id, svt_limit, lang, mstSvt)
+        await get_basic_svt(redis, region, item_id, svt_limit, lang, mstSvt, redis_data)
     )
 
 
+async def get_basic_servants(
+    redis: Redis,
+    region: Region,
+    svt_ids: Iterable[int],
+    svt_limit: Optional[int] = None,
+    lang: Optional[Language] = None,
+) -> list[BasicServant]:
+    svt_ids = list(svt_ids)
+    redis_data = await fetch_basic_svt_redis_data(redis, region, svt_ids)
+    return [
+        await get_basic_servant(
+            redis, region, svt_id, svt_limit, lang, redis_data=redis_data
+        )
+        for svt_id in svt_ids
+    ]
+
+
 async def get_all_basic_servants(
-    redis: Redis, region: Region, lang: Language, all_servants: list[MstSvt]
-) -> list[BasicServant]:  # pragma: no cover
+    redis: Redis, region: Region, lang: Optional[Language], all_servants: list[MstSvt]
+) -> list[BasicServant]:
+    redis_data = await fetch_basic_svt_redis_data(redis, region, [], all_servants)
     return [
         await get_basic_servant(
-            redis, region, svt.id, svt_limit=0, lang=lang, mstSvt=svt
+            redis,
+            region,
+            svt.id,
+            svt_limit=0,
+            lang=lang,
+            mstSvt=svt,
+            redis_data=redis_data,
         )
         for svt in all_servants
     ]
@@ -533,17 +594,22 @@ async def get_basic_equip(
     item_id: int,
     lang: Optional[Language] = None,
     mstSvt: Optional[MstSvt] = None,
+    redis_data: Optional[BasicSvtRedisData] = None,
 ) -> BasicEquip:
     return BasicEquip.parse_obj(
-        await get_basic_svt(redis, region, item_id, lang=lang, mstSvt=mstSvt)
+        await get_basic_svt(
+            redis, region, item_id, lang=lang, mstSvt=mstSvt, redis_data=redis_data
+        )
     )
 
 
 async def get_all_basic_equips(
-    redis: Redis, region: Region, lang: Language, all_equips: list[MstSvt]
-) -> list[BasicEquip]:  # pragma: no cover
+    redis: Redis, region: Region, lang: Optional[Language], all_equips: list[MstSvt]
+) -> list[BasicEquip]:
+    redis_data = await fetch_basic_svt_redis_data(redis, region, [], all_equips)
     return [
-        await get_basic_equip(redis, region, svt.id, lang=lang) for svt in all_equips
+        await get_basic_equip(redis, region, svt.id, lang, svt, redis_data)
+        for svt in all_equips
     ]
 
 
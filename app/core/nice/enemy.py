@@ -31,7 +31,7 @@ from ...schemas.nice import (
 )
 from ...schemas.raw import MstStage
 from ...schemas.rayshift import Deck, DeckSvt, QuestDetail, QuestDrop, UserSvt
-from ..basic import get_basic_servant
+from ..basic import BasicSvtRedisData, fetch_basic_svt_redis_data, get_basic_servant
 from ..utils import get_traits_list, get_translation, nullable_to_string
 from .skill import MultipleNiceSkills, SkillSvt, get_multiple_nice_skills
 from .td import MultipleNiceTds, TdSvt, get_multiple_nice_tds
@@ -238,11 +238,17 @@ async def get_quest_enemy(
     drops: list[QuestDrop],
     all_enemy_skills: MultipleNiceSkills,
     all_enemy_tds: MultipleNiceTds,
+    basic_svt_data: BasicSvtRedisData,
     lang: Language = Language.jp,
 ) -> QuestEnemy:
     deck_svt = deck_svt_info.deck
     basic_svt = await get_basic_servant(
-        redis, region, user_svt.svtId, user_svt.limitCount, lang
+        redis,
+        region,
+        user_svt.svtId,
+        user_svt.limitCount,
+        lang,
+        redis_data=basic_svt_data,
     )
 
     if user_svt.npcSvtClassId != 0:
@@ -408,6 +414,9 @@ async def get_quest_enemies(
     # Get all skills and NPs data at once to avoid calling the DB a lot of times
     all_skills = await get_multiple_nice_skills(conn, region, all_skill_ids, lang)
     all_tds = await get_multiple_nice_tds(conn, region, all_td_ids, lang)
+    basic_svt_data = await fetch_basic_svt_redis_data(
+        redis, region, [user_svt.svtId for user_svt in quest_detail.userSvt]
+    )
 
     out_enemies: list[list[QuestEnemy]] = []
     for stage, enemy_deck in enumerate(quest_detail.enemyDeck):
@@ -449,6 +458,7 @@ async def get_quest_enemies(
                 drops=drops,
                 all_enemy_skills=all_skills,
                 all_enemy_tds=all_tds,
+                basic_svt_data=basic_svt_data,
                 lang=lang,
             )
             stage_nice_enemies.append(nice_enemy)
@@ -465,6 +475,7 @@ async def get_quest_enemies(
                 drops=[],
                 all_enemy_skills=all_skills,
                 all_enemy_tds=all_tds,
+                basic_svt_data=basic_svt_data,
                 lang=lang,
             )
             for svt_deck in quest_detail.aiNpcDeck.svts
@@ -31,7 +31,7 @@ from ..basic import (
     get_basic_cc,
     get_basic_function,
     get_basic_mc,
-    get_basic_servant,
+    get_basic_servants,
     get_basic_skill,
     get_basic_td,
 )
@@ -201,10 +201,9 @@ async def get_nice_skill_with_reverse(
 
         if reverseData == ReverseData.basic:
             basic_skill_reverse = BasicReversedSkillTd(
-                servant=[
-                    await get_basic_servant(redis, region, svt_id, lang=lang)
-                    for svt_id in sorted(activeSkills | passiveSkills)
-                ],
+                servant=await get_basic_servants(
+                    redis, region, sorted(activeSkills | passiveSkills), lang=lang
+                ),
                 MC=[await get_basic_mc(redis, region, mc_id, lang) for mc_id in mc_ids],
                 CC=[await get_basic_cc(redis, region, cc_id, lang) for cc_id in cc_ids],
             )
@@ -248,10 +247,12 @@ async def get_nice_td_with_reverse(
     if reverse and reverseDepth >= ReverseDepth.servant:
         if reverseData == ReverseData.basic:
             basic_td_reverse = BasicReversedSkillTd(
-                servant=[
-                    await get_basic_servant(redis, region, svt_id.svtId, lang=lang)
-                    for svt_id in raw_td.mstSvtTreasureDevice
-                ]
+                servant=await get_basic_servants(
+                    redis,
+                    region,
+                    [svt_id.svtId for svt_id in raw_td.mstSvtTreasureDevice],
+                    lang=lang,
+                )
             )
             nice_td.reverse = NiceReversedSkillTdType(basic=basic_td_reverse)
         else:
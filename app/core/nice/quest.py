@@ -4,9 +4,9 @@ from dataclasses import dataclass
 from typing import Any, Optional, Union
 
 from fastapi import HTTPException
-from fastapi_cache.decorator import cache
 from sqlalchemy.ext.asyncio import AsyncConnection
 
+from ...cache import cache
 from ...config import Settings
 from ...db.helpers import war
 from ...db.helpers.quest import get_questSelect_container
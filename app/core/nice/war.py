@@ -1,3 +1,5 @@
+import asyncio
+
 from sqlalchemy.ext.asyncio import AsyncConnection
 
 from ...config import Settings
@@ -253,11 +255,14 @@ async def get_nice_spot(
             if spot_add.spotId == raw_spot.id
         ],
         quests=[
-            NiceQuest.parse_obj(
-                await get_nice_quest(conn, region, quest, lang, mstWar, raw_spot)
+            NiceQuest.parse_obj(nice_quest)
+            for nice_quest in await asyncio.gather(
+                *(
+                    get_nice_quest(conn, region, quest, lang, mstWar, raw_spot)
+                    for quest in quests
+                    if quest.mstQuest.spotId == raw_spot.id
+                )
             )
-            for quest in quests
-            if quest.mstQuest.spotId == raw_spot.id
         ],
     )
 
@@ -351,34 +356,38 @@ async def get_nice_war(
             )
             for raw_map in raw_war.mstMap
         ],
-        spots=[
-            await get_nice_spot(
-                conn,
-                region,
-                raw_war.mstWar,
-                raw_spot,
-                raw_war.mstSpotAdd,
-                war_asset_id,
-                raw_war.mstQuest,
-                lang,
+        spots=await asyncio.gather(
+            *(
+                get_nice_spot(
+                    conn,
+                    region,
+                    raw_war.mstWar,
+                    raw_spot,
+                    raw_war.mstSpotAdd,
+                    war_asset_id,
+                    raw_war.mstQuest,
+                    lang,
+                )
+                for raw_spot in raw_war.mstSpot
+                if raw_spot.warId == war_id
             )
-            for raw_spot in raw_war.mstSpot
-            if raw_spot.warId == war_id
-        ],
+        ),
         spotRoads=[
             get_nice_spot_road(region, spot_road, war_asset_id)
             for spot_road in raw_war.mstSpotRoad
         ],
-        questSelections=[
-            await get_nice_war_quest_selection(
-                conn,
-                region,
-                quest_selection,
-                raw_war.mstWar,
-                raw_war.mstQuest,
-                raw_war.mstSpot,
-                lang,
+        questSelections=await asyncio.gather(
+            *(
+                get_nice_war_quest_selection(
+                    conn,
+                    region,
+                    quest_selection,
+                    raw_war.mstWar,
+                    raw_war.mstQuest,
+                    raw_war.mstSpot,
+                    lang,
+                )
+                for quest_selection in raw_war.mstWarQuestSelection
             )
-            for quest_selection in raw_war.mstWarQuestSelection
-        ],
+        ),
     )
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Iterable, Optional
 
 import orjson
@@ -7,6 +8,8 @@ from sqlalchemy.ext.asyncio import AsyncConnection
 from ..data.custom_mappings import EXTRA_CHARAFIGURES
 from ..data.shop import get_shop_cost_item_id
 from ..db.helpers import ai, event, fetch, item, quest, script, skill, svt, td, war
+from ..db.helpers.fan_out import fan_out
+from ..db.helpers.loader import get_loader
 from ..redis import Redis
 from ..redis.helpers.reverse import RedisReverse, get_reverse_ids
 from ..schemas.common import Region, ReverseDepth
@@ -33,11 +36,6 @@ from ..schemas.raw import (
     MstBoxGachaTalk,
     MstBuff,
     MstClosedMessage,
-    MstCombineAppendPassiveSkill,
-    MstCombineCostume,
-    MstCombineLimit,
-    MstCombineMaterial,
-    MstCombineSkill,
     MstCommandCode,
     MstCommandCodeComment,
     MstCommandCodeSkill,
@@ -77,7 +75,6 @@ from ..schemas.raw import (
     MstEventRewardSet,
     MstEventTower,
     MstEventVoicePlay,
-    MstFriendship,
     MstFunc,
     MstFuncGroup,
     MstGift,
@@ -94,25 +91,10 @@ from ..schemas.raw import (
     MstSpotAdd,
     MstSpotRoad,
     MstSvt,
-    MstSvtAdd,
-    MstSvtAppendPassiveSkill,
-    MstSvtAppendPassiveSkillUnlock,
-    MstSvtCard,
-    MstSvtCardAdd,
-    MstSvtChange,
-    MstSvtCoin,
     MstSvtComment,
     MstSvtCommentAdd,
-    MstSvtCostume,
-    MstSvtExp,
     MstSvtExtra,
     MstSvtGroup,
-    MstSvtIndividuality,
-    MstSvtLimit,
-    MstSvtLimitAdd,
-    MstSvtLimitImage,
-    MstSvtMultiPortrait,
-    MstSvtPassiveSkill,
     MstSvtScript,
     MstSvtVoice,
     MstSvtVoiceRelation,
@@ -195,13 +177,13 @@ async def get_func_entity_no_reverse(
         mstFuncGroup=await fetch.get_all(conn, MstFuncGroup, func_id),
     )
     if expand and func_entity.mstFunc.funcType not in FUNC_VALS_NOT_BUFF:
-        func_entity.mstFunc.expandedVals = []
-        for buff_id in func_entity.mstFunc.vals:
-            mstBuff = await fetch.get_one(conn, MstBuff, buff_id)
-            if mstBuff:
-                func_entity.mstFunc.expandedVals.append(
-                    await get_buff_entity_no_reverse(conn, buff_id, mstBuff)
-                )
+        func_entity.mstFunc.expandedVals = [
+            BuffEntityNoReverse(mstBuff=mstBuff)
+            for mstBuff in await get_loader(conn).load_many(
+                MstBuff, func_entity.mstFunc.vals
+            )
+            if mstBuff
+        ]
     return func_entity
 
 
@@ -393,57 +375,31 @@ async def get_servant_entity(
     lore: bool = False,
     mstSvt: Optional[MstSvt] = None,
 ) -> ServantEntity:
-    svt_db = mstSvt if mstSvt else await fetch.get_one(conn, MstSvt, servant_id)
-    if not svt_db:
+    svt_tables = await svt.get_svt_entity_tables(conn, servant_id, mstSvt)
+    if not svt_tables:
         raise HTTPException(status_code=404, detail="Svt not found")
 
-    mstSvtIndividuality = await fetch.get_all(conn, MstSvtIndividuality, servant_id)
-    mstSvtCard = await fetch.get_all(conn, MstSvtCard, servant_id)
-    mstSvtCardAdd = await fetch.get_all(conn, MstSvtCardAdd, servant_id)
-    mstSvtLimit = await fetch.get_all(conn, MstSvtLimit, servant_id)
-    mstCombineSkill = await fetch.get_all(conn, MstCombineSkill, svt_db.combineSkillId)
-    mstCombineLimit = await fetch.get_all(conn, MstCombineLimit, svt_db.combineLimitId)
-    mstCombineCostume = await fetch.get_all(conn, MstCombineCostume, servant_id)
-    mstSvtLimitAdd = await fetch.get_all(conn, MstSvtLimitAdd, servant_id)
-    mstSvtLimitImage = await fetch.get_all(conn, MstSvtLimitImage, servant_id)
-    mstSvtChange = await fetch.get_all(conn, MstSvtChange, servant_id)
-    mstSvtCostume = await fetch.get_all(conn, MstSvtCostume, servant_id)
-    mstSvtExp = await fetch.get_all(conn, MstSvtExp, svt_db.expType)
-    mstFriendship = await fetch.get_all(conn, MstFriendship, svt_db.friendshipId)
-    mstCombineMaterial = await fetch.get_all(
-        conn, MstCombineMaterial, svt_db.combineMaterialId
-    )
-    mstSvtPassiveSkill = await fetch.get_all(conn, MstSvtPassiveSkill, servant_id)
-    mstSvtExtra = await fetch.get_one(conn, MstSvtExtra, servant_id)
-    mstSvtAppendPassiveSkill = await fetch.get_all(
-        conn, MstSvtAppendPassiveSkill, servant_id
-    )
-    mstSvtAppendPassiveSkillUnlock = await fetch.get_all(
-        conn, MstSvtAppendPassiveSkillUnlock, servant_id
-    )
-    mstCombineAppendPassiveSkill = await fetch.get_all(
-        conn, MstCombineAppendPassiveSkill, servant_id
-    )
-    mstSvtCoin = await fetch.get_one(conn, MstSvtCoin, servant_id)
-    mstSvtAdd = await fetch.get_one(conn, MstSvtAdd, servant_id)
-    mstSvtMultiPortrait = await fetch.get_all(conn, MstSvtMultiPortrait, servant_id)
+    svt_db = svt_tables.mstSvt
+    mstSvtLimit = svt_tables.mstSvtLimit
+    mstCombineSkill = svt_tables.mstCombineSkill
+    mstCombineLimit = svt_tables.mstCombineLimit
+    mstCombineCostume = svt_tables.mstCombineCostume
+    mstSvtLimitAdd = svt_tables.mstSvtLimitAdd
+    mstSvtPassiveSkill = svt_tables.mstSvtPassiveSkill
+    mstSvtAppendPassiveSkill = svt_tables.mstSvtAppendPassiveSkill
+    mstSvtAppendPassiveSkillUnlock = svt_tables.mstSvtAppendPassiveSkillUnlock
+    mstCombineAppendPassiveSkill = svt_tables.mstCombineAppendPassiveSkill
+    mstSvtCoin = svt_tables.mstSvtCoin
 
     costume_chara_ids = [limit.battleCharaId for limit in mstSvtLimitAdd]
-    mstSvtScript = await svt.get_svt_script(
-        conn, [servant_id, *costume_chara_ids, *EXTRA_CHARAFIGURES.get(servant_id, [])]
-    )
-
-    skill_ids = [
-        skill.skillId for skill in await skill.get_mstSvtSkill(conn, svt_id=servant_id)
+    script_svt_ids = [
+        servant_id,
+        *costume_chara_ids,
+        *EXTRA_CHARAFIGURES.get(servant_id, []),
     ]
-    mstSkill = await get_skill_entity_no_reverse_many(conn, skill_ids, expand)
 
-    td_ids = [
-        td.treasureDeviceId
-        for td in await td.get_mstSvtTreasureDevice(conn, svt_id=servant_id)
-        if td.treasureDeviceId != EXTRA_ATTACK_TD_ID
-    ]
-    mstTreasureDevice = await get_td_entity_no_reverse_many(conn, td_ids, expand)
+    skill_ids = svt_tables.skillIds
+    td_ids = [td_id for td_id in svt_tables.tdIds if td_id != EXTRA_ATTACK_TD_ID]
 
     item_ids: set[int] = set()
     for combine in (
@@ -457,8 +413,6 @@ async def get_servant_entity(
     if mstSvtCoin is not None:
         item_ids.add(mstSvtCoin.itemId)
 
-    mstItem = await get_multiple_items(conn, item_ids)
-
     common_release_ids: set[int] = set()
     for limit in mstSvtLimit:
         try:
@@ -472,40 +426,57 @@ async def get_servant_entity(
         except orjson.JSONDecodeError:  # pragma: no cover
             pass
 
-    mstCommonRelease = await fetch.get_all_multiple(
-        conn, MstCommonRelease, common_release_ids
-    )
+    async with fan_out(conn) as db:
+        (
+            mstSvtScript,
+            mstSkill,
+            mstTreasureDevice,
+            mstItem,
+            mstCommonRelease,
+        ) = await asyncio.gather(
+            db.run(lambda conn: svt.get_svt_script(conn, script_svt_ids)),
+            db.run(
+                lambda conn: get_skill_entity_no_reverse_many(conn, skill_ids, expand)
+            ),
+            db.run(lambda conn: get_td_entity_no_reverse_many(conn, td_ids, expand)),
+            db.run(lambda conn: get_multiple_items(conn, item_ids)),
+            db.run(
+                lambda conn: fetch.get_all_multiple(
+                    conn, MstCommonRelease, common_release_ids
+                )
+            ),
+        )
 
     svt_entity = ServantEntity(
         mstSvt=svt_db,
-        mstSvtIndividuality=mstSvtIndividuality,
-        mstSvtCard=mstSvtCard,
-        mstSvtCardAdd=mstSvtCardAdd,
+        mstSvtIndividuality=svt_tables.mstSvtIndividuality,
+        mstSvtCard=svt_tables.mstSvtCard,
+        mstSvtCardAdd=svt_tables.mstSvtCardAdd,
         mstSvtLimit=mstSvtLimit,
         mstCombineSkill=mstCombineSkill,
         mstCombineLimit=mstCombineLimit,
         mstCombineCostume=mstCombineCostume,
-        mstCombineMaterial=mstCombineMaterial,
+        mstCombineMaterial=svt_tables.mstCombineMaterial,
         mstSvtLimitAdd=mstSvtLimitAdd,
-        mstSvtLimitImage=mstSvtLimitImage,
-        mstSvtChange=mstSvtChange,
+        mstSvtLimitImage=svt_tables.mstSvtLimitImage,
+        mstSvtChange=svt_tables.mstSvtChange,
         mstSvtPassiveSkill=mstSvtPassiveSkill,
         mstSvtAppendPassiveSkill=mstSvtAppendPassiveSkill,
         mstSvtAppendPassiveSkillUnlock=mstSvtAppendPassiveSkillUnlock,
         mstCombineAppendPassiveSkill=mstCombineAppendPassiveSkill,
         mstSvtCoin=mstSvtCoin,
-        mstSvtAdd=mstSvtAdd,
+        mstSvtAdd=svt_tables.mstSvtAdd,
         # needed costume to get the nice limits and costume ids
-        mstSvtCostume=mstSvtCostume,
+        mstSvtCostume=svt_tables.mstSvtCostume,
         # needed this to get CharaFigure available forms
         mstSvtScript=mstSvtScript,
-        mstSvtExp=mstSvtExp,
-        mstFriendship=mstFriendship,
+        mstSvtExp=svt_tables.mstSvtExp,
+        mstFriendship=svt_tables.mstFriendship,
         mstSkill=mstSkill,
         mstTreasureDevice=mstTreasureDevice,
-        mstSvtExtra=mstSvtExtra,
+        mstSvtExtra=svt_tables.mstSvtExtra,
         mstItem=mstItem,
-        mstSvtMultiPortrait=mstSvtMultiPortrait,
+        mstSvtMultiPortrait=svt_tables.mstSvtMultiPortrait,
         mstCommonRelease=mstCommonRelease,
     )
 
@@ -538,14 +509,33 @@ async def get_servant_entity(
         ]
 
     if lore:
-        svt_entity.mstCv = await fetch.get_one(conn, MstCv, svt_db.cvId)
-        svt_entity.mstIllustrator = await fetch.get_one(
-            conn, MstIllustrator, svt_db.illustratorId
-        )
-        svt_entity.mstSvtComment = await fetch.get_all(conn, MstSvtComment, servant_id)
-        svt_entity.mstSvtCommentAdd = await fetch.get_all(
-            conn, MstSvtCommentAdd, servant_id
-        )
+        # Moriarty deadheat summer lines use his hidden name svt_id
+        relation_svt_ids = [change.svtVoiceId for change in svt_entity.mstSvtChange] + [
+            servant_id
+        ]
+
+        async with fan_out(conn) as db:
+            (
+                svt_entity.mstCv,
+                svt_entity.mstIllustrator,
+                svt_entity.mstSvtComment,
+                svt_entity.mstSvtCommentAdd,
+                voiceRelations,
+            ) = await asyncio.gather(
+                db.run(lambda conn: fetch.get_one(conn, MstCv, svt_db.cvId)),
+                db.run(
+                    lambda conn: fetch.get_one(
+                        conn, MstIllustrator, svt_db.illustratorId
+                    )
+                ),
+                db.run(lambda conn: fetch.get_all(conn, MstSvtComment, servant_id)),
+                db.run(lambda conn: fetch.get_all(conn, MstSvtCommentAdd, servant_id)),
+                db.run(
+                    lambda conn: fetch.get_all_multiple(
+                        conn, MstSvtVoiceRelation, relation_svt_ids
+                    )
+                ),
+            )
 
         # Try to match order in the voice tab in game
         voice_ids = []
@@ -562,24 +552,20 @@ async def get_servant_entity(
             if servant_id == main_id:
                 voice_ids.append(sub_id)
 
-        # Moriarty deadheat summer lines use his hidden name svt_id
-        relation_svt_ids = [change.svtVoiceId for change in svt_entity.mstSvtChange] + [
-            servant_id
-        ]
-        voiceRelations = await fetch.get_all_multiple(
-            conn, MstSvtVoiceRelation, relation_svt_ids
-        )
         for voiceRelation in voiceRelations:
             voice_ids.append(voiceRelation.relationSvtId)
 
         order = {voice_id: i for i, voice_id in enumerate(voice_ids)}
-        mstSvtVoice = await svt.get_mstSvtVoice(conn, voice_ids)
-        mstSubtitle = await svt.get_mstSubtitle(conn, voice_ids)
-        mstVoicePlayCond = await svt.get_mstVoicePlayCond(conn, voice_ids)
-
-        svt_entity.mstVoice = await get_voice_from_svtVoice(conn, mstSvtVoice)
-
-        svt_entity.mstSvtGroup = await get_voice_group_from_svtVoice(conn, mstSvtVoice)
+        async with fan_out(conn) as db:
+            mstSvtVoice, mstSubtitle, mstVoicePlayCond = await asyncio.gather(
+                db.run(lambda conn: svt.get_mstSvtVoice(conn, voice_ids)),
+                db.run(lambda conn: svt.get_mstSubtitle(conn, voice_ids)),
+                db.run(lambda conn: svt.get_mstVoicePlayCond(conn, voice_ids)),
+            )
+            svt_entity.mstVoice, svt_entity.mstSvtGroup = await asyncio.gather(
+                db.run(lambda conn: get_voice_from_svtVoice(conn, mstSvtVoice)),
+                db.run(lambda conn: get_voice_group_from_svtVoice(conn, mstSvtVoice)),
+            )
 
         svt_entity.mstSvtVoice = sorted(mstSvtVoice, key=lambda voice: order[voice.id])
         svt_entity.mstVoicePlayCond = sorted(
@@ -674,13 +660,8 @@ async def get_command_code_entity(
 async def get_multiple_items(
     conn: AsyncConnection, item_ids: Iterable[int]
 ) -> list[MstItem]:
-    items = await fetch.get_all_multiple(conn, MstItem, item_ids)
-    item_map = {item.id: item for item in items}
-    out_list: list[MstItem] = []
-    for item_id in item_ids:
-        if item_id in item_map:
-            out_list.append(item_map[item_id])
-    return out_list
+    items = await get_loader(conn).load_many(MstItem, item_ids)
+    return [item for item in items if item]
 
 
 async def get_item_entity(conn: AsyncConnection, item_id: int) -> ItemEntity:
@@ -692,47 +673,65 @@ async def get_item_entity(conn: AsyncConnection, item_id: int) -> ItemEntity:
 
 
 async def get_war_entity(conn: AsyncConnection, war_id: int) -> WarEntity:
-    war_db = await fetch.get_one(conn, MstWar, war_id)
-    if not war_db:
-        raise HTTPException(status_code=404, detail="War not found")
-
-    quest_selections = await fetch.get_all(conn, MstWarQuestSelection, war_id)
-
-    maps = await fetch.get_all(conn, MstMap, war_id)
-    map_ids = [event_map.id for event_map in maps]
-
-    spots = await fetch.get_all_multiple(conn, MstSpot, map_ids)
-    spot_ids = [spot.id for spot in spots]
-    spot_adds = await fetch.get_all_multiple(conn, MstSpotAdd, spot_ids)
-
-    quests = await quest.get_quest_by_spot(conn, spot_ids)
-
-    quest_selection_ids = [selection.questId for selection in quest_selections]
-    selection_quests = await quest.get_quest_entity(conn, quest_selection_ids)
-    selection_spot_ids = {quest.mstQuest.spotId for quest in selection_quests}
-    selection_spots = await war.get_spot_from_ids(conn, selection_spot_ids)
+    # Each fetch starts as soon as the fetches it depends on are done
+    async with fan_out(conn) as db:
+        war_task = db.run(lambda conn: fetch.get_one(conn, MstWar, war_id))
+        quest_selections_task = db.run(
+            lambda conn: fetch.get_all(conn, MstWarQuestSelection, war_id)
+        )
+        maps_task = db.run(lambda conn: fetch.get_all(conn, MstMap, war_id))
+        war_adds_task = db.run(lambda conn: fetch.get_all(conn, MstWarAdd, war_id))
+
+        war_db = await war_task
+        if not war_db:
+            raise HTTPException(status_code=404, detail="War not found")
+        event_id = war_db.eventId
+        event_task = db.run(lambda conn: fetch.get_one(conn, MstEvent, event_id))
+
+        maps = await maps_task
+        map_ids = [event_map.id for event_map in maps]
+        bgm_ids = [war_map.bgmId for war_map in maps] + [war_db.bgmId]
+        spots_task = db.run(lambda conn: fetch.get_all_multiple(conn, MstSpot, map_ids))
+        gimmicks_task = db.run(
+            lambda conn: fetch.get_all_multiple(conn, MstMapGimmick, map_ids)
+        )
+        bgms_task = db.run(lambda conn: fetch.get_all_multiple(conn, MstBgm, bgm_ids))
+        spot_roads_task = db.run(
+            lambda conn: fetch.get_all_multiple(conn, MstSpotRoad, map_ids)
+        )
 
-    quests += selection_quests
-    spots += selection_spots
+        quest_selections = await quest_selections_task
+        quest_selection_ids = [selection.questId for selection in quest_selections]
+        selection_quests_task = db.run(
+            lambda conn: quest.get_quest_entity(conn, quest_selection_ids)
+        )
 
-    bgm_ids = [war_map.bgmId for war_map in maps] + [war_db.bgmId]
-    bgms = await fetch.get_all_multiple(conn, MstBgm, bgm_ids)
+        map_spots = await spots_task
+        spot_ids = [spot.id for spot in map_spots]
+        spot_adds_task = db.run(
+            lambda conn: fetch.get_all_multiple(conn, MstSpotAdd, spot_ids)
+        )
+        spot_quests_task = db.run(lambda conn: quest.get_quest_by_spot(conn, spot_ids))
 
-    spot_roads = await fetch.get_all_multiple(conn, MstSpotRoad, map_ids)
+        selection_quests = await selection_quests_task
+        selection_spot_ids = {quest.mstQuest.spotId for quest in selection_quests}
+        selection_spots = await db.run(
+            lambda conn: war.get_spot_from_ids(conn, selection_spot_ids)
+        )
 
-    return WarEntity(
-        mstWar=war_db,
-        mstEvent=await fetch.get_one(conn, MstEvent, war_db.eventId),
-        mstWarAdd=await fetch.get_all(conn, MstWarAdd, war_id),
-        mstMap=maps,
-        mstMapGimmick=await fetch.get_all_multiple(conn, MstMapGimmick, map_ids),
-        mstBgm=bgms,
-        mstSpot=spots,
-        mstSpotAdd=spot_adds,
-        mstQuest=quests,
-        mstSpotRoad=spot_roads,
-        mstWarQuestSelection=quest_selections,
-    )
+        return WarEntity(
+            mstWar=war_db,
+            mstEvent=await event_task,
+            mstWarAdd=await war_adds_task,
+            mstMap=maps,
+            mstMapGimmick=await gimmicks_task,
+            mstBgm=await bgms_task,
+            mstSpot=map_spots + selection_spots,
+            mstSpotAdd=await spot_adds_task,
+            mstQuest=await spot_quests_task + selection_quests,
+            mstSpotRoad=await spot_roads_task,
+            mstWarQuestSelection=quest_selections,
+        )
 
 
 def get_quest_ids_in_conds(
@@ -799,241 +798,345 @@ async def get_master_mission_entity(
 
 
 async def get_event_entity(conn: AsyncConnection, event_id: int) -> EventEntity:
-    mstEvent = await fetch.get_one(conn, MstEvent, event_id)
-    if not mstEvent:
-        raise HTTPException(status_code=404, detail="Event not found")
-
-    missions = await fetch.get_all(conn, MstEventMission, event_id)
-    mission_ids = [mission.id for mission in missions]
-
-    conds = await fetch.get_all_multiple(conn, MstEventMissionCondition, mission_ids)
-    cond_detail_ids = [
-        target_id
-        for cond in conds
-        if cond.condType == CondType.MISSION_CONDITION_DETAIL
-        for target_id in cond.targetIds
-    ]
-
-    cond_details = await fetch.get_all_multiple(
-        conn, MstEventMissionConditionDetail, cond_detail_ids
-    )
-
-    box_gachas = await fetch.get_all(conn, MstBoxGacha, event_id)
-
-    box_gacha_base_ids = [
-        base_id for box_gacha in box_gachas for base_id in box_gacha.baseIds
-    ]
-    gacha_bases = await event.get_mstBoxGachaBase(conn, box_gacha_base_ids)
-
-    box_gacha_talk_ids = {
-        talk_id for box_gacha in box_gachas for talk_id in box_gacha.talkIds
-    }
-    gacha_talks = await fetch.get_all_multiple(
-        conn, MstBoxGachaTalk, box_gacha_talk_ids
-    )
+    # Each fetch starts as soon as the fetches it depends on are done
+    async with fan_out(conn) as db:
+        event_task = db.run(lambda conn: fetch.get_one(conn, MstEvent, event_id))
+        missions_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventMission, event_id)
+        )
+        box_gachas_task = db.run(
+            lambda conn: fetch.get_all(conn, MstBoxGacha, event_id)
+        )
+        voice_plays_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventVoicePlay, event_id)
+        )
+        reward_scenes_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventRewardScene, event_id)
+        )
+        shops_task = db.run(lambda conn: fetch.get_all(conn, MstShop, event_id))
+        rewards_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventReward, event_id)
+        )
+        tower_rewards_task = db.run(
+            lambda conn: event.get_mstEventTowerReward(conn, event_id)
+        )
+        treasure_boxes_task = db.run(
+            lambda conn: fetch.get_all(conn, MstTreasureBox, event_id)
+        )
+        digging_task = db.run(
+            lambda conn: fetch.get_one(conn, MstEventDigging, event_id)
+        )
+        digging_blocks_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventDiggingBlock, event_id)
+        )
+        digging_rewards_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventDiggingReward, event_id)
+        )
+        event_cooltimes_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventCooltimeReward, event_id)
+        )
+        bulletins_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventBulletinBoard, event_id)
+        )
+        recipes_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventRecipe, event_id)
+        )
+        fortifications_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventFortification, event_id)
+        )
+        fortification_details_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventFortificationDetail, event_id)
+        )
+        fortification_servants_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventFortificationSvt, event_id)
+        )
+        wars_task = db.run(lambda conn: event.get_event_wars(conn, event_id))
+        reward_sets_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventRewardSet, event_id)
+        )
+        point_groups_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventPointGroup, event_id)
+        )
+        point_buffs_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventPointBuff, event_id)
+        )
+        random_missions_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventRandomMission, event_id)
+        )
+        towers_task = db.run(lambda conn: fetch.get_all(conn, MstEventTower, event_id))
+        quest_cooltimes_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventQuestCooltime, event_id)
+        )
+        event_quests_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventQuest, event_id)
+        )
+        campaigns_task = db.run(
+            lambda conn: fetch.get_all(conn, MstEventCampaign, event_id)
+        )
 
-    voice_plays = await fetch.get_all(conn, MstEventVoicePlay, event_id)
+        mstEvent = await event_task
+        if not mstEvent:
+            raise HTTPException(status_code=404, detail="Event not found")
 
-    reward_scenes = await fetch.get_all(conn, MstEventRewardScene, event_id)
+        missions = await missions_task
+        mission_ids = [mission.id for mission in missions]
+        conds_task = db.run(
+            lambda conn: fetch.get_all_multiple(
+                conn, MstEventMissionCondition, mission_ids
+            )
+        )
 
-    costume_limits = [
-        svt.SvtLimit(svt_id=svt_id, limit=limit)
-        for reward_scene in reward_scenes
-        for svt_id, limit in zip(
-            reward_scene.guideImageIds, reward_scene.guideLimitCounts, strict=False
+        box_gachas = await box_gachas_task
+        box_gacha_base_ids = [
+            base_id for box_gacha in box_gachas for base_id in box_gacha.baseIds
+        ]
+        gacha_bases_task = db.run(
+            lambda conn: event.get_mstBoxGachaBase(conn, box_gacha_base_ids)
+        )
+        box_gacha_talk_ids = {
+            talk_id for box_gacha in box_gachas for talk_id in box_gacha.talkIds
+        }
+        gacha_talks_task = db.run(
+            lambda conn: fetch.get_all_multiple(
+                conn, MstBoxGachaTalk, box_gacha_talk_ids
+            )
         )
-        if limit >= COSTUME_LIMIT_NO_LESS_THAN
-    ]
-    mstSvtLimitAdd = await svt.get_svt_limit_add(conn, costume_limits)
 
-    voice_ids = (
-        {voice_play.guideImageId for voice_play in voice_plays}
-        | {gacha_talk.guideImageId for gacha_talk in gacha_talks}
-        | {guide_id for scene in reward_scenes for guide_id in scene.guideImageIds}
-    )
+        reward_scenes = await reward_scenes_task
+        costume_limits = [
+            svt.SvtLimit(svt_id=svt_id, limit=limit)
+            for reward_scene in reward_scenes
+            for svt_id, limit in zip(
+                reward_scene.guideImageIds, reward_scene.guideLimitCounts, strict=False
+            )
+            if limit >= COSTUME_LIMIT_NO_LESS_THAN
+        ]
+        svt_limit_adds_task = db.run(
+            lambda conn: svt.get_svt_limit_add(conn, costume_limits)
+        )
+        bgm_ids = {reward_scene.bgmId for reward_scene in reward_scenes} | {
+            reward_scene.afterBgmId for reward_scene in reward_scenes
+        }
 
-    mstSvtVoice = await svt.get_mstSvtVoice(conn, voice_ids)
-    mstVoice = await get_voice_from_svtVoice(conn, mstSvtVoice)
-    mstSvtGroup = await get_voice_group_from_svtVoice(conn, mstSvtVoice)
-    mstSubtitle = await svt.get_mstSubtitle(conn, voice_ids)
-    mstVoicePlayCond = await svt.get_mstVoicePlayCond(conn, voice_ids)
-    mstSvtExtra = await fetch.get_all_multiple(conn, MstSvtExtra, voice_ids)
+        async def get_bgms(conn: AsyncConnection) -> list[BgmEntity]:
+            return [await get_bgm_entity(conn, bgm_id) for bgm_id in bgm_ids]
 
-    shops = await fetch.get_all(conn, MstShop, event_id)
-    set_item_ids = [
-        set_id
-        for shop in shops
-        for set_id in shop.targetIds
-        if shop.purchaseType == PurchaseType.SET_ITEM
-    ]
-    set_items = await item.get_mstSetItem(conn, set_item_ids)
-    shop_consume_ids = {
-        shop.itemIds[0] for shop in shops if shop.payType == PayType.COMMON_CONSUME
-    }
+        bgms_task = db.run(get_bgms)
 
-    shop_ids = [shop.id for shop in shops]
-    shop_scripts = await fetch.get_all_multiple(conn, MstShopScript, shop_ids)
-    shop_releases = await fetch.get_all_multiple(conn, MstShopRelease, shop_ids)
+        shops = await shops_task
+        set_item_ids = [
+            set_id
+            for shop in shops
+            for set_id in shop.targetIds
+            if shop.purchaseType == PurchaseType.SET_ITEM
+        ]
+        set_items_task = db.run(lambda conn: item.get_mstSetItem(conn, set_item_ids))
+        shop_ids = [shop.id for shop in shops]
+        shop_scripts_task = db.run(
+            lambda conn: fetch.get_all_multiple(conn, MstShopScript, shop_ids)
+        )
+        shop_releases_task = db.run(
+            lambda conn: fetch.get_all_multiple(conn, MstShopRelease, shop_ids)
+        )
 
-    rewards = await fetch.get_all(conn, MstEventReward, event_id)
+        treasure_boxes = await treasure_boxes_task
+        box_gift_ids = {box.treasureBoxGiftId for box in treasure_boxes}
+        box_gifts_task = db.run(
+            lambda conn: fetch.get_all_multiple(conn, MstTreasureBoxGift, box_gift_ids)
+        )
 
-    tower_rewards = await event.get_mstEventTowerReward(conn, event_id)
+        bulletins = await bulletins_task
+        bulletin_ids = {bulletin.id for bulletin in bulletins}
+        bulletin_releases_task = db.run(
+            lambda conn: fetch.get_all_multiple(
+                conn, MstEventBulletinBoardRelease, bulletin_ids
+            )
+        )
 
-    treasure_boxes = await fetch.get_all(conn, MstTreasureBox, event_id)
-    box_gift_ids = {box.treasureBoxGiftId for box in treasure_boxes}
-    box_gifts = await fetch.get_all_multiple(conn, MstTreasureBoxGift, box_gift_ids)
+        recipes = await recipes_task
+        recipe_ids = {recipe.id for recipe in recipes}
+        recipe_gifts_task = db.run(
+            lambda conn: fetch.get_all_multiple(conn, MstEventRecipeGift, recipe_ids)
+        )
 
-    digging = await fetch.get_one(conn, MstEventDigging, event_id)
-    if digging:
-        digging_blocks = await fetch.get_all(conn, MstEventDiggingBlock, event_id)
-        digging_rewards = await fetch.get_all(conn, MstEventDiggingReward, event_id)
+        digging = await digging_task
+        if digging:
+            digging_blocks = await digging_blocks_task
+            digging_rewards = await digging_rewards_task
+        else:
+            digging_blocks = []
+            digging_rewards = []
         digging_gift_ids = {reward.giftId for reward in digging_rewards}
         digging_consume_ids = {block.commonConsumeId for block in digging_blocks}
-    else:
-        digging_blocks = []
-        digging_rewards = []
-        digging_gift_ids = set()
-        digging_consume_ids = set()
-
-    event_cooltimes = await fetch.get_all(conn, MstEventCooltimeReward, event_id)
-    cooltime_release_ids = {cooltime.commonReleaseId for cooltime in event_cooltimes}
-
-    bulletins = await fetch.get_all(conn, MstEventBulletinBoard, event_id)
-    bulletin_ids = {bulletin.id for bulletin in bulletins}
-    bulletin_releases = await fetch.get_all_multiple(
-        conn, MstEventBulletinBoardRelease, bulletin_ids
-    )
-
-    recipes = await fetch.get_all(conn, MstEventRecipe, event_id)
-    recipe_ids = {recipe.id for recipe in recipes}
-    recipe_gifts = await fetch.get_all_multiple(conn, MstEventRecipeGift, recipe_ids)
-    recipe_release_ids = {recipe.commonReleaseId for recipe in recipes}
-
-    fortifications = await fetch.get_all(conn, MstEventFortification, event_id)
-    fortification_details = await fetch.get_all(
-        conn, MstEventFortificationDetail, event_id
-    )
-    fortification_servants = await fetch.get_all(
-        conn, MstEventFortificationSvt, event_id
-    )
-    fortification_gift_ids = {fortification.giftId for fortification in fortifications}
-    fortification_release_ids = (
-        {fortification.commonReleaseId for fortification in fortifications}
-        | {detail.commonReleaseId for detail in fortification_details}
-        | {svt.commonReleaseId for svt in fortification_servants}
-    )
 
-    common_release_ids = (
-        cooltime_release_ids | recipe_release_ids | fortification_release_ids
-    )
-    common_releases = await fetch.get_all_multiple(
-        conn, MstCommonRelease, common_release_ids
-    )
+        event_cooltimes = await event_cooltimes_task
+        fortifications = await fortifications_task
+        fortification_details = await fortification_details_task
+        fortification_servants = await fortification_servants_task
+        fortification_gift_ids = {
+            fortification.giftId for fortification in fortifications
+        }
+        common_release_ids = (
+            {cooltime.commonReleaseId for cooltime in event_cooltimes}
+            | {recipe.commonReleaseId for recipe in recipes}
+            | {fortification.commonReleaseId for fortification in fortifications}
+            | {detail.commonReleaseId for detail in fortification_details}
+            | {svt.commonReleaseId for svt in fortification_servants}
+        )
+        common_releases_task = db.run(
+            lambda conn: fetch.get_all_multiple(
+                conn, MstCommonRelease, common_release_ids
+            )
+        )
 
-    common_consume_ids = (
-        shop_consume_ids
-        | digging_consume_ids
-        | {box.commonConsumeId for box in treasure_boxes}
-        | {recipe.commonConsumeId for recipe in recipes}
-    )
-    common_consumes = await fetch.get_all_multiple(
-        conn, MstCommonConsume, common_consume_ids
-    )
+        common_consume_ids = (
+            {
+                shop.itemIds[0]
+                for shop in shops
+                if shop.payType == PayType.COMMON_CONSUME
+            }
+            | digging_consume_ids
+            | {box.commonConsumeId for box in treasure_boxes}
+            | {recipe.commonConsumeId for recipe in recipes}
+        )
+        common_consumes_task = db.run(
+            lambda conn: fetch.get_all_multiple(
+                conn, MstCommonConsume, common_consume_ids
+            )
+        )
 
-    gift_ids = (
-        {shop.targetIds[0] for shop in shops if shop.purchaseType == PurchaseType.GIFT}
-        | {
-            set_item.targetId
-            for set_item in set_items
-            if set_item.purchaseType == PurchaseType.GIFT
-        }
-        | {reward.giftId for reward in rewards}
-        | {mission.giftId for mission in missions}
-        | {tower_reward.giftId for tower_reward in tower_rewards}
-        | {box.targetId for box in gacha_bases}
-        | {box.extraGiftId for box in treasure_boxes}
-        | {treasure_box_gift.giftId for treasure_box_gift in box_gifts}
-        | {cooltime.giftId for cooltime in event_cooltimes}
-        | {recipe_gift.giftId for recipe_gift in recipe_gifts}
-        | digging_gift_ids
-        | fortification_gift_ids
-    )
+        item_ids = (
+            {get_shop_cost_item_id(shop) for shop in shops}
+            | {lottery.payTargetId for lottery in box_gachas}
+            | {recipe.eventPointItemId for recipe in recipes}
+        )
+        if digging:
+            item_ids |= {digging.eventPointItemId}
+        items_task = db.run(lambda conn: get_multiple_items(conn, item_ids))
+
+        conds = await conds_task
+        cond_detail_ids = [
+            target_id
+            for cond in conds
+            if cond.condType == CondType.MISSION_CONDITION_DETAIL
+            for target_id in cond.targetIds
+        ]
+        cond_details_task = db.run(
+            lambda conn: fetch.get_all_multiple(
+                conn, MstEventMissionConditionDetail, cond_detail_ids
+            )
+        )
 
-    gift_adds = await fetch.get_all_multiple(conn, MstGiftAdd, gift_ids)
-    replacement_gift_ids = {gift.priorGiftId for gift in gift_adds}
+        voice_plays = await voice_plays_task
+        gacha_talks = await gacha_talks_task
+        voice_ids = (
+            {voice_play.guideImageId for voice_play in voice_plays}
+            | {gacha_talk.guideImageId for gacha_talk in gacha_talks}
+            | {guide_id for scene in reward_scenes for guide_id in scene.guideImageIds}
+        )
+        svt_voices_task = db.run(lambda conn: svt.get_mstSvtVoice(conn, voice_ids))
+        subtitles_task = db.run(lambda conn: svt.get_mstSubtitle(conn, voice_ids))
+        voice_play_conds_task = db.run(
+            lambda conn: svt.get_mstVoicePlayCond(conn, voice_ids)
+        )
+        svt_extras_task = db.run(
+            lambda conn: fetch.get_all_multiple(conn, MstSvtExtra, voice_ids)
+        )
 
-    gifts = await fetch.get_all_multiple(conn, MstGift, gift_ids | replacement_gift_ids)
+        rewards = await rewards_task
+        tower_rewards = await tower_rewards_task
+        gacha_bases = await gacha_bases_task
+        set_items = await set_items_task
+        box_gifts = await box_gifts_task
+        recipe_gifts = await recipe_gifts_task
+        gift_ids = (
+            {
+                shop.targetIds[0]
+                for shop in shops
+                if shop.purchaseType == PurchaseType.GIFT
+            }
+            | {
+                set_item.targetId
+                for set_item in set_items
+                if set_item.purchaseType == PurchaseType.GIFT
+            }
+            | {reward.giftId for reward in rewards}
+            | {mission.giftId for mission in missions}
+            | {tower_reward.giftId for tower_reward in tower_rewards}
+            | {box.targetId for box in gacha_bases}
+            | {box.extraGiftId for box in treasure_boxes}
+            | {treasure_box_gift.giftId for treasure_box_gift in box_gifts}
+            | {cooltime.giftId for cooltime in event_cooltimes}
+            | {recipe_gift.giftId for recipe_gift in recipe_gifts}
+            | digging_gift_ids
+            | fortification_gift_ids
+        )
+        gift_adds = await db.run(
+            lambda conn: fetch.get_all_multiple(conn, MstGiftAdd, gift_ids)
+        )
+        all_gift_ids = gift_ids | {gift.priorGiftId for gift in gift_adds}
+        gifts_task = db.run(
+            lambda conn: fetch.get_all_multiple(conn, MstGift, all_gift_ids)
+        )
 
-    item_ids = (
-        {get_shop_cost_item_id(shop) for shop in shops}
-        | {lottery.payTargetId for lottery in box_gachas}
-        | {recipe.eventPointItemId for recipe in recipes}
-    )
-    if digging:
-        item_ids |= {digging.eventPointItemId}
-    mstItem = await get_multiple_items(conn, item_ids)
+        mstSvtVoice = await svt_voices_task
+        voices_task = db.run(lambda conn: get_voice_from_svtVoice(conn, mstSvtVoice))
+        svt_groups_task = db.run(
+            lambda conn: get_voice_group_from_svtVoice(conn, mstSvtVoice)
+        )
 
-    bgm_ids = {reward_scene.bgmId for reward_scene in reward_scenes} | {
-        reward_scene.afterBgmId for reward_scene in reward_scenes
-    }
-    mstBgm = [await get_bgm_entity(conn, bgm_id) for bgm_id in bgm_ids]
-
-    return EventEntity(
-        mstEvent=mstEvent,
-        mstWar=await event.get_event_wars(conn, event_id),
-        mstEventRewardScene=reward_scenes,
-        mstEventVoicePlay=voice_plays,
-        mstShop=shops,
-        mstShopScript=shop_scripts,
-        mstShopRelease=shop_releases,
-        mstGift=gifts,
-        mstGiftAdd=gift_adds,
-        mstSetItem=set_items,
-        mstEventReward=rewards,
-        mstEventRewardSet=await fetch.get_all(conn, MstEventRewardSet, event_id),
-        mstEventPointGroup=await fetch.get_all(conn, MstEventPointGroup, event_id),
-        mstEventPointBuff=await fetch.get_all(conn, MstEventPointBuff, event_id),
-        mstEventMission=missions,
-        mstEventRandomMission=await fetch.get_all(
-            conn, MstEventRandomMission, event_id
-        ),
-        mstEventMissionCondition=conds,
-        mstEventMissionConditionDetail=cond_details,
-        mstEventTower=await fetch.get_all(conn, MstEventTower, event_id),
-        mstEventTowerReward=tower_rewards,
-        mstBoxGacha=box_gachas,
-        mstBoxGachaBase=gacha_bases,
-        mstBoxGachaTalk=gacha_talks,
-        mstTreasureBox=treasure_boxes,
-        mstTreasureBoxGift=box_gifts,
-        mstEventDigging=digging,
-        mstEventDiggingBlock=digging_blocks,
-        mstEventDiggingReward=digging_rewards,
-        mstEventCooltimeReward=event_cooltimes,
-        mstEventQuestCooltime=await fetch.get_all(
-            conn, MstEventQuestCooltime, event_id
-        ),
-        mstEventFortification=fortifications,
-        mstEventFortificationDetail=fortification_details,
-        mstEventFortificationSvt=fortification_servants,
-        mstEventQuest=await fetch.get_all(conn, MstEventQuest, event_id),
-        mstEventCampaign=await fetch.get_all(conn, MstEventCampaign, event_id),
-        mstEventBulletinBoard=bulletins,
-        mstEventBulletinBoardRelease=bulletin_releases,
-        mstEventRecipe=recipes,
-        mstEventRecipeGift=recipe_gifts,
-        mstItem=mstItem,
-        mstCommonConsume=common_consumes,
-        mstCommonRelease=common_releases,
-        mstSvtVoice=mstSvtVoice,
-        mstVoice=mstVoice,
-        mstSvtGroup=mstSvtGroup,
-        mstSubtitle=mstSubtitle,
-        mstVoicePlayCond=mstVoicePlayCond,
-        mstSvtExtra=mstSvtExtra,
-        mstSvtLimitAdd=mstSvtLimitAdd,
-        mstBgm=mstBgm,
-    )
+        return EventEntity(
+            mstEvent=mstEvent,
+            mstWar=await wars_task,
+            mstEventRewardScene=reward_scenes,
+            mstEventVoicePlay=voice_plays,
+            mstShop=shops,
+            mstShopScript=await shop_scripts_task,
+            mstShopRelease=await shop_releases_task,
+            mstGift=await gifts_task,
+            mstGiftAdd=gift_adds,
+            mstSetItem=set_items,
+            mstEventReward=rewards,
+            mstEventRewardSet=await reward_sets_task,
+            mstEventPointGroup=await point_groups_task,
+            mstEventPointBuff=await point_buffs_task,
+            mstEventMission=missions,
+            mstEventRandomMission=await random_missions_task,
+            mstEventMissionCondition=conds,
+            mstEventMissionConditionDetail=await cond_details_task,
+            mstEventTower=await towers_task,
+            mstEventTowerReward=tower_rewards,
+            mstBoxGacha=box_gachas,
+            mstBoxGachaBase=gacha_bases,
+            mstBoxGachaTalk=gacha_talks,
+            mstTreasureBox=treasure_boxes,
+            mstTreasureBoxGift=box_gifts,
+            mstEventDigging=digging,
+            mstEventDiggingBlock=digging_blocks,
+            mstEventDiggingReward=digging_rewards,
+            mstEventCooltimeReward=event_cooltimes,
+            mstEventQuestCooltime=await quest_cooltimes_task,
+            mstEventFortification=fortifications,
+            mstEventFortificationDetail=fortification_details,
+            mstEventFortificationSvt=fortification_servants,
+            mstEventQuest=await event_quests_task,
+            mstEventCampaign=await campaigns_task,
+            mstEventBulletinBoard=bulletins,
+            mstEventBulletinBoardRelease=await bulletin_releases_task,
+            mstEventRecipe=recipes,
+            mstEventRecipeGift=recipe_gifts,
+            mstItem=await items_task,
+            mstCommonConsume=await common_consumes_task,
+            mstCommonRelease=await common_releases_task,
+            mstSvtVoice=mstSvtVoice,
+            mstVoice=await voices_task,
+            mstSvtGroup=await svt_groups_task,
+            mstSubtitle=await subtitles_task,
+            mstVoicePlayCond=await voice_play_conds_task,
+            mstSvtExtra=await svt_extras_task,
+            mstSvtLimitAdd=await svt_limit_adds_task,
+            mstBgm=await bgms_task,
+        )
 
 
 async def get_quest_entity_many(
@@ -1133,11 +1236,12 @@ async def get_bgm_entity(conn: AsyncConnection, bgm_id: int) -> BgmEntity:
     )
 
     if mstBgm.flag != BgmFlag.IS_NOT_RELEASE:
-        mstShop = await fetch.get_one(conn, MstShop, mstBgm.shopId)
+        loader = get_loader(conn)
+        mstShop = await loader.load_one(MstShop, mstBgm.shopId)
         if mstShop:
             bgm_entity.mstShop = mstShop
-            bgm_entity.mstItem = await fetch.get_one(
-                conn, MstItem, get_shop_cost_item_id(mstShop)
+            bgm_entity.mstItem = await loader.load_one(
+                MstItem, get_shop_cost_item_id(mstShop)
             )
 
     return bgm_entity
@@ -5,6 +5,9 @@ from ..schemas.raw import MstBuff, MstBuffConvert, MstClassRelationOverwrite
 from .utils import load_master_data
 
 
+BUFF_DEPENDENCIES = ["mstBuff", "mstClassRelationOverwrite", "mstBuffConvert"]
+
+
 def get_buff_with_classrelation(gamedata_path: DirectoryPath) -> dict[int, MstBuff]:
     mstBuffs = {buff.id: buff for buff in load_master_data(gamedata_path, MstBuff)}
     mstClassRelationOverwrites = load_master_data(
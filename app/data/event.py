@@ -8,6 +8,9 @@ from ..schemas.raw import MstEvent, MstWar
 from .utils import load_master_data
 
 
+EVENT_WAR_DEPENDENCIES = ["mstEvent", "mstWar"]
+
+
 @dataclass
 class EventWar:
     mstEvents: list[MstEvent]
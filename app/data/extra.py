@@ -38,6 +38,20 @@ MASH_NAME = {
 }
 
 
+EXTRA_SVT_DEPENDENCIES = [
+    "mstSvt",
+    "mstSvtLimitAdd",
+    "mstSkill",
+    "mstSvtSkill",
+    "mstEvent",
+    "mstShop",
+    "mstShopScript",
+    "mstShopRelease",
+    "mstSvtComment",
+    "mstSvtCostume",
+]
+
+
 def is_Mash_Valentine_equip(region: Region, comment: str) -> bool:
     header = comment.split("\n")[0]
     return VALENTINE_NAME[region] in header and MASH_NAME[region] in header
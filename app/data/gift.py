@@ -4,6 +4,9 @@ from ..schemas.raw import MstGift
 from .utils import load_master_data
 
 
+GIFT_DEPENDENCIES = ["mstGift"]
+
+
 def get_gift_with_index(gamedata_path: DirectoryPath) -> list[MstGift]:
     mstGift = load_master_data(gamedata_path, MstGift)
     gift_index: dict[int, int] = {}
@@ -17,6 +17,18 @@ from ..schemas.raw import (
 from .utils import load_master_data
 
 
+ITEM_DEPENDENCIES = [
+    "mstItem",
+    "mstItemSelect",
+    "mstGift",
+    "mstGiftAdd",
+    "mstCombineSkill",
+    "mstCombineAppendPassiveSkill",
+    "mstCombineLimit",
+    "mstCombineCostume",
+]
+
+
 def get_item_with_use(gamedata_path: DirectoryPath) -> list[MstItem]:
     mstItem = load_master_data(gamedata_path, MstItem)
     mstItemSelect = load_master_data(gamedata_path, MstItemSelect)
@@ -0,0 +1,186 @@
+import mmap
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Mapping, Optional, Union
+
+from ..config import Settings, logger, project_root
+from ..schemas.common import Region
+
+
+settings = Settings()
+
+
+SNAPSHOT_FOLDER = project_root / "snapshot"
+SNAPSHOT_MAGIC = b"FGOSNAP1"
+# magic, table count
+SNAPSHOT_HEADER = struct.Struct("<8sQ")
+# table name, item count, offset of the sorted IDs, offset of the item spans,
+# offset of the items
+SNAPSHOT_TABLE = struct.Struct("<32sQQQQ")
+# How often the workers check if the snapshot file was replaced in seconds
+SNAPSHOT_CHECK_INTERVAL = 1.0
+
+
+def get_snapshot_path(region: Region) -> Path:
+    return SNAPSHOT_FOLDER / f"{region.name}.bin"
+
+
+def align(offset: int) -> int:
+    return (offset + 7) // 8 * 8
+
+
+def dump_snapshot(tables: Mapping[str, Mapping[int, bytes]]) -> bytes:
+    """Binary snapshot of the JSON items of the tables, keyed by ID.
+
+    The file starts with a directory of the tables. Each table is a sorted int64
+    array of the IDs, an int64 array of the (offset, length) of the items in the
+    same order and the items. The arrays are in the native byte order because the
+    snapshot is only read on the machine that wrote it.
+    """
+    directory_size = SNAPSHOT_HEADER.size + SNAPSHOT_TABLE.size * len(tables)
+    directory = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(tables))]
+    sections: list[bytes] = []
+    offset = align(directory_size)
+
+    for table_name, items in tables.items():
+        item_ids = array("q", sorted(items))
+        item_data = [items[item_id] for item_id in item_ids]
+        spans = array("q")
+        data_offset = 0
+        for data in item_data:
+            spans.extend((data_offset, len(data)))
+            data_offset += len(data)
+
+        ids_offset = offset
+        spans_offset = ids_offset + len(item_ids) * item_ids.itemsize
+        data_start = spans_offset + len(spans) * spans.itemsize
+        directory.append(
+            SNAPSHOT_TABLE.pack(
+                table_name.encode(), len(item_ids), ids_offset, spans_offset, data_start
+            )
+        )
+        sections += [item_ids.tobytes(), spans.tobytes(), *item_data]
+        offset = align(data_start + data_offset)
+        sections.append(b"\0" * (offset - data_start - data_offset))
+
+    directory.append(b"\0" * (align(directory_size) - directory_size))
+    return b"".join(directory + sections)
+
+
+def write_snapshot(path: Path, tables: Mapping[str, Mapping[int, bytes]]) -> None:
+    """Replace the snapshot file atomically so the workers never see a partial
+    file. Workers that mapped the old file keep reading it until they reopen."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as fp:
+        fp.write(dump_snapshot(tables))
+    os.replace(tmp_path, path)
+
+
+@dataclass
+class SnapshotTable:
+    item_ids: memoryview
+    spans: memoryview
+    data: memoryview
+
+    def get(self, item_id: int) -> Optional[bytes]:
+        index = bisect_left(self.item_ids, item_id)
+        if index == len(self.item_ids) or self.item_ids[index] != item_id:
+            return None
+        offset, length = self.spans[index * 2], self.spans[index * 2 + 1]
+        return self.data[offset : offset + length].tobytes()
+
+
+class MasterSnapshot:
+    """Read-only memory map of a snapshot file.
+
+    The pages are shared by all the processes mapping the file through the page
+    cache instead of each worker holding a copy of the data.
+    """
+
+    def __init__(self, buffer: Union[mmap.mmap, bytes]) -> None:
+        self.buffer = buffer
+        view = memoryview(buffer)
+        magic, table_count = SNAPSHOT_HEADER.unpack_from(view)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("Not a master data snapshot")
+
+        self.tables: dict[str, SnapshotTable] = {}
+        for table_index in range(table_count):
+            (
+                name,
+                count,
+                ids_offset,
+                spans_offset,
+                data_offset,
+            ) = SNAPSHOT_TABLE.unpack_from(
+                view, SNAPSHOT_HEADER.size + SNAPSHOT_TABLE.size * table_index
+            )
+            self.tables[name.rstrip(b"\0").decode()] = SnapshotTable(
+                item_ids=view[ids_offset:spans_offset].cast("q"),
+                spans=view[spans_offset:data_offset].cast("q"),
+                data=view[data_offset:],
+            )
+
+    @classmethod
+    def open(cls, path: Path) -> "MasterSnapshot":  # pragma: no cover
+        with open(path, "rb") as fp:
+            return cls(mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def get(self, table_name: str, item_id: int) -> Optional[bytes]:
+        table = self.tables.get(table_name)
+        if table is None:
+            return None
+        return table.get(item_id)
+
+
+@dataclass
+class OpenSnapshot:
+    snapshot: Optional[MasterSnapshot]
+    file_id: Optional[tuple[int, int]]
+    next_check: float
+
+
+open_snapshots: dict[Region, OpenSnapshot] = {}
+
+
+def get_file_id(path: Path) -> Optional[tuple[int, int]]:  # pragma: no cover
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def get_master_snapshot(region: Region) -> Optional[MasterSnapshot]:
+    """The snapshot of the region if `MASTER_SNAPSHOT` is set and it exists.
+
+    The file is mapped again if it was replaced by a load.
+    """
+    if not settings.master_snapshot:
+        return None
+
+    now = time.monotonic()
+    opened = open_snapshots.get(region)
+    if opened is not None and now < opened.next_check:
+        return opened.snapshot
+
+    path = get_snapshot_path(region)
+    file_id = get_file_id(path)
+    if opened is None or file_id != opened.file_id:
+        snapshot = None
+        if file_id is not None:
+            try:
+                snapshot = MasterSnapshot.open(path)
+            except (OSError, ValueError):  # pragma: no cover
+                logger.exception(f"Failed to open the {region} master snapshot")
+        opened = OpenSnapshot(snapshot, file_id, now)
+        open_snapshots[region] = opened
+
+    opened.next_check = now + SNAPSHOT_CHECK_INTERVAL
+    return opened.snapshot
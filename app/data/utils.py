@@ -1,9 +1,12 @@
-from typing import Type, TypeVar
+from fnmatch import fnmatchcase
+from pathlib import PurePosixPath
+from typing import Iterable, Optional, Type, TypeVar
 
 import orjson
 from pydantic import DirectoryPath
 
 from ..schemas.base import BaseModelORJson
+from ..schemas.common import Region
 from ..schemas.raw import (
     MstAi,
     MstAiAct,
@@ -107,3 +110,40 @@ def load_master_data(
     with open(file_loc, "rb") as fp:
         data = orjson.loads(fp.read())
     return [model.parse_obj(item) for item in data]
+
+
+ChangedFiles = dict[Region, set[str]]
+
+
+def get_changed_file_names(changed_paths: Iterable[str]) -> set[str]:
+    """Convert changed paths in the gamedata repo to the names used in the
+    dependency lists: the master file name without extension for the master
+    files ("master/mstSvt.json" -> "mstSvt") and the top level file or folder
+    name without extension for the others ("AssetStorage.txt" -> "AssetStorage").
+    """
+    file_names: set[str] = set()
+    for changed_path in changed_paths:
+        parts = PurePosixPath(changed_path).parts
+        if len(parts) == 2 and parts[0] == "master":
+            file_names.add(PurePosixPath(parts[1]).stem)
+        elif parts:
+            file_names.add(PurePosixPath(parts[0]).stem)
+    return file_names
+
+
+def is_changed(
+    changed_files: Optional[ChangedFiles], region: Region, dependencies: Iterable[str]
+) -> bool:
+    """Whether data depending on the given files needs to be reloaded.
+
+    `dependencies` are file names or fnmatch patterns of file names.
+    If `changed_files` is None or doesn't have the region, the changes are unknown
+    and everything is reloaded.
+    """
+    if changed_files is None or region not in changed_files:
+        return True
+    return any(
+        fnmatchcase(file_name, pattern)
+        for file_name in changed_files[region]
+        for pattern in dependencies
+    )
@@ -0,0 +1,133 @@
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.pool import QueuePool
+
+from ...config import Settings
+from .loader import request_scope
+
+
+settings = Settings()
+
+
+REPEATABLE_READ = "REPEATABLE READ"
+
+
+async def use_one_snapshot(conn: AsyncConnection) -> None:
+    """Read the whole transaction of the connection from one snapshot so that
+    `fan_out` can add connections reading the same snapshot.
+
+    Must be called before the first statement of the transaction.
+    """
+    await conn.execution_options(isolation_level=REPEATABLE_READ)
+
+
+R = TypeVar("R")
+
+
+class ConnectionFanOut:
+    """Run independent fetches concurrently on the connection and on more
+    connections of its engine, up to `max_connections` in total.
+
+    Only idle connections of the pool are added so fetches wait for the busy
+    connections of the fan out instead of waiting for the pool. The added
+    connections read the snapshot exported by the connection so a response never
+    mixes rows from before and after a table swap of the staging load.
+    """
+
+    def __init__(
+        self,
+        conn: AsyncConnection,
+        max_connections: int,
+        exit_stack: AsyncExitStack,
+        snapshot_id: Optional[str] = None,
+    ) -> None:
+        self.engine = conn.engine
+        self.info = conn.info
+        self.max_connections = max_connections if snapshot_id else 1
+        self.snapshot_id = snapshot_id
+        self.connection_count = 1
+        self.idle: asyncio.Queue[AsyncConnection] = asyncio.Queue()
+        self.idle.put_nowait(conn)
+        self.exit_stack = exit_stack
+        self.tasks: list[asyncio.Task[Any]] = []
+
+    def can_add_connection(self) -> bool:
+        if self.connection_count >= self.max_connections:
+            return False
+        pool = self.engine.pool
+        return isinstance(pool, QueuePool) and pool.checkedin() > 0
+
+    async def add_connection(self) -> AsyncConnection:
+        conn = await self.exit_stack.enter_async_context(self.engine.connect())
+        await use_one_snapshot(conn)
+        await conn.execute(text(f"SET TRANSACTION SNAPSHOT '{self.snapshot_id}'"))
+        if "region" in self.info:
+            conn.info["region"] = self.info["region"]
+        return await self.exit_stack.enter_async_context(request_scope(conn))
+
+    async def get_connection(self) -> AsyncConnection:
+        if self.idle.empty() and self.can_add_connection():
+            self.connection_count += 1
+            return await self.add_connection()
+        return await self.idle.get()
+
+    async def fetch(self, fetch_func: Callable[[AsyncConnection], Awaitable[R]]) -> R:
+        conn = await self.get_connection()
+        try:
+            return await fetch_func(conn)
+        finally:
+            self.idle.put_nowait(conn)
+
+    def run(
+        self, fetch_func: Callable[[AsyncConnection], Awaitable[R]]
+    ) -> "asyncio.Task[R]":
+        """Start `fetch_func(conn)` on the next free connection."""
+        task = asyncio.create_task(self.fetch(fetch_func))
+        self.tasks.append(task)
+        return task
+
+    async def cancel_pending(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+async def export_snapshot(conn: AsyncConnection) -> Optional[str]:
+    """ID of the snapshot of the connection's transaction if it is read from one
+    snapshot with `use_one_snapshot`, otherwise None."""
+    sync_conn = conn.sync_connection
+    if (
+        sync_conn is None
+        or sync_conn.get_execution_options().get("isolation_level") != REPEATABLE_READ
+    ):
+        return None
+    snapshot_id: str = await conn.scalar(text("SELECT pg_export_snapshot()"))
+    return snapshot_id
+
+
+@asynccontextmanager
+async def fan_out(
+    conn: AsyncConnection, max_connections: Optional[int] = None
+) -> AsyncIterator[ConnectionFanOut]:
+    """Context for running independent fetches concurrently.
+
+    Connections are only added if `conn` reads from one snapshot, see
+    `use_one_snapshot`, otherwise the fetches run one after another on `conn`.
+
+    The fetches still running when the context exits, e.g. because another fetch
+    raised, are cancelled before the added connections are closed.
+    """
+    max_connections = max_connections or settings.db_fan_out_connections
+    snapshot_id = await export_snapshot(conn) if max_connections > 1 else None
+    async with AsyncExitStack() as exit_stack:
+        connection_fan_out = ConnectionFanOut(
+            conn, max_connections, exit_stack, snapshot_id
+        )
+        try:
+            yield connection_fan_out
+        finally:
+            await connection_fan_out.cancel_pending()
@@ -1,4 +1,7 @@
-from typing import Iterable, Optional, Type, TypeVar, Union
+import hashlib
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional, Type, TypeVar, Union
 
 from sqlalchemy import Table
 from sqlalchemy.exc import DBAPIError
@@ -204,7 +207,7 @@ from ...schemas.raw import (
     MstWarAdd,
     MstWarQuestSelection,
 )
-from .utils import fetch_one
+from .utils import fetch_one, from_db_row
 
 
 schema_map_fetch_one: dict[  # type:ignore
@@ -247,7 +250,7 @@ async def get_one(
         return None
 
     if entity_db:
-        return schema.from_orm(entity_db)
+        return from_db_row(schema, entity_db)
 
     return None
 
@@ -458,7 +461,7 @@ async def get_all(
     table, where_col, order_col = schema_table_fetch_all[schema]
     stmt = select(table).where(where_col == where_id).order_by(order_col)
     result = await conn.execute(stmt)
-    return [schema.from_orm(db_row) for db_row in result.fetchall()]
+    return [from_db_row(schema, db_row) for db_row in result.fetchall()]
 
 
 schema_table_fetch_all_multiple: dict[  # type:ignore
@@ -484,6 +487,8 @@ schema_table_fetch_all_multiple: dict[  # type:ignore
         [mstSvtVoiceRelation.c.svtId],
     ),
     MstBgm: (mstBgm, mstBgm.c.id, [mstBgm.c.id]),
+    MstBuff: (mstBuff, mstBuff.c.id, [mstBuff.c.id]),
+    MstFunc: (mstFunc, mstFunc.c.id, [mstFunc.c.id]),
     MstGift: (mstGift, mstGift.c.id, [mstGift.c.id, mstGift.c.sort_id]),
     MstGiftAdd: (mstGiftAdd, mstGiftAdd.c.giftId, [mstGiftAdd.c.giftId]),
     MstShopScript: (mstShopScript, mstShopScript.c.shopId, [mstShopScript.c.shopId]),
@@ -550,7 +555,7 @@ async def get_all_multiple(
     table, where_col, order_col = schema_table_fetch_all_multiple[schema]
     stmt = select(table).where(where_col.in_(where_ids)).order_by(*order_col)
     result = await conn.execute(stmt)
-    return [schema.from_orm(db_row) for db_row in result.fetchall()]
+    return [from_db_row(schema, db_row) for db_row in result.fetchall()]
 
 
 schema_map_fetch_everything: dict[  # type:ignore
@@ -581,4 +586,69 @@ async def get_everything(
     stmt = select(table).order_by(order_col)
     entities_db = (await conn.execute(stmt)).fetchall()
 
-    return [schema.from_orm(entity) for entity in entities_db]
+    return [from_db_row(schema, entity) for entity in entities_db]
+
+
+POSTGRES_MAX_IDENTIFIER_LENGTH = 63
+
+
+@dataclass(frozen=True)
+class FetchIndex:
+    table: Table
+    columns: tuple[str, ...]
+
+    @property
+    def name(self) -> str:
+        name = f"ix_fetch_{self.table.name}_{'_'.join(self.columns)}"
+        if len(name) > POSTGRES_MAX_IDENTIFIER_LENGTH:
+            digest = hashlib.blake2b(name.encode(), digest_size=4).hexdigest()
+            name = f"{name[:POSTGRES_MAX_IDENTIFIER_LENGTH - 9]}_{digest}"
+        return name
+
+
+def get_table_index_columns(table: Table) -> list[tuple[str, ...]]:
+    """Columns of the indexes declared on the table, including the primary key."""
+    index_columns = [
+        tuple(column.name for column in index.columns)
+        for index in table.indexes
+        if len(index.columns) == len(index.expressions)
+    ]
+    if table.primary_key.columns:
+        index_columns.append(tuple(column.name for column in table.primary_key.columns))
+    return index_columns
+
+
+def get_fetch_indexes() -> list[FetchIndex]:
+    """(where, order) indexes needed by the fetch maps and not covered by the
+    indexes declared on the tables."""
+    fetch_columns: list[tuple[Table, list[ColumnElement[Any]]]] = [
+        *((table, [where_col]) for table, where_col in schema_map_fetch_one.values()),
+        *(
+            (table, [where_col, order_col])
+            for table, where_col, order_col in schema_table_fetch_all.values()
+        ),
+        *(
+            (table, [where_col, *order_cols])
+            for table, where_col, order_cols in schema_table_fetch_all_multiple.values()
+        ),
+        *(
+            (table, [order_col])
+            for table, order_col in schema_map_fetch_everything.values()
+        ),
+    ]
+
+    needed_columns: dict[Table, set[tuple[str, ...]]] = defaultdict(set)
+    for table, fetch_cols in fetch_columns:
+        column_names = tuple(dict.fromkeys(column.name for column in fetch_cols))
+        needed_columns[table].add(column_names)
+
+    fetch_indexes: list[FetchIndex] = []
+    for table, table_needed_columns in needed_columns.items():
+        index_columns = get_table_index_columns(table)
+        for columns in sorted(table_needed_columns):
+            covering_columns = index_columns + [
+                other for other in table_needed_columns if other != columns
+            ]
+            if not any(other[: len(columns)] == columns for other in covering_columns):
+                fetch_indexes.append(FetchIndex(table, columns))
+    return fetch_indexes
@@ -0,0 +1,130 @@
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Iterable, Optional, Type, TypeVar, Union, cast
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from ...schemas.base import BaseModelORJson
+from . import fetch
+
+
+LOADER_INFO_KEY = "loader"
+
+
+TLoad = TypeVar("TLoad", bound=BaseModelORJson)
+LoadKey = tuple[Type[BaseModelORJson], Union[int, str]]
+
+
+class DataLoader:
+    """Batch the fetches of a schema made in the same event loop tick into one
+    `fetch.get_all_multiple` query and memoize the results.
+
+    The batched queries run one at a time so the connection should only be used
+    through the loader while loads are gathered.
+    """
+
+    def __init__(self, conn: AsyncConnection) -> None:
+        self.conn = conn
+        self.lock = asyncio.Lock()
+        self.results: dict[LoadKey, asyncio.Future[list[Any]]] = {}
+        self.pending: dict[
+            Type[BaseModelORJson], dict[Union[int, str], asyncio.Future[list[Any]]]
+        ] = {}
+        self.dispatch_tasks: set[asyncio.Task[None]] = set()
+
+    def get_future(
+        self, schema: Type[BaseModelORJson], where_id: Union[int, str]
+    ) -> "asyncio.Future[list[Any]]":
+        key = (schema, where_id)
+        if key not in self.results:
+            future: asyncio.Future[
+                list[Any]
+            ] = asyncio.get_running_loop().create_future()
+            self.results[key] = future
+            if schema not in self.pending:
+                self.pending[schema] = {}
+                task = asyncio.create_task(self.dispatch(schema))
+                self.dispatch_tasks.add(task)
+                task.add_done_callback(self.dispatch_done)
+            self.pending[schema][where_id] = future
+        return self.results[key]
+
+    def dispatch_done(self, task: "asyncio.Task[None]") -> None:
+        self.dispatch_tasks.discard(task)
+        # The exception is raised by the loads of the batch instead
+        if not task.cancelled():
+            task.exception()
+
+    async def dispatch(self, schema: Type[BaseModelORJson]) -> None:
+        # Let the other loads of this tick join the batch
+        await asyncio.sleep(0)
+        batch = self.pending.pop(schema)
+        try:
+            async with self.lock:
+                rows = await fetch.get_all_multiple(self.conn, schema, list(batch))
+        except asyncio.CancelledError:
+            for where_id, future in batch.items():
+                del self.results[(schema, where_id)]
+                future.cancel()
+            raise
+        except BaseException as e:
+            for where_id, future in batch.items():
+                del self.results[(schema, where_id)]
+                future.set_exception(e)
+                # Mark the exception as retrieved in case no load is waiting for it
+                future.exception()
+            raise
+
+        _, where_col, _ = fetch.schema_table_fetch_all_multiple[schema]
+        grouped_rows: dict[Union[int, str], list[Any]] = defaultdict(list)
+        for row in rows:
+            grouped_rows[getattr(row, where_col.name)].append(row)
+        for where_id, future in batch.items():
+            future.set_result(grouped_rows[where_id])
+
+    async def load(self, schema: Type[TLoad], where_id: Union[int, str]) -> list[TLoad]:
+        """Equivalent to `fetch.get_all_multiple(conn, schema, [where_id])`"""
+        rows = await asyncio.shield(self.get_future(schema, where_id))
+        return cast(list[TLoad], rows)
+
+    async def load_one(
+        self, schema: Type[TLoad], where_id: Union[int, str]
+    ) -> Optional[TLoad]:
+        rows = await self.load(schema, where_id)
+        return rows[0] if rows else None
+
+    async def load_many(
+        self, schema: Type[TLoad], where_ids: Iterable[Union[int, str]]
+    ) -> list[Optional[TLoad]]:
+        """`load_one` of each ID, in the same order as the IDs"""
+        futures = [self.get_future(schema, where_id) for where_id in where_ids]
+        results = await asyncio.shield(asyncio.gather(*futures))
+        return [cast(TLoad, rows[0]) if rows else None for rows in results]
+
+
+def get_loader(conn: AsyncConnection) -> DataLoader:
+    """The loader of the request if the connection is in `request_scope`.
+
+    Otherwise, a new loader that only batches the loads made through it, so
+    connections whose fetches are gathered, e.g. the export connections, must be
+    in `request_scope` for the fetches to share the loader's lock.
+    """
+    loader = conn.info.get(LOADER_INFO_KEY)
+    if isinstance(loader, DataLoader):
+        return loader
+    return DataLoader(conn)
+
+
+@asynccontextmanager
+async def request_scope(conn: AsyncConnection) -> AsyncIterator[AsyncConnection]:
+    """Share a loader between the fetches of the request.
+
+    `conn.info` outlives the request because it belongs to the pooled connection
+    so the loader is removed when the request ends.
+    """
+    conn.info[LOADER_INFO_KEY] = DataLoader(conn)
+    try:
+        yield conn
+    finally:
+        conn.info.pop(LOADER_INFO_KEY, None)
@@ -1,10 +1,22 @@
 from dataclasses import dataclass
-from typing import Iterable, Optional, Union
+from typing import Any, Iterable, Optional, Type, Union
 
-from sqlalchemy import Table
-from sqlalchemy.exc import DBAPIError
+from sqlalchemy import Column, Table
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.exc import DataError, DBAPIError
 from sqlalchemy.ext.asyncio import AsyncConnection
-from sqlalchemy.sql import Join, and_, not_, or_, select, true
+from sqlalchemy.sql import (
+    ColumnElement,
+    Join,
+    Select,
+    and_,
+    func,
+    literal,
+    not_,
+    or_,
+    select,
+    true,
+)
 from sqlalchemy.sql._typing import _ColumnExpressionArgument
 
 from ...models.raw import (
@@ -17,25 +29,51 @@ from ...models.raw import (
     mstSvtLimit,
     mstSvtLimitAdd,
     mstSvtScript,
+    mstSvtSkill,
+    mstSvtTreasureDevice,
     mstSvtVoice,
     mstVoicePlayCond,
 )
+from ...schemas.base import BaseModelORJson
 from ...schemas.gameenums import CondType, SvtType, VoiceCondType
 from ...schemas.raw import (
     GlobalNewMstSubtitle,
+    MstCombineAppendPassiveSkill,
+    MstCombineCostume,
+    MstCombineLimit,
+    MstCombineMaterial,
+    MstCombineSkill,
+    MstFriendship,
     MstSvt,
+    MstSvtAdd,
+    MstSvtAppendPassiveSkill,
+    MstSvtAppendPassiveSkillUnlock,
+    MstSvtCard,
+    MstSvtCardAdd,
+    MstSvtChange,
+    MstSvtCoin,
+    MstSvtCostume,
+    MstSvtExp,
+    MstSvtExtra,
+    MstSvtIndividuality,
+    MstSvtLimit,
     MstSvtLimitAdd,
+    MstSvtLimitImage,
+    MstSvtMultiPortrait,
+    MstSvtPassiveSkill,
     MstSvtScript,
     MstSvtVoice,
     MstVoicePlayCond,
 )
+from .fetch import schema_map_fetch_one, schema_table_fetch_all
+from .utils import fetch_one, from_db_row
 
 
 async def get_all_equips(conn: AsyncConnection) -> list[MstSvt]:  # pragma: no cover
     stmt = select(mstSvt).where(
         and_(mstSvt.c.collectionNo != 0, mstSvt.c.type == SvtType.SERVANT_EQUIP)
     )
-    return [MstSvt.from_orm(svt) for svt in (await conn.execute(stmt)).fetchall()]
+    return [from_db_row(MstSvt, svt) for svt in (await conn.execute(stmt)).fetchall()]
 
 
 async def get_svt_id(conn: AsyncConnection, col_no: int) -> int:
@@ -298,5 +336,157 @@ async def get_svt_search(
     )
 
     return [
-        MstSvt.from_orm(svt) for svt in (await conn.execute(svt_search_stmt)).fetchall()
+        from_db_row(MstSvt, svt)
+        for svt in (await conn.execute(svt_search_stmt)).fetchall()
     ]
+
+
+class SvtEntityTables(BaseModelORJson):
+    """Tables of the servant entity that only depend on the mstSvt row."""
+
+    mstSvt: MstSvt
+    mstSvtIndividuality: list[MstSvtIndividuality]
+    mstSvtCard: list[MstSvtCard]
+    mstSvtCardAdd: list[MstSvtCardAdd]
+    mstSvtLimit: list[MstSvtLimit]
+    mstCombineSkill: list[MstCombineSkill]
+    mstCombineLimit: list[MstCombineLimit]
+    mstCombineCostume: list[MstCombineCostume]
+    mstCombineMaterial: list[MstCombineMaterial]
+    mstSvtLimitAdd: list[MstSvtLimitAdd]
+    mstSvtLimitImage: list[MstSvtLimitImage]
+    mstSvtChange: list[MstSvtChange]
+    mstSvtCostume: list[MstSvtCostume]
+    mstSvtExp: list[MstSvtExp]
+    mstFriendship: list[MstFriendship]
+    mstSvtPassiveSkill: list[MstSvtPassiveSkill]
+    mstSvtAppendPassiveSkill: list[MstSvtAppendPassiveSkill]
+    mstSvtAppendPassiveSkillUnlock: list[MstSvtAppendPassiveSkillUnlock]
+    mstCombineAppendPassiveSkill: list[MstCombineAppendPassiveSkill]
+    mstSvtMultiPortrait: list[MstSvtMultiPortrait]
+    mstSvtExtra: Optional[MstSvtExtra] = None
+    mstSvtCoin: Optional[MstSvtCoin] = None
+    mstSvtAdd: Optional[MstSvtAdd] = None
+    skillIds: list[int]
+    tdIds: list[int]
+
+
+# The mstSvt column the tables are matched with, the order of the rows is the
+# same as fetch.get_all
+SVT_ENTITY_LIST_TABLES: list[tuple[Type[BaseModelORJson], Column[Any]]] = [
+    (MstSvtIndividuality, mstSvt.c.id),
+    (MstSvtCard, mstSvt.c.id),
+    (MstSvtCardAdd, mstSvt.c.id),
+    (MstSvtLimit, mstSvt.c.id),
+    (MstCombineSkill, mstSvt.c.combineSkillId),
+    (MstCombineLimit, mstSvt.c.combineLimitId),
+    (MstCombineCostume, mstSvt.c.id),
+    (MstCombineMaterial, mstSvt.c.combineMaterialId),
+    (MstSvtLimitAdd, mstSvt.c.id),
+    (MstSvtLimitImage, mstSvt.c.id),
+    (MstSvtChange, mstSvt.c.id),
+    (MstSvtCostume, mstSvt.c.id),
+    (MstSvtExp, mstSvt.c.expType),
+    (MstFriendship, mstSvt.c.friendshipId),
+    (MstSvtPassiveSkill, mstSvt.c.id),
+    (MstSvtAppendPassiveSkill, mstSvt.c.id),
+    (MstSvtAppendPassiveSkillUnlock, mstSvt.c.id),
+    (MstCombineAppendPassiveSkill, mstSvt.c.id),
+    (MstSvtMultiPortrait, mstSvt.c.id),
+]
+SVT_ENTITY_ONE_TABLES: list[Type[BaseModelORJson]] = [
+    MstSvtExtra,
+    MstSvtCoin,
+    MstSvtAdd,
+]
+
+
+def get_svt_entity_tables_stmt(
+    svt_id: int, svt_db: Optional[MstSvt] = None
+) -> Select[Any]:
+    """Each table is aggregated into a JSONB column by a subquery correlated with
+    the mstSvt row.
+
+    If `svt_db` is passed, its values are used instead of selecting the row.
+    """
+
+    def get_svt_value(svt_column: Column[Any]) -> ColumnElement[Any]:
+        if svt_db is None:
+            return svt_column
+        return literal(getattr(svt_db, svt_column.name))
+
+    list_columns = []
+    for schema, svt_column in SVT_ENTITY_LIST_TABLES:
+        table, where_col, order_col = schema_table_fetch_all[schema]
+        list_columns.append(
+            select(
+                func.coalesce(
+                    func.jsonb_agg(
+                        aggregate_order_by(  # type: ignore[no-untyped-call]
+                            table.table_valued(), order_col
+                        )
+                    ),
+                    func.jsonb_build_array(),
+                )
+            )
+            .where(where_col == get_svt_value(svt_column))
+            .scalar_subquery()
+            .label(table.name)
+        )
+
+    one_columns = []
+    for schema in SVT_ENTITY_ONE_TABLES:
+        table, where_col = schema_map_fetch_one[schema]
+        one_columns.append(
+            select(func.to_jsonb(table.table_valued()))
+            .where(where_col == get_svt_value(mstSvt.c.id))
+            .limit(1)
+            .scalar_subquery()
+            .label(table.name)
+        )
+
+    id_columns = [
+        select(func.coalesce(func.jsonb_agg(id_column), func.jsonb_build_array()))
+        .where(svt_id_column == get_svt_value(mstSvt.c.id))
+        .scalar_subquery()
+        .label(label)
+        for label, id_column, svt_id_column in (
+            ("skillIds", mstSvtSkill.c.skillId, mstSvtSkill.c.svtId),
+            (
+                "tdIds",
+                mstSvtTreasureDevice.c.treasureDeviceId,
+                mstSvtTreasureDevice.c.svtId,
+            ),
+        )
+    ]
+
+    table_columns = [*list_columns, *one_columns, *id_columns]
+    if svt_db is not None:
+        return select(*table_columns)
+    return select(
+        func.to_jsonb(mstSvt.table_valued()).label(mstSvt.name), *table_columns
+    ).where(mstSvt.c.id == svt_id)
+
+
+async def get_svt_entity_tables(
+    conn: AsyncConnection, svt_id: int, svt_db: Optional[MstSvt] = None
+) -> Optional[SvtEntityTables]:
+    """Fetch the tables of the servant entity in one statement.
+
+    The mstSvt row is only fetched if `svt_db` isn't passed.
+    """
+    stmt = get_svt_entity_tables_stmt(svt_id, svt_db)
+    try:
+        svt_entity_tables = await fetch_one(conn, stmt)
+    except DataError:
+        # The ID is out of the range of the column, not found like in fetch.get_one
+        return None
+
+    if svt_entity_tables is None:
+        return None
+
+    if svt_db is not None:
+        return SvtEntityTables.parse_obj(
+            dict(svt_entity_tables._mapping) | {"mstSvt": svt_db}
+        )
+    return SvtEntityTables.from_orm(svt_entity_tables)
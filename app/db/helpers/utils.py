@@ -1,5 +1,7 @@
-from typing import Any, TypeVar
+from functools import cache
+from typing import Any, Optional, Type, TypeVar, get_args, get_origin
 
+from pydantic import BaseModel
 from sqlalchemy import Table
 from sqlalchemy.dialects.postgresql import JSONB, array_agg
 from sqlalchemy.engine import CursorResult, Row
@@ -7,6 +9,11 @@ from sqlalchemy.ext.asyncio import AsyncConnection
 from sqlalchemy.sql import Select, func
 from sqlalchemy.sql._typing import _ColumnsClauseArgument
 
+from ...config import Settings
+
+
+settings = Settings()
+
 
 def sql_jsonb_agg(table: Table) -> _ColumnsClauseArgument[JSONB]:
     """Equivalent to `func.JSONB_AGG` but removes empty elements from the output"""
@@ -21,3 +28,50 @@ T = TypeVar("T", bound=tuple[Any, ...])
 async def fetch_one(conn: AsyncConnection, stmt: Select[T]) -> Row[T] | None:
     res: CursorResult[T] = await conn.execute(stmt.limit(1))
     return res.first()
+
+
+PLAIN_TYPES = {int, str, bool, Any}
+
+
+def is_plain_type(type_: Any) -> bool:
+    """Whether db values of the type are already what pydantic would produce."""
+    if type_ in PLAIN_TYPES:
+        return True
+    if get_origin(type_) in (list, dict):
+        return all(is_plain_type(arg) for arg in get_args(type_))
+    return False
+
+
+@cache
+def get_trusted_fields(
+    schema: Type[BaseModel], row_fields: tuple[str, ...]
+) -> Optional[tuple[tuple[str, int], ...]]:
+    """Field names of the schema and their row indices if rows with these columns
+    can be used without validation, otherwise None."""
+    trusted_fields: list[tuple[str, int]] = []
+    for name, field in schema.__fields__.items():
+        if field.alias in row_fields:
+            if not is_plain_type(field.outer_type_):
+                return None
+            trusted_fields.append((name, row_fields.index(field.alias)))
+        elif field.required:
+            return None
+    return tuple(trusted_fields)
+
+
+TModel = TypeVar("TModel", bound=BaseModel)
+
+
+def from_db_row(schema: Type[TModel], row: Row[Any]) -> TModel:
+    """Equivalent to `schema.from_orm(row)` for rows of our own tables.
+
+    Validation is skipped with `construct` if all the columns used by the schema
+    have plain types since the data was already validated when it was loaded.
+    """
+    if not settings.validate_db_rows:
+        trusted_fields = get_trusted_fields(schema, row._fields)
+        if trusted_fields is not None:
+            return schema.construct(
+                **{name: row[index] for name, index in trusted_fields}
+            )
+    return schema.from_orm(row)
@@ -1,20 +1,26 @@
 import hashlib
+import json
 import time
 from collections import defaultdict
-from typing import Any, Optional, Sequence, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterable, Iterator, Optional, Sequence, Union
 
 import orjson
+from psycopg.types.json import Jsonb
 from pydantic import DirectoryPath
 from sqlalchemy import Table
-from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Connection
 from sqlalchemy.sql import text
 
-from ..config import logger
-from ..data.buff import get_buff_with_classrelation
-from ..data.event import get_event_with_warIds
-from ..data.gift import get_gift_with_index
-from ..data.item import get_item_with_use
+from ..config import Settings, logger
+from ..data.buff import BUFF_DEPENDENCIES, get_buff_with_classrelation
+from ..data.event import EVENT_WAR_DEPENDENCIES, get_event_with_warIds
+from ..data.extra import EXTRA_SVT_DEPENDENCIES
+from ..data.gift import GIFT_DEPENDENCIES, get_gift_with_index
+from ..data.item import ITEM_DEPENDENCIES, get_item_with_use
 from ..data.script import get_script_path, get_script_text_only
+from ..data.utils import ChangedFiles, is_changed
 from ..models.raw import (
     TABLES_TO_BE_LOADED,
     AssetStorage,
@@ -28,6 +34,7 @@ from ..models.raw import (
     mstSkillGroupOverwrite,
     mstSkillLv,
     mstSubtitle,
+    mstSvtExtra,
     mstTreasureDeviceLv,
     mstWar,
 )
@@ -39,6 +46,7 @@ from ..schemas.gameenums import BuffType, FuncType
 from ..schemas.raw import AssetStorageLine, get_subtitle_svtId
 from ..schemas.rayshift import QuestDetail, QuestList
 from .engine import engines
+from .helpers.fetch import get_fetch_indexes
 from .helpers.rayshift import (
     fetch_all_missing_quest_ids,
     fetch_missing_quest_ids,
@@ -47,16 +55,108 @@ from .helpers.rayshift import (
 )
 
 
+settings = Settings()
+
+
 def recreate_table(conn: Connection, table: Table) -> None:  # pragma: no cover
     logger.debug(f"Recreating table {table.name}")
     table.drop(conn, checkfirst=True)
     table.create(conn, checkfirst=True)
 
 
+def create_fetch_indexes(
+    conn: Connection, table_names: Iterable[str], concurrently: bool = False
+) -> None:  # pragma: no cover
+    """Create the indexes used by the fetch helpers on the given tables.
+
+    `concurrently` doesn't block writes to the tables but can't be used in a
+    transaction.
+    """
+    start_time = time.perf_counter()
+    table_names = set(table_names)
+    preparer = conn.dialect.identifier_preparer
+    index_count = 0
+    for fetch_index in get_fetch_indexes():
+        if fetch_index.table.name not in table_names:
+            continue
+        table_name = preparer.quote(fetch_index.table.name)
+        schema = conn.schema_for_object(fetch_index.table)
+        if schema:
+            table_name = f"{preparer.quote_schema(schema)}.{table_name}"
+        column_names = ", ".join(preparer.quote(name) for name in fetch_index.columns)
+        conn.execute(
+            text(
+                f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS "
+                f"{preparer.quote(fetch_index.name)} ON {table_name} ({column_names})"
+            )
+        )
+        index_count += 1
+    run_time = time.perf_counter() - start_time
+    logger.debug(f"Created {index_count} fetch indexes in {run_time:.2f}s")
+
+
+def json_dumps(obj: Any) -> str:
+    try:
+        return orjson.dumps(obj).decode("utf-8")
+    except TypeError:  # orjson can't dump 64+ bit int
+        return json.dumps(obj)
+
+
+def get_copy_rows(
+    table: Table, db_data: Iterable[dict[str, Any]]
+) -> Iterator[list[Any]]:
+    """Convert the json rows to lists of values in the table's column order.
+
+    Missing keys get the column's scalar default or NULL like `table.insert()`.
+    JSONB values are wrapped in `Jsonb` and a `None` value is stored as JSON null,
+    the same as SQLAlchemy does for JSONB columns.
+    """
+    columns: list[tuple[str, Any, bool]] = []
+    for column in table.columns:
+        default = column.default
+        default_value = default.arg if default is not None and default.is_scalar else None  # type: ignore[attr-defined]
+        is_json = isinstance(column.type, JSONB) and not column.type.none_as_null
+        columns.append((column.name, default_value, is_json))
+
+    for row in db_data:
+        values: list[Any] = []
+        for name, default_value, is_json in columns:
+            if name not in row:
+                values.append(default_value)
+            elif is_json:
+                values.append(Jsonb(row[name], dumps=json_dumps))
+            else:
+                values.append(row[name])
+        yield values
+
+
+def copy_db(
+    conn: Connection, table: Table, db_data: Iterable[dict[str, Any]]
+) -> None:  # pragma: no cover
+    preparer = conn.dialect.identifier_preparer
+    column_names = ", ".join(preparer.quote(column.name) for column in table.columns)
+    table_name = preparer.quote(table.name)
+    schema = conn.schema_for_object(table)
+    if schema:
+        table_name = f"{preparer.quote_schema(schema)}.{table_name}"
+    stmt = f"COPY {table_name} ({column_names}) FROM STDIN"
+
+    dbapi_conn = conn.connection.driver_connection
+    with dbapi_conn.cursor() as cursor, cursor.copy(stmt) as copy:  # type: ignore[union-attr]
+        for row in get_copy_rows(table, db_data):
+            copy.write_row(row)
+
+
 def insert_db(conn: Connection, table: Table, db_data: Any) -> None:  # pragma: no cover
+    start_time = time.perf_counter()
     recreate_table(conn, table)
     logger.debug(f"Inserting into {table.name}")
-    conn.execute(table.insert(), db_data)
+    if settings.db_copy_load:
+        copy_db(conn, table, db_data)
+    else:
+        conn.execute(table.insert(), db_data)
+    run_time = time.perf_counter() - start_time
+    conn.info.setdefault("table_load_time", {})[table.name] = run_time
 
 
 def diff_column_schemas(
@@ -109,6 +209,38 @@ def get_SkillID_from_sval(sval: str) -> int:
     )
 
 
+SKILL_TD_LV_DEPENDENCIES = [
+    *BUFF_DEPENDENCIES,
+    "mstFunc",
+    "mstFuncGroup",
+    "mstSkillLv",
+    "mstSkillGroupOverwrite",
+    "mstTreasureDeviceLv",
+]
+SUBTITLE_DEPENDENCIES = ["globalNewMstSubtitle"]
+SCRIPT_LIST_DEPENDENCIES = ["ScriptActionEncrypt", "mstQuest"]
+# Master files of the tables that are not loaded from the master file of the same
+# name. The other tables only depend on their own file.
+DERIVED_TABLE_DEPENDENCIES: dict[str, list[str]] = {
+    **{
+        table.name: SKILL_TD_LV_DEPENDENCIES
+        for table in (
+            mstFunc,
+            mstFuncGroup,
+            mstSkillLv,
+            mstSkillGroupOverwrite,
+            mstTreasureDeviceLv,
+        )
+    },
+    mstItem.name: ITEM_DEPENDENCIES,
+    mstGift.name: GIFT_DEPENDENCIES,
+    mstSubtitle.name: SUBTITLE_DEPENDENCIES,
+    mstWar.name: EVENT_WAR_DEPENDENCIES,
+    ScriptFileList.name: SCRIPT_LIST_DEPENDENCIES,
+    mstSvtExtra.name: EXTRA_SVT_DEPENDENCIES,
+}
+
+
 def load_skill_td_lv(
     conn: Connection, gamedata_path: DirectoryPath
 ) -> None:  # pragma: no cover
@@ -241,7 +373,7 @@ def load_gift(
 
 
 def load_script_list(
-    engine: Engine, region: Region, repo_folder: DirectoryPath
+    conn: Connection, region: Region, repo_folder: DirectoryPath
 ) -> None:  # pragma: no cover
     script_list_file = (
         repo_folder
@@ -318,14 +450,12 @@ def load_script_list(
                     }
                 )
 
-    with engine.begin() as conn:
-        stmt = text("select extname from pg_extension;")
-        rows = conn.execute(stmt).fetchall()
-        if "pgroonga" not in (row.extname for row in rows):
-            conn.execute(text("create extension pgroonga;"))
+    stmt = text("select extname from pg_extension;")
+    rows = conn.execute(stmt).fetchall()
+    if "pgroonga" not in (row.extname for row in rows):
+        conn.execute(text("create extension pgroonga;"))
 
-    with engine.begin() as conn:
-        insert_db(conn, ScriptFileList, db_data)
+    insert_db(conn, ScriptFileList, db_data)
 
 
 def load_subtitle(
@@ -387,70 +517,250 @@ def load_asset_storage(
     load_pydantic_to_db(conn, asset_lines, AssetStorage)
 
 
-def update_db(region_path: dict[Region, DirectoryPath]) -> None:  # pragma: no cover
-    logger.info("Loading db …")
-    start_loading_time = time.perf_counter()
+def read_master_table(
+    master_folder: DirectoryPath, table: Table
+) -> list[dict[str, Any]]:  # pragma: no cover
+    table_json = master_folder / f"{table.name}.json"
+    if not table_json.exists():
+        return []
+
+    with open(table_json, "rb") as fp:
+        data: list[dict[str, Any]] = orjson.loads(fp.read())
+
+    if data:
+        different_columns = diff_column_schemas(data, table)
+        if different_columns:
+            logger.warning(
+                f"Found unknown columns: {', '.join(different_columns)} in {table_json}"
+            )
+            data = remove_unknown_columns(data, table)
 
-    for region, repo_folder in region_path.items():
-        logger.info(f"Updating {region} tables …")
-        master_folder = repo_folder / "master"
-        engine = engines[region]
+    return data
 
-        with engine.begin() as conn:
-            logger.info("Updating parsed skill and td …")
-            load_skill_td_lv(conn, repo_folder)
 
-        with engine.begin() as conn:
-            logger.info("Updating item …")
-            load_item(conn, repo_folder)
+def read_master_table_group(
+    master_folder: DirectoryPath, table_group: list[Table]
+) -> list[tuple[Table, list[dict[str, Any]]]]:  # pragma: no cover
+    return [(table, read_master_table(master_folder, table)) for table in table_group]
 
-        with engine.begin() as conn:
-            logger.info("Updating gift …")
-            load_gift(conn, repo_folder)
-
-        for table_group in TABLES_TO_BE_LOADED:
-            with engine.begin() as conn:
-                for table in table_group:
-                    table_json = master_folder / f"{table.name}.json"
-                    if table_json.exists():
-                        with open(table_json, "rb") as fp:
-                            data: list[dict[str, Any]] = orjson.loads(fp.read())
-
-                        if data:
-                            different_columns = diff_column_schemas(data, table)
-                            if different_columns:
-                                logger.warning(
-                                    f"Found unknown columns: {', '.join(different_columns)} in {table_json}"
-                                )
-                                data = remove_unknown_columns(data, table)
-                    else:
-                        data = []
-
-                    logger.debug(f"Updating {table.name} …")
-                    insert_db(conn, table, data)
 
-        with engine.begin() as conn:
-            logger.info("Updating subtitle …")
-            load_subtitle(conn, region, master_folder)
+def load_master_tables(
+    conn: Connection,
+    master_folder: DirectoryPath,
+    workers: int,
+    table_groups_to_load: list[list[Table]],
+) -> None:  # pragma: no cover
+    """Load the table groups into the db.
+
+    The master json files are read in a thread pool, at most `workers` groups ahead
+    of the group being inserted, so parsing overlaps with the db round trips.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: list[Future[list[tuple[Table, list[dict[str, Any]]]]]] = []
+        table_groups = iter(table_groups_to_load)
+
+        def submit_next_group() -> None:
+            table_group = next(table_groups, None)
+            if table_group is not None:
+                pending.append(
+                    executor.submit(read_master_table_group, master_folder, table_group)
+                )
 
-        with engine.begin() as conn:
-            logger.info("Updating event …")
-            load_event(conn, repo_folder)
+        for _ in range(workers):
+            submit_next_group()
+
+        while pending:
+            group_data = pending.pop(0).result()
+            submit_next_group()
+            for table, data in group_data:
+                logger.debug(f"Updating {table.name} …")
+                insert_db(conn, table, data)
+
+
+LIVE_SCHEMA = "public"
+STAGING_SCHEMA = "fgoapi_staging"
+PREVIOUS_SCHEMA = "fgoapi_previous"
+
+
+def get_schema_tables(conn: Connection, schema: str) -> list[str]:  # pragma: no cover
+    stmt = text("SELECT tablename FROM pg_tables WHERE schemaname = :schema")
+    return [row.tablename for row in conn.execute(stmt, {"schema": schema})]
+
+
+def move_table(
+    conn: Connection, table_name: str, from_schema: str, to_schema: str
+) -> None:  # pragma: no cover
+    preparer = conn.dialect.identifier_preparer
+    conn.execute(
+        text(
+            f"ALTER TABLE IF EXISTS {preparer.quote_schema(from_schema)}."
+            f"{preparer.quote(table_name)} SET SCHEMA {preparer.quote_schema(to_schema)}"
+        )
+    )
+
+
+def reset_staging_schema(conn: Connection) -> None:  # pragma: no cover
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {STAGING_SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {STAGING_SCHEMA}"))
 
+
+def swap_staging_tables(conn: Connection) -> None:  # pragma: no cover
+    """Replace the live tables with the staging tables.
+
+    Moving tables between schemas only changes the catalog so it's quick and
+    atomic within the transaction. The replaced tables are kept in the previous
+    schema for `rollback_db`.
+    """
+    preparer = conn.dialect.identifier_preparer
+    conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {PREVIOUS_SCHEMA}"))
+    for table_name in get_schema_tables(conn, STAGING_SCHEMA):
+        conn.execute(
+            text(f"DROP TABLE IF EXISTS {PREVIOUS_SCHEMA}.{preparer.quote(table_name)}")
+        )
+        move_table(conn, table_name, LIVE_SCHEMA, PREVIOUS_SCHEMA)
+        move_table(conn, table_name, STAGING_SCHEMA, LIVE_SCHEMA)
+
+
+def rollback_db(region: Region) -> None:  # pragma: no cover
+    """Swap the live tables with the tables kept from the previous load."""
+    with engines[region].begin() as conn:
+        reset_staging_schema(conn)
+        previous_tables = get_schema_tables(conn, PREVIOUS_SCHEMA)
+        for table_name in previous_tables:
+            move_table(conn, table_name, LIVE_SCHEMA, STAGING_SCHEMA)
+            move_table(conn, table_name, PREVIOUS_SCHEMA, LIVE_SCHEMA)
+            move_table(conn, table_name, STAGING_SCHEMA, PREVIOUS_SCHEMA)
+    logger.info(f"Rolled back {len(previous_tables)} {region} tables.")
+
+
+def load_region_tables(
+    conn: Connection,
+    region: Region,
+    repo_folder: DirectoryPath,
+    workers: int,
+    changed_files: Optional[ChangedFiles] = None,
+) -> None:  # pragma: no cover
+    master_folder = repo_folder / "master"
+
+    if is_changed(changed_files, region, SKILL_TD_LV_DEPENDENCIES):
+        logger.info(f"Updating {region} parsed skill and td …")
+        load_skill_td_lv(conn, repo_folder)
+
+    if is_changed(changed_files, region, ITEM_DEPENDENCIES):
+        logger.info(f"Updating {region} item …")
+        load_item(conn, repo_folder)
+
+    if is_changed(changed_files, region, GIFT_DEPENDENCIES):
+        logger.info(f"Updating {region} gift …")
+        load_gift(conn, repo_folder)
+
+    table_groups = [
+        table_group
+        for table_group in TABLES_TO_BE_LOADED
+        if is_changed(changed_files, region, [table.name for table in table_group])
+    ]
+    load_master_tables(conn, master_folder, workers, table_groups)
+
+    if is_changed(changed_files, region, SUBTITLE_DEPENDENCIES):
+        logger.info(f"Updating {region} subtitle …")
+        load_subtitle(conn, region, master_folder)
+
+    if is_changed(changed_files, region, EVENT_WAR_DEPENDENCIES):
+        logger.info(f"Updating {region} event …")
+        load_event(conn, repo_folder)
+
+    if is_changed(changed_files, region, [AssetStorage.name]):
+        logger.info(f"Updating {region} AssetStorage …")
+        load_asset_storage(conn, repo_folder)
+
+    if is_changed(changed_files, region, SCRIPT_LIST_DEPENDENCIES):
+        logger.info(f"Updating {region} script list …")
+        load_script_list(conn, region, repo_folder)
+
+    # The tables were created in this transaction so nothing else is blocked
+    create_fetch_indexes(conn, conn.info.get("table_load_time", {}))
+
+
+def load_region_db(
+    region: Region,
+    repo_folder: DirectoryPath,
+    workers: int = 1,
+    changed_files: Optional[ChangedFiles] = None,
+) -> None:  # pragma: no cover
+    logger.info(f"Updating {region} tables …")
+    start_loading_time = time.perf_counter()
+    engine = engines[region]
+
+    if settings.db_staging_load:
+        # Build the tables in the staging schema while the live tables keep
+        # serving requests, then swap them in a short transaction.
         with engine.begin() as conn:
-            logger.info("Updated AssetStorage …")
-            load_asset_storage(conn, repo_folder)
+            reset_staging_schema(conn)
 
-        logger.info("Updating script list …")
-        load_script_list(engine, region, repo_folder)
+        with engine.begin() as conn:
+            conn.execution_options(schema_translate_map={None: STAGING_SCHEMA})
+            load_region_tables(conn, region, repo_folder, workers, changed_files)
+            table_load_time: dict[str, float] = conn.info.pop("table_load_time", {})
 
         with engine.begin() as conn:
+            swap_staging_tables(conn)
+            rayshiftQuest.create(conn, checkfirst=True)
+    else:
+        # One transaction per region so readers don't see partially loaded data
+        with engine.begin() as conn:
+            load_region_tables(conn, region, repo_folder, workers, changed_files)
             rayshiftQuest.create(conn, checkfirst=True)
+            table_load_time = conn.info.pop("table_load_time", {})
+
+    region_loading_time = time.perf_counter() - start_loading_time
+    slowest_tables = sorted(table_load_time.items(), key=lambda x: x[1], reverse=True)
+    logger.info(
+        f"Loaded {region} db in {region_loading_time:.2f}s. Slowest tables: "
+        + ", ".join(f"{name} {run_time:.2f}s" for name, run_time in slowest_tables[:5])
+    )
+    for name, run_time in slowest_tables:
+        logger.debug(f"Loaded {region} {name} in {run_time:.2f}s")
+
+
+def update_db(
+    region_path: dict[Region, DirectoryPath],
+    changed_files: Optional[ChangedFiles] = None,
+) -> None:  # pragma: no cover
+    logger.info("Loading db …")
+    start_loading_time = time.perf_counter()
+
+    if settings.parallel_db_load and len(region_path) > 1:
+        with ThreadPoolExecutor(max_workers=len(region_path)) as executor:
+            futures = [
+                executor.submit(
+                    load_region_db,
+                    region,
+                    repo_folder,
+                    settings.db_load_workers,
+                    changed_files,
+                )
+                for region, repo_folder in region_path.items()
+            ]
+            for future in futures:
+                future.result()
+    else:
+        for region, repo_folder in region_path.items():
+            load_region_db(region, repo_folder, settings.db_load_workers, changed_files)
 
     db_loading_time = time.perf_counter() - start_loading_time
     logger.info(f"Loaded db in {db_loading_time:.2f}s.")
 
 
+def provision_fetch_indexes(region: Region) -> None:  # pragma: no cover
+    """Create the missing fetch indexes on the live tables without blocking
+    the API, e.g. for a db loaded before the indexes were added."""
+    with engines[region].connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT")
+        create_fetch_indexes(
+            conn, get_schema_tables(conn, LIVE_SCHEMA), concurrently=True
+        )
+
+
 def load_rayshift_quest_list(region: Region, quest_list: list[QuestList]) -> None:
     with engines[region].begin() as conn:
         rayshiftQuest.create(conn, checkfirst=True)
@@ -1,8 +1,8 @@
 import hashlib
 import json
-import pickle
 import time
 import tomllib
+from functools import partial
 from math import ceil
 from typing import Any, Awaitable, Callable, Optional
 
@@ -12,19 +12,22 @@ from fastapi import Depends, FastAPI, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
 from fastapi_cache import FastAPICache
 from redis.asyncio import Redis as AsyncRedis
 from sqlalchemy.ext.asyncio import AsyncConnection
 
+from .cache import RedisBackend, ResponseCoder, TwoTierBackend
 from .config import Settings, logger, project_root
 from .core.info import get_all_repo_info
 from .db.engine import async_engines, engines
 from .redis import Redis
+from .redis.helpers.columnar import master_stores
+from .redis.helpers.load_lock import load_once
 from .routers import basic, nice, raw, secret
 from .routers.deps import get_redis
+from .routers.static import PrecompressedStaticFiles
 from .schemas.common import Region, RepoInfo
-from .tasks import load_and_export
+from .tasks import load_and_export_if_changed
 
 
 settings = Settings()
@@ -263,60 +266,45 @@ def custom_key_builder(
     raw_key = f"{func.__module__}:{func.__name__}:{args_dump}:{kwargs_dump}"
     cache_key = hashlib.sha1(raw_key.encode("utf-8")).hexdigest()
 
-    return f"{prefix}:{region}:{namespace}:{cache_key}"
-
-
-class RedisBackend:  # pragma: no cover
-    def __init__(self, redis: Redis):
-        self.redis: Redis = redis
-
-    async def get_with_ttl(self, key: str) -> tuple[int, str]:
-        async with self.redis.pipeline(transaction=True) as pipe:
-            return await pipe.ttl(key).get(key).execute()  # type: ignore
-
-    async def get(self, key: str) -> bytes | None:
-        return await self.redis.get(key)
-
-    async def set(self, key: str, value: str, expire: int | None = None) -> bool | None:
-        return await self.redis.set(key, value, ex=expire)
-
-    async def clear(self, namespace: str | None = None, key: str | None = None) -> int:
-        if namespace:
-            lua = f"for i, name in ipairs(redis.call('KEYS', '{namespace}:*')) do redis.call('DEL', name); end"
-            return await self.redis.eval(lua, numkeys=0)  # type: ignore
-        elif key:
-            return await self.redis.delete(key)
-
-        raise ValueError("Either namespace or key must be specified.")
-
-
-class PickleCoder:  # pragma: no cover
-    @classmethod
-    def encode(cls, value: Any) -> bytes:
-        return pickle.dumps(value)
+    backend: object = FastAPICache.get_backend()
+    generation = (
+        backend.get_generation(region) if isinstance(backend, TwoTierBackend) else 0
+    )
 
-    @classmethod
-    def decode(cls, value: bytes) -> Any:
-        return pickle.loads(value)
+    return f"{prefix}:{region}:{generation}:{namespace}:{cache_key}"
 
 
-@app.on_event("startup")
-async def startup() -> None:
-    redis = await Redis.from_url(settings.redisdsn)
+async def init_cache(redis: Redis, local_cache_max_bytes: int) -> None:
+    """Set up the response cache, also used by the cache warmer of the update
+    worker."""
+    cache_backend = TwoTierBackend(RedisBackend(redis), redis, local_cache_max_bytes)
+    # The cache generations are needed to build the cache keys
+    await cache_backend.check_versions()
     FastAPICache.init(
-        RedisBackend(redis),  # type: ignore
+        cache_backend,  # type: ignore
         prefix=f"{settings.redis_prefix}:cache",
         expire=60 * 60 * 24 * 7,
         key_builder=custom_key_builder,
-        coder=PickleCoder,  # type: ignore
+        coder=ResponseCoder,  # type: ignore
     )
+
+
+@app.on_event("startup")
+async def startup() -> None:
+    redis = await Redis.from_url(settings.redisdsn)
+    await init_cache(redis, settings.local_cache_max_mb * 1024 * 1024)
     app.state.redis = redis
 
     region_pathes = {
         region: region_data.gamedata for region, region_data in settings.data.items()
     }
 
-    await load_and_export(redis, region_pathes, async_engines, False)
+    # Only one of the workers loads the data, the others wait for it to be ready
+    await load_once(
+        redis, partial(load_and_export_if_changed, redis, region_pathes, async_engines)
+    )
+    if settings.columnar_store:
+        await master_stores.check_version(redis, wait=True)
 
 
 @app.on_event("shutdown")
@@ -344,11 +332,19 @@ async def main_info(redis: Redis = Depends(get_redis)) -> dict[Region, RepoInfo]
     return await get_all_repo_info(redis, settings.data.keys())
 
 
+@app.get("/cache-stats", include_in_schema=False)
+async def cache_stats() -> dict[str, Any]:  # pragma: no cover
+    backend: object = FastAPICache.get_backend()
+    if isinstance(backend, TwoTierBackend):
+        return backend.get_stats()
+    return {}
+
+
 if settings.github_webhook_secret.get_secret_value() != "":  # pragma: no cover
     app.include_router(secret.router)
 
 
-app.mount("/export", StaticFiles(directory="export"), name="export")
+app.mount("/export", PrecompressedStaticFiles(directory="export"), name="export")
 
 
 def custom_openapi() -> dict[str, Any]:
@@ -0,0 +1,80 @@
+from functools import partial
+from typing import Callable, Iterable, Optional
+
+from ...config import Settings
+from .. import Redis
+
+
+settings = Settings()
+
+
+UNLINK_BATCH_SIZE = 1000
+
+
+def get_cache_generation_key() -> str:
+    return f"{settings.redis_prefix}:cache_generation"
+
+
+async def get_cache_generations(redis: Redis) -> dict[str, int]:
+    """Generation of the cached responses of each region.
+
+    The generation is part of the cache keys so bumping it invalidates the cache
+    of the region without deleting the keys.
+    """
+    generations = await redis.hgetall(get_cache_generation_key())
+    return {
+        region.decode(): int(generation) for region, generation in generations.items()
+    }
+
+
+async def bump_cache_generations(
+    redis: Redis, regions: Iterable[str]
+) -> dict[str, int]:
+    regions = list(regions)
+    async with redis.pipeline(transaction=True) as pipe:
+        for region in regions:
+            pipe.hincrby(get_cache_generation_key(), region, 1)
+        generations = await pipe.execute()
+    return dict(zip(regions, generations, strict=True))
+
+
+async def unlink_keys(
+    redis: Redis, match: str, keep: Optional[Callable[[str], bool]] = None
+) -> int:  # pragma: no cover
+    """UNLINK the keys matching the pattern in batches.
+
+    Keys are found with SCAN instead of KEYS so redis is not blocked.
+    """
+    key_count = 0
+    batch: list[bytes] = []
+    async for key in redis.scan_iter(match=match, count=UNLINK_BATCH_SIZE):
+        if keep is not None and keep(key.decode()):
+            continue
+        batch.append(key)
+        if len(batch) >= UNLINK_BATCH_SIZE:
+            key_count += await redis.unlink(*batch)
+            batch.clear()
+    if batch:
+        key_count += await redis.unlink(*batch)
+    return key_count
+
+
+def is_current_generation(key: str, key_prefix: str, generation: int) -> bool:
+    """Whether the cache key `{key_prefix}{generation}:...` is not older than
+    the generation."""
+    key_generation, _, _ = key.removeprefix(key_prefix).partition(":")
+    return key_generation.isdigit() and int(key_generation) >= generation
+
+
+async def unlink_old_cache_generations(
+    redis: Redis, cache_prefix: str, generations: dict[str, int]
+) -> int:  # pragma: no cover
+    """Delete the cache keys of the previous generations of the regions."""
+    key_count = 0
+    for region, generation in generations.items():
+        key_prefix = f"{cache_prefix}:{region}:"
+        keep = partial(
+            is_current_generation, key_prefix=key_prefix, generation=generation
+        )
+        key_count += await unlink_keys(redis, f"{key_prefix}*", keep)
+    return key_count
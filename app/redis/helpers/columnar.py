@@ -0,0 +1,253 @@
+import asyncio
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from copy import copy
+from dataclasses import dataclass
+from enum import Enum
+from operator import attrgetter
+from typing import Any, Generic, Iterable, Optional, Type, TypeVar, Union
+
+import orjson
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, parse_raw_as
+from pydantic.fields import ModelField
+
+from ...config import Settings, logger
+from ...db.helpers.utils import is_plain_type
+from ...schemas.common import Region
+from ...schemas.raw import (
+    MstBuff,
+    MstFunc,
+    MstSkill,
+    MstSvt,
+    MstSvtLimit,
+    MstTreasureDevice,
+)
+from .. import Redis
+from .repo_version import get_master_data_version
+
+
+settings = Settings()
+
+
+# How often the workers check if the data version has changed in seconds
+DATA_VERSION_CHECK_INTERVAL = 1.0
+
+
+class ColumnKind(str, Enum):
+    VALUE = "value"
+    JSON = "json"
+    MODEL = "model"
+
+
+def get_column_kind(field: ModelField) -> ColumnKind:
+    """How the values of the field are stored.
+
+    Immutable values are stored as is. Lists and dicts are stored as JSON so each
+    row gets its own copy. Values pydantic converts, e.g. nested models, are
+    stored already converted and each row gets a shallow copy, the nested models
+    are shared.
+    """
+    if field.outer_type_ in (int, str, bool) and not field.allow_none:
+        return ColumnKind.VALUE
+    if is_plain_type(field.outer_type_):
+        return ColumnKind.JSON
+    return ColumnKind.MODEL
+
+
+TModel = TypeVar("TModel", bound=BaseModel)
+
+
+@dataclass
+class Column:
+    field: ModelField
+    kind: ColumnKind
+    values: Union["array[int]", list[Any]]
+
+
+def make_column(field: ModelField, values: list[Any]) -> Column:
+    kind = get_column_kind(field)
+    if kind == ColumnKind.VALUE:
+        if field.outer_type_ is int:
+            try:
+                return Column(field, kind, array("q", values))
+            except OverflowError:
+                pass
+        return Column(field, kind, values)
+    if kind == ColumnKind.MODEL:
+        return Column(field, kind, values)
+    return Column(
+        field, kind, [orjson.dumps(value, default=BaseModel.dict) for value in values]
+    )
+
+
+class ColumnarTable(Generic[TModel]):
+    """Rows of a schema stored column by column and sorted by `key_field`.
+
+    The numeric columns are int64 arrays instead of one Python object per value.
+    Rows are looked up by bisecting the sorted keys, several rows can have the
+    same key.
+    """
+
+    def __init__(
+        self, schema: Type[TModel], key_field: str, rows: Iterable[TModel]
+    ) -> None:
+        self.schema = schema
+        sorted_rows = sorted(rows, key=attrgetter(key_field))
+        self.keys = array("q", [getattr(row, key_field) for row in sorted_rows])
+        self.columns = {
+            name: make_column(field, [getattr(row, name) for row in sorted_rows])
+            for name, field in schema.__fields__.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get_row(self, index: int) -> TModel:
+        values: dict[str, Any] = {}
+        for name, column in self.columns.items():
+            value: Any = column.values[index]
+            if column.kind == ColumnKind.JSON:
+                value = orjson.loads(value)
+            elif column.kind == ColumnKind.MODEL:
+                value = copy(value)
+            values[name] = value
+        return self.schema.construct(**values)
+
+    def get_all(self, key: int) -> list[TModel]:
+        start = bisect_left(self.keys, key)
+        end = bisect_right(self.keys, key, lo=start)
+        return [self.get_row(index) for index in range(start, end)]
+
+    def get(self, key: int) -> Optional[TModel]:
+        index = bisect_left(self.keys, key)
+        if index == len(self.keys) or self.keys[index] != key:
+            return None
+        return self.get_row(index)
+
+
+# Redis table and key of the schemas in the store. The mstSvtLimit items are
+# the lists of limits of each svt.
+columnar_redis_table: dict[Type[BaseModel], tuple[str, str]] = {
+    MstSvt: ("mstSvt", "id"),
+    MstSvtLimit: ("mstSvtlimit", "svtId"),
+    MstSkill: ("mstSkill", "id"),
+    MstTreasureDevice: ("mstTreasureDevice", "id"),
+    MstBuff: ("mstBuff", "id"),
+    MstFunc: ("mstFunc", "id"),
+}
+
+
+MasterStore = dict[Type[BaseModel], ColumnarTable[Any]]
+
+
+MasterStoreData = dict[Type[BaseModel], list[bytes]]
+
+
+async def fetch_master_store_data(
+    redis: Redis, region: Region
+) -> MasterStoreData:  # pragma: no cover
+    store_data: MasterStoreData = {}
+    for schema, (redis_table, _) in columnar_redis_table.items():
+        redis_key = f"{settings.redis_prefix}:data:{region.name}:{redis_table}"
+        store_data[schema] = list((await redis.hgetall(redis_key)).values())
+    return store_data
+
+
+def build_master_store(store_data: MasterStoreData) -> MasterStore:
+    store: MasterStore = {}
+    for schema, items in store_data.items():
+        key_field = columnar_redis_table[schema][1]
+        rows: list[BaseModel]
+        if schema is MstSvtLimit:
+            rows = [
+                row
+                for svt_items in items
+                for row in parse_raw_as(list[MstSvtLimit], svt_items)
+            ]
+        else:
+            rows = [schema.parse_raw(item) for item in items]
+        store[schema] = ColumnarTable(schema, key_field, rows)
+    return store
+
+
+class MasterStores:
+    """Per worker `MasterStore` of each region, reloaded when the master data
+    version in redis changes.
+
+    Until the reload completes, `get` returns None and the data is fetched from
+    redis so requests don't wait for the reload.
+    """
+
+    def __init__(self) -> None:
+        self.stores: dict[Region, MasterStore] = {}
+        self.data_version: Optional[int] = None
+        self.next_version_check = 0.0
+        self.load_tasks: set[asyncio.Task[None]] = set()
+
+    async def load(self, redis: Redis, data_version: int) -> None:  # pragma: no cover
+        start_loading_time = time.perf_counter()
+        stores_data = {
+            region: await fetch_master_store_data(redis, region)
+            for region in settings.data
+        }
+        # Parsing the rows takes a while, in a thread so the worker keeps serving
+        # requests in the meantime
+        stores = await run_in_threadpool(
+            lambda: {
+                region: build_master_store(store_data)
+                for region, store_data in stores_data.items()
+            }
+        )
+        # A newer version is being loaded
+        if data_version != self.data_version:
+            return
+        self.stores = stores
+        loading_time = time.perf_counter() - start_loading_time
+        logger.info(
+            f"Loaded the columnar store of data version {data_version} "
+            f"in {loading_time:.2f}s."
+        )
+
+    async def load_in_background(
+        self, redis: Redis, data_version: int
+    ) -> None:  # pragma: no cover
+        try:
+            await self.load(redis, data_version)
+        except Exception:
+            logger.exception("Failed to load the columnar store")
+            # Retry at the next version check
+            if data_version == self.data_version:
+                self.data_version = None
+
+    async def check_version(
+        self, redis: Redis, wait: bool = False
+    ) -> None:  # pragma: no cover
+        now = time.monotonic()
+        if now < self.next_version_check and not wait:
+            return
+        self.next_version_check = now + DATA_VERSION_CHECK_INTERVAL
+
+        data_version = await get_master_data_version(redis)
+        if data_version == self.data_version:
+            return
+        self.data_version = data_version
+        self.stores = {}
+        if wait:
+            await self.load(redis, data_version)
+        else:
+            task = asyncio.create_task(self.load_in_background(redis, data_version))
+            self.load_tasks.add(task)
+            task.add_done_callback(self.load_tasks.discard)
+
+    async def get(
+        self, redis: Redis, region: Region
+    ) -> Optional[MasterStore]:  # pragma: no cover
+        if not settings.columnar_store:
+            return None
+        await self.check_version(redis)
+        return self.stores.get(region)
+
+
+master_stores = MasterStores()
@@ -0,0 +1,142 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from ...config import Settings, logger
+from .. import Redis
+
+
+settings = Settings()
+
+
+LOAD_LOCK_TTL_MS = 60_000
+LOAD_LOCK_RENEW_INTERVAL = 10
+LOAD_WAIT_POLL_INTERVAL = 0.5
+
+
+# Only extend or release the lock if it's still held with the token
+RENEW_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# Publish the token as the data ready generation only if the lock is still held
+# with it so a leader whose lock expired can't overwrite a newer load
+FINISH_LOAD_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    redis.call("SET", KEYS[2], ARGV[1])
+    redis.call("DEL", KEYS[1])
+    return 1
+end
+return 0
+"""
+
+
+def get_load_lock_key() -> str:
+    return f"{settings.redis_prefix}:load_lock"
+
+
+def get_load_token_key() -> str:
+    return f"{settings.redis_prefix}:load_token"
+
+
+def get_data_ready_key() -> str:
+    return f"{settings.redis_prefix}:data_ready"
+
+
+async def get_data_ready_generation(redis: Redis) -> int:
+    """Fencing token of the last load that completed."""
+    generation = await redis.get(get_data_ready_key())
+    return int(generation) if generation else 0
+
+
+async def acquire_load_lock(redis: Redis) -> tuple[bool, int]:  # pragma: no cover
+    """Try to become the loading leader.
+
+    Returns whether the lock was acquired and the token of its holder. Tokens
+    only increase so a load can be ordered against the other loads.
+    """
+    token = await redis.incr(get_load_token_key())
+    if await redis.set(get_load_lock_key(), token, nx=True, px=LOAD_LOCK_TTL_MS):
+        return True, token
+    holder_token = await redis.get(get_load_lock_key())
+    # The lock can expire between the two commands, the caller retries then
+    return False, int(holder_token) if holder_token else 0
+
+
+async def renew_load_lock(redis: Redis, token: int) -> bool:  # pragma: no cover
+    renew_lock = redis.register_script(RENEW_LOCK_SCRIPT)
+    renewed = await renew_lock(
+        keys=[get_load_lock_key()], args=[token, LOAD_LOCK_TTL_MS]
+    )
+    return bool(renewed)
+
+
+async def keep_load_lock(redis: Redis, token: int) -> None:  # pragma: no cover
+    while True:
+        await asyncio.sleep(LOAD_LOCK_RENEW_INTERVAL)
+        if not await renew_load_lock(redis, token):
+            logger.warning(f"Lost the load lock of token {token}.")
+            return
+
+
+async def finish_load(redis: Redis, token: int) -> bool:  # pragma: no cover
+    finish = redis.register_script(FINISH_LOAD_SCRIPT)
+    finished = await finish(
+        keys=[get_load_lock_key(), get_data_ready_key()], args=[token]
+    )
+    return bool(finished)
+
+
+async def release_load_lock(redis: Redis, token: int) -> None:  # pragma: no cover
+    """Release the lock without marking the data as ready, after a failed load."""
+    release_lock = redis.register_script(RELEASE_LOCK_SCRIPT)
+    await release_lock(keys=[get_load_lock_key()], args=[token])
+
+
+async def wait_for_load(redis: Redis, holder_token: int) -> bool:  # pragma: no cover
+    """Wait until the lock is released and return whether the holder's load
+    completed."""
+    while await redis.exists(get_load_lock_key()):
+        await asyncio.sleep(LOAD_WAIT_POLL_INTERVAL)
+    return await get_data_ready_generation(redis) >= holder_token
+
+
+async def load_once(
+    redis: Redis, load: Callable[[], Awaitable[None]]
+) -> None:  # pragma: no cover
+    """Run `load` in only one of the processes starting together.
+
+    The process that gets the lock runs the load while the others wait for it
+    to complete. If the leader fails or dies, a waiting process takes over.
+    """
+    holder_token: Optional[int] = None
+    while True:
+        acquired, token = await acquire_load_lock(redis)
+        if acquired:
+            break
+        if token != holder_token:
+            logger.info(f"Waiting for the data load {token} of another worker …")
+            holder_token = token
+        if token != 0 and await wait_for_load(redis, token):
+            logger.info(f"Data load {token} of another worker completed.")
+            return
+
+    keep_lock_task = asyncio.create_task(keep_load_lock(redis, token))
+    try:
+        await load()
+    except BaseException:
+        await release_load_lock(redis, token)
+        raise
+    finally:
+        keep_lock_task.cancel()
+    if not await finish_load(redis, token):
+        logger.warning(f"Data load {token} completed after its lock expired.")
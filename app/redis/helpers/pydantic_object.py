@@ -1,7 +1,10 @@
 from itertools import chain
-from typing import Optional, Type, TypeVar
+from typing import Iterable, Optional, Type, TypeVar
+
+from pydantic import parse_raw_as
 
 from ...config import Settings
+from ...data.snapshot import get_master_snapshot
 from ...schemas.base import BaseModelORJson
 from ...schemas.common import Region
 from ...schemas.raw import (
@@ -16,6 +19,7 @@ from ...schemas.raw import (
     MstTreasureDevice,
 )
 from .. import Redis
+from .columnar import master_stores
 
 
 settings = Settings()
@@ -38,9 +42,17 @@ RedisPydantic = TypeVar("RedisPydantic", bound=BaseModelORJson)
 async def fetch_id(
     redis: Redis, region: Region, schema: Type[RedisPydantic], item_id: int
 ) -> Optional[RedisPydantic]:
+    store = await master_stores.get(redis, region)
+    if store is not None and schema in store:
+        return store[schema].get(item_id)
+
     redis_table = pydantic_obj_redis_table[schema][0]
-    redis_key = f"{settings.redis_prefix}:data:{region.name}:{redis_table}"
-    item_redis = await redis.hget(redis_key, str(item_id))
+    snapshot = get_master_snapshot(region)
+    if snapshot is not None:
+        item_redis = snapshot.get(redis_table, item_id)
+    else:
+        redis_key = f"{settings.redis_prefix}:data:{region.name}:{redis_table}"
+        item_redis = await redis.hget(redis_key, str(item_id))
 
     if item_redis:
         return schema.parse_raw(item_redis)
@@ -48,26 +60,92 @@ async def fetch_id(
     return None
 
 
-async def fetch_mstSvtLimit(
+async def fetch_ids(
     redis: Redis,
     region: Region,
-    svt_id: int,
+    schema: Type[RedisPydantic],
+    item_ids: Iterable[int],
+) -> dict[int, RedisPydantic]:
+    """Fetch multiple items in one round trip. Items not found are left out."""
+    item_ids = list(set(item_ids))
+    if not item_ids:
+        return {}
+
+    store = await master_stores.get(redis, region)
+    if store is not None and schema in store:
+        table = store[schema]
+        return {
+            item_id: item
+            for item_id in item_ids
+            if (item := table.get(item_id)) is not None
+        }
+
+    redis_table = pydantic_obj_redis_table[schema][0]
+    snapshot = get_master_snapshot(region)
+    if snapshot is not None:
+        items_redis = [snapshot.get(redis_table, item_id) for item_id in item_ids]
+    else:
+        redis_key = f"{settings.redis_prefix}:data:{region.name}:{redis_table}"
+        items_redis = await redis.hmget(
+            redis_key, [str(item_id) for item_id in item_ids]
+        )
+
+    return {
+        item_id: schema.parse_raw(item_redis)
+        for item_id, item_redis in zip(item_ids, items_redis, strict=True)
+        if item_redis
+    }
+
+
+def select_mstSvtLimit(
+    mstSvtLimits: Iterable[MstSvtLimit],
     svt_limit: Optional[int] = None,
     prefer_lower: bool = False,
 ) -> Optional[MstSvtLimit]:
-    redis_key = f"{settings.redis_prefix}:data:{region.name}:mstSvtlimit"
+    """Select the `svt_limit` limit or the default limit if there's no such limit.
 
-    if svt_limit is not None:
-        mstSvtLimit = await redis.hget(redis_key, f"{svt_id}:{svt_limit}")
-        if mstSvtLimit:
-            return MstSvtLimit.parse_raw(mstSvtLimit)
+    The default limit is the highest of limit 0 to 3 or the lowest if `prefer_lower`,
+    then the lowest limit above 3.
+    """
+    limits = {limit.limitCount: limit for limit in mstSvtLimits}
+
+    if svt_limit is not None and svt_limit in limits:
+        return limits[svt_limit]
 
     lower_limit_range = range(0, 4) if prefer_lower else range(3, -1, -1)
 
     for i in chain(lower_limit_range, range(4, 100)):
-        mstSvtLimit = await redis.hget(redis_key, f"{svt_id}:{i}")
-        if mstSvtLimit:
-            return MstSvtLimit.parse_raw(mstSvtLimit)
+        if i in limits:
+            return limits[i]
 
     # All svts should have at least one limit
     return None  # pragma: no cover
+
+
+async def fetch_mstSvtLimits(
+    redis: Redis, region: Region, svt_ids: Iterable[int]
+) -> dict[int, list[MstSvtLimit]]:
+    """Fetch all limits of the given svts in one round trip."""
+    svt_ids = list(set(svt_ids))
+    if not svt_ids:
+        return {}
+
+    store = await master_stores.get(redis, region)
+    if store is not None:
+        table = store[MstSvtLimit]
+        return {
+            svt_id: limits for svt_id in svt_ids if (limits := table.get_all(svt_id))
+        }
+
+    snapshot = get_master_snapshot(region)
+    if snapshot is not None:
+        svt_limits = [snapshot.get("mstSvtlimit", svt_id) for svt_id in svt_ids]
+    else:
+        redis_key = f"{settings.redis_prefix}:data:{region.name}:mstSvtlimit"
+        svt_limits = await redis.hmget(redis_key, [str(svt_id) for svt_id in svt_ids])
+
+    return {
+        svt_id: parse_raw_as(list[MstSvtLimit], limits)
+        for svt_id, limits in zip(svt_ids, svt_limits, strict=True)
+        if limits
+    }
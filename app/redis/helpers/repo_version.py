@@ -1,7 +1,7 @@
 from typing import Optional
 
 from ...config import Settings
-from ...schemas.common import Region, RepoInfo
+from ...schemas.common import LoadManifest, Region, RepoInfo
 from .. import Redis
 
 
@@ -22,3 +22,43 @@ async def set_repo_version(redis: Redis, region: Region, repo_info: RepoInfo) ->
     redis_key = f"{settings.redis_prefix}:repo_version:{region.name}"
     redis_data = repo_info.json()
     await redis.set(redis_key, redis_data)
+    await bump_data_version(redis)
+
+
+async def get_data_version(redis: Redis) -> int:
+    """Counter that is bumped every time the game data or the cache changes."""
+    data_version = await redis.get(f"{settings.redis_prefix}:data_version")
+    return int(data_version) if data_version else 0
+
+
+async def bump_data_version(redis: Redis) -> None:
+    await redis.incr(f"{settings.redis_prefix}:data_version")
+
+
+async def get_master_data_version(redis: Redis) -> int:
+    """Counter that is bumped once every time the master data in redis is loaded."""
+    master_data_version = await redis.get(
+        f"{settings.redis_prefix}:master_data_version"
+    )
+    return int(master_data_version) if master_data_version else 0
+
+
+async def bump_master_data_version(redis: Redis) -> None:
+    await redis.incr(f"{settings.redis_prefix}:master_data_version")
+
+
+def get_load_manifest_key() -> str:
+    return f"{settings.redis_prefix}:load_manifest"
+
+
+async def get_load_manifest(redis: Redis) -> Optional[LoadManifest]:
+    manifest = await redis.get(get_load_manifest_key())
+    return LoadManifest.parse_raw(manifest) if manifest else None
+
+
+async def set_load_manifest(redis: Redis, manifest: LoadManifest) -> None:
+    await redis.set(get_load_manifest_key(), manifest.json())
+
+
+async def delete_load_manifest(redis: Redis) -> None:
+    await redis.delete(get_load_manifest_key())
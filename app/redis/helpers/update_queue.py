@@ -0,0 +1,147 @@
+import os
+import socket
+import time
+from typing import Iterable, Optional
+
+from redis.exceptions import ResponseError
+
+from ...config import Settings
+from ...schemas.common import Region
+from .. import Redis
+
+
+settings = Settings()
+
+
+UPDATE_GROUP = "update_workers"
+UPDATE_EVENTS_MAX_LENGTH = 1000
+# Jobs delivered to a worker that died are taken over after this long
+UPDATE_JOB_CLAIM_IDLE_MS = 60 * 60 * 1000
+
+
+# Mark the regions as queued and add their job in one step so a region can't be
+# left marked as queued without a job if the client fails in between
+ENQUEUE_UPDATE_SCRIPT = """
+local new_regions = {}
+for _, region in ipairs(ARGV) do
+    if redis.call("SADD", KEYS[1], region) == 1 then
+        table.insert(new_regions, region)
+    end
+end
+if #new_regions == 0 then
+    return {}
+end
+local regions = table.concat(new_regions, ",")
+return {redis.call("XADD", KEYS[2], "*", "regions", regions), regions}
+"""
+
+
+def get_update_jobs_key() -> str:
+    return f"{settings.redis_prefix}:update_jobs"
+
+
+def get_update_queued_key() -> str:
+    return f"{settings.redis_prefix}:update_queued"
+
+
+def get_update_events_key() -> str:
+    return f"{settings.redis_prefix}:update_events"
+
+
+def get_consumer_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def parse_regions(regions: bytes) -> list[Region]:
+    return [Region(region) for region in regions.decode().split(",") if region]
+
+
+async def publish_update_event(
+    redis: Redis, regions: Iterable[Region], event: str, job_id: str = ""
+) -> None:
+    await redis.xadd(
+        get_update_events_key(),
+        {
+            "event": event,
+            "regions": ",".join(region.value for region in regions),
+            "job_id": job_id,
+            "timestamp": int(time.time()),
+        },
+        maxlen=UPDATE_EVENTS_MAX_LENGTH,
+        approximate=True,
+    )
+
+
+async def enqueue_update(redis: Redis, regions: Iterable[Region]) -> list[Region]:
+    """Queue an update of the regions that don't already have one queued.
+
+    Returns the regions that were queued. A region is queued again once its
+    queued update starts so a push during an update isn't missed.
+    """
+    enqueue = redis.register_script(ENQUEUE_UPDATE_SCRIPT)
+    queued = await enqueue(
+        keys=[get_update_queued_key(), get_update_jobs_key()],
+        args=[region.value for region in regions],
+    )
+    if not queued:
+        return []
+    job_id, queued_regions = queued
+    new_regions = parse_regions(queued_regions)
+    await publish_update_event(redis, new_regions, "queued", job_id.decode())
+    return new_regions
+
+
+async def create_update_group(redis: Redis) -> None:
+    # Start from the beginning of the stream so the jobs queued before the first
+    # worker started are run too
+    try:
+        await redis.xgroup_create(
+            get_update_jobs_key(), UPDATE_GROUP, id="0", mkstream=True
+        )
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+async def read_update_job(
+    redis: Redis, consumer: str, block_ms: int
+) -> Optional[tuple[str, list[Region]]]:
+    """Next update job for the consumer, jobs abandoned by dead workers first.
+
+    The regions of the job can be queued again from then on.
+    """
+    # Redis 7 also returns the deleted IDs after the claimed messages
+    claimed = (
+        await redis.xautoclaim(
+            get_update_jobs_key(),
+            UPDATE_GROUP,
+            consumer,
+            UPDATE_JOB_CLAIM_IDLE_MS,
+            count=1,
+        )
+    )[1]
+    if claimed:
+        job_id, fields = claimed[0]
+    else:
+        streams = await redis.xreadgroup(
+            UPDATE_GROUP,
+            consumer,
+            {get_update_jobs_key(): ">"},
+            count=1,
+            block=block_ms,
+        )
+        if not streams:
+            return None
+        _, messages = streams[0]
+        job_id, fields = messages[0]
+
+    regions = parse_regions(fields[b"regions"])
+    await redis.srem(get_update_queued_key(), *(region.value for region in regions))
+    return job_id.decode(), regions
+
+
+async def ack_update_job(redis: Redis, job_id: str) -> None:  # pragma: no cover
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.xack(get_update_jobs_key(), UPDATE_GROUP, job_id)
+        pipe.xdel(get_update_jobs_key(), job_id)
+        await pipe.execute()
@@ -1,12 +1,14 @@
 import time
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import Any, Callable
+from typing import Any, Callable, Optional
 
 import orjson
+from fastapi.concurrency import run_in_threadpool
 from pydantic import DirectoryPath
 
 from ..config import Settings, logger
-from ..data.buff import get_buff_with_classrelation
+from ..data.buff import BUFF_DEPENDENCIES, get_buff_with_classrelation
 from ..data.reverse import (
     get_active_skill_to_svt,
     get_buff_to_func,
@@ -17,6 +19,8 @@ from ..data.reverse import (
     get_skill_to_MC,
     get_td_to_svt,
 )
+from ..data.snapshot import get_snapshot_path, write_snapshot
+from ..data.utils import ChangedFiles, is_changed
 from ..schemas.common import Region
 from ..schemas.raw import MstSvtExtra
 from . import Redis
@@ -29,10 +33,15 @@ REDIS_DATA_PREFIX = f"{settings.redis_prefix}:data"
 
 
 async def load_pydantic_object(
-    redis: Redis, region_path: dict[Region, DirectoryPath], redis_prefix: str
+    redis: Redis,
+    region_path: dict[Region, DirectoryPath],
+    redis_prefix: str,
+    changed_files: Optional[ChangedFiles] = None,
 ) -> None:
     for region, master_folder in region_path.items():
         for master_file, id_field in pydantic_obj_redis_table.values():
+            if not is_changed(changed_files, region, [master_file]):
+                continue
             table_json = master_folder / "master" / f"{master_file}.json"
             if master_file != "mstBuff" and table_json.exists():
                 with open(table_json, "rb") as fp:
@@ -57,9 +66,14 @@ async def load_svt_extra_redis(
 
 
 async def load_mstBuff(
-    redis: Redis, region_path: dict[Region, DirectoryPath], redis_prefix: str
+    redis: Redis,
+    region_path: dict[Region, DirectoryPath],
+    redis_prefix: str,
+    changed_files: Optional[ChangedFiles] = None,
 ) -> None:
     for region, repo_folder in region_path.items():
+        if not is_changed(changed_files, region, BUFF_DEPENDENCIES):
+            continue
         redis_key = f"{redis_prefix}:{region.name}:mstBuff"
         mstBuff_data = get_buff_with_classrelation(repo_folder)
         mstBuff_redis = {k: v.json() for k, v in mstBuff_data.items()}
@@ -68,16 +82,24 @@ async def load_mstBuff(
 
 
 async def load_mstSvtLimit(
-    redis: Redis, region_path: dict[Region, DirectoryPath], redis_prefix: str
+    redis: Redis,
+    region_path: dict[Region, DirectoryPath],
+    redis_prefix: str,
+    changed_files: Optional[ChangedFiles] = None,
 ) -> None:
     for region, master_folder in region_path.items():
+        if not is_changed(changed_files, region, ["mstSvtLimit"]):
+            continue
         mstSvtLimit_json = master_folder / "master" / "mstSvtLimit.json"
         if mstSvtLimit_json.exists():
             with open(mstSvtLimit_json, "rb") as fp:
                 mstSvtLimit_data: list[dict[str, Any]] = orjson.loads(fp.read())
+            svt_limits: dict[int, list[dict[str, Any]]] = defaultdict(list)
+            for item in mstSvtLimit_data:
+                svt_limits[item["svtId"]].append(item)
             redis_data = {
-                f'{item["svtId"]}:{item["limitCount"]}': orjson.dumps(item)
-                for item in mstSvtLimit_data
+                str(svt_id): orjson.dumps(limits)
+                for svt_id, limits in svt_limits.items()
             }
             redis_key = f"{redis_prefix}:{region.name}:mstSvtlimit"
             await redis.delete(redis_key)
@@ -88,25 +110,53 @@ async def load_mstSvtLimit(
 class ReverseDataFunc:
     key: RedisReverse
     dataFunc: Callable[[DirectoryPath], dict[int, Any]]
+    dependencies: list[str]
 
 
 reverse_data_detail = [
-    ReverseDataFunc(RedisReverse.BUFF_TO_FUNC, get_buff_to_func),
-    ReverseDataFunc(RedisReverse.FUNC_TO_SKILL, get_func_to_skill),
-    ReverseDataFunc(RedisReverse.FUNC_TO_TD, get_func_to_td),
-    ReverseDataFunc(RedisReverse.TD_TO_SVT, get_td_to_svt),
-    ReverseDataFunc(RedisReverse.ACTIVE_SKILL_TO_SVT, get_active_skill_to_svt),
-    ReverseDataFunc(RedisReverse.PASSIVE_SKILL_TO_SVT, get_passive_skill_to_svt),
-    ReverseDataFunc(RedisReverse.SKILL_TO_MC, get_skill_to_MC),
-    ReverseDataFunc(RedisReverse.SKILL_TO_CC, get_skill_to_CC),
+    ReverseDataFunc(RedisReverse.BUFF_TO_FUNC, get_buff_to_func, ["mstFunc"]),
+    ReverseDataFunc(
+        RedisReverse.FUNC_TO_SKILL, get_func_to_skill, ["mstSkillLv", "mstSkill"]
+    ),
+    ReverseDataFunc(
+        RedisReverse.FUNC_TO_TD,
+        get_func_to_td,
+        ["mstTreasureDeviceLv", "mstTreasureDevice"],
+    ),
+    ReverseDataFunc(
+        RedisReverse.TD_TO_SVT, get_td_to_svt, ["mstSvtTreasureDevice", "mstSvt"]
+    ),
+    ReverseDataFunc(
+        RedisReverse.ACTIVE_SKILL_TO_SVT,
+        get_active_skill_to_svt,
+        ["mstSvtSkill", "mstSvt"],
+    ),
+    ReverseDataFunc(
+        RedisReverse.PASSIVE_SKILL_TO_SVT,
+        get_passive_skill_to_svt,
+        ["mstSvt", "mstSvtPassiveSkill", "mstSvtAppendPassiveSkill"],
+    ),
+    ReverseDataFunc(
+        RedisReverse.SKILL_TO_MC, get_skill_to_MC, ["mstEquipSkill", "mstEquip"]
+    ),
+    ReverseDataFunc(
+        RedisReverse.SKILL_TO_CC,
+        get_skill_to_CC,
+        ["mstCommandCodeSkill", "mstCommandCode"],
+    ),
 ]
 
 
 async def load_reverse_data(
-    redis: Redis, region_path: dict[Region, DirectoryPath], redis_prefix: str
+    redis: Redis,
+    region_path: dict[Region, DirectoryPath],
+    redis_prefix: str,
+    changed_files: Optional[ChangedFiles] = None,
 ) -> None:
     for region, gamedata_path in region_path.items():
         for data in reverse_data_detail:
+            if not is_changed(changed_files, region, data.dependencies):
+                continue
             reverse_data = data.dataFunc(gamedata_path)
             redis_data = {str(k): orjson.dumps(v) for k, v in reverse_data.items()}
             redis_key = f"{redis_prefix}:{region.name}:{data.key.name}"
@@ -114,16 +164,34 @@ async def load_reverse_data(
             await redis.hset(redis_key, mapping=redis_data)
 
 
-async def load_redis_data(
+async def write_master_snapshots(
     redis: Redis, region_path: dict[Region, DirectoryPath]
+) -> None:  # pragma: no cover
+    """Write the redis master data of the regions to their snapshot files."""
+    table_names = [
+        redis_table for redis_table, _ in pydantic_obj_redis_table.values()
+    ] + ["mstSvtlimit"]
+    for region in region_path:
+        tables: dict[str, dict[int, bytes]] = {}
+        for table_name in table_names:
+            redis_key = f"{REDIS_DATA_PREFIX}:{region.name}:{table_name}"
+            redis_data = await redis.hgetall(redis_key)
+            tables[table_name] = {int(k): v for k, v in redis_data.items()}
+        await run_in_threadpool(write_snapshot, get_snapshot_path(region), tables)
+
+
+async def load_redis_data(
+    redis: Redis,
+    region_path: dict[Region, DirectoryPath],
+    changed_files: Optional[ChangedFiles] = None,
 ) -> None:
     logger.info("Loading redis …")
     start_loading_time = time.perf_counter()
 
-    await load_pydantic_object(redis, region_path, REDIS_DATA_PREFIX)
-    await load_mstSvtLimit(redis, region_path, REDIS_DATA_PREFIX)
-    await load_mstBuff(redis, region_path, REDIS_DATA_PREFIX)
-    await load_reverse_data(redis, region_path, REDIS_DATA_PREFIX)
+    await load_pydantic_object(redis, region_path, REDIS_DATA_PREFIX, changed_files)
+    await load_mstSvtLimit(redis, region_path, REDIS_DATA_PREFIX, changed_files)
+    await load_mstBuff(redis, region_path, REDIS_DATA_PREFIX, changed_files)
+    await load_reverse_data(redis, region_path, REDIS_DATA_PREFIX, changed_files)
 
     redis_loading_time = time.perf_counter() - start_loading_time
     logger.info(f"Loaded redis in {redis_loading_time:.2f}s.")
@@ -1,8 +1,8 @@
 from typing import Optional
 
 from fastapi import APIRouter, Depends, Response
-from fastapi_cache.decorator import cache
 
+from ..cache import cache
 from ..config import Settings
 from ..core import basic, search
 from ..db.helpers.cc import get_cc_id
@@ -64,12 +64,9 @@ async def find_servant(
     async with get_db(search_param.region) as conn:
         matches = await search.search_servant(conn, search_param, limit=10000)
         return list_response(
-            [
-                await basic.get_basic_servant(
-                    redis, search_param.region, mstSvt.id, 0, lang, mstSvt
-                )
-                for mstSvt in matches
-            ]
+            await basic.get_all_basic_servants(
+                redis, search_param.region, lang, matches
+            )
         )
 
 
@@ -132,12 +129,7 @@ async def find_equip(
     async with get_db(search_param.region) as conn:
         matches = await search.search_equip(conn, search_param, limit=10000)
         return list_response(
-            [
-                await basic.get_basic_equip(
-                    redis, search_param.region, mstSvt.id, lang, mstSvt
-                )
-                for mstSvt in matches
-            ]
+            await basic.get_all_basic_equips(redis, search_param.region, lang, matches)
         )
 
 
@@ -197,12 +189,9 @@ async def find_svt(
     async with get_db(search_param.region) as conn:
         matches = await search.search_servant(conn, search_param, limit=10000)
         return list_response(
-            [
-                await basic.get_basic_servant(
-                    redis, search_param.region, mstSvt.id, 0, lang, mstSvt
-                )
-                for mstSvt in matches
-            ]
+            await basic.get_all_basic_servants(
+                redis, search_param.region, lang, matches
+            )
         )
 
 
@@ -5,6 +5,8 @@ from fastapi import HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncConnection
 
 from ..db.engine import async_engines
+from ..db.helpers.fan_out import use_one_snapshot
+from ..db.helpers.loader import request_scope
 from ..redis import Redis
 from ..schemas.common import Language, Region
 
@@ -21,7 +23,8 @@ async def language_parameter(lang: Optional[Language] = None) -> Language:
 async def get_db(region: Region) -> AsyncGenerator[AsyncConnection, None]:
     if region not in async_engines:  # pragma: no cover
         raise HTTPException(status_code=404, detail="Region not found")
-    async with async_engines[region].connect() as connection:
+    async with async_engines[region].connect() as connection, request_scope(connection):
+        await use_one_snapshot(connection)
         connection.info["region"] = region
         yield connection
 
@@ -30,7 +33,8 @@ async def get_db(region: Region) -> AsyncGenerator[AsyncConnection, None]:
 async def get_db_transaction(region: Region) -> AsyncGenerator[AsyncConnection, None]:
     if region not in async_engines:  # pragma: no cover
         raise HTTPException(status_code=404, detail="Region not found")
-    async with async_engines[region].begin() as connection:
+    async with async_engines[region].begin() as connection, request_scope(connection):
+        connection.info["region"] = region
         yield connection
 
 
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, Response
-from fastapi_cache.decorator import cache
 
+from ..cache import cache, cache_warmer, get_function_name, record_hot_call
 from ..config import Settings
 from ..core import search
 from ..core.nice import (
@@ -743,6 +743,16 @@ async def get_war(
         return item_response(await war.get_nice_war(conn, region, war_id, lang))
 
 
+@cache_warmer
+async def warm_quest_phase(
+    region: Region, quest_id: int, phase: int, lang: Language, redis: Redis
+) -> None:  # pragma: no cover
+    async with get_db_transaction(region) as conn:
+        await quest.get_nice_quest_phase_no_rayshift(
+            conn, redis, region, quest_id, phase, lang
+        )
+
+
 get_quest_phase_description = (
     "Get the nice quest phase data from the given quest ID and phase number"
 )
@@ -764,6 +774,11 @@ async def get_quest_phase(
     redis: Redis = Depends(get_redis),
     lang: Language = Depends(language_parameter),
 ) -> Response:
+    # The response isn't cached because of the rayshift data, only its db part
+    record_hot_call(
+        get_function_name(warm_quest_phase),
+        {"region": region, "quest_id": quest_id, "phase": phase, "lang": lang},
+    )
     async with get_db_transaction(region) as conn:
         return item_response(
             await quest.get_nice_quest_phase(conn, redis, region, quest_id, phase, lang)
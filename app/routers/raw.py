@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, Query, Response
-from fastapi_cache.decorator import cache
 
+from ..cache import cache
 from ..config import Settings
 from ..core import raw, search
 from ..db.helpers.cc import get_cc_id
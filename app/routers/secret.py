@@ -9,6 +9,7 @@ from ..config import Settings, project_root
 from ..core.info import get_all_repo_info
 from ..db.engine import async_engines
 from ..redis import Redis
+from ..redis.helpers.update_queue import enqueue_update
 from ..schemas.common import RepoInfo
 from ..tasks import pull_and_update
 from .deps import get_redis
@@ -67,12 +68,20 @@ async def update_gamedata(
             if payload.ref == f"refs/heads/{region.name}":
                 region_pathes = {region: region_data.gamedata}
                 break
-    background_tasks.add_task(pull_and_update, region_pathes, async_engines, redis)
+    if settings.update_worker:
+        queued_regions = await enqueue_update(redis, region_pathes)
+        regions = ", ".join(region.name for region in queued_regions)
+        message = (
+            f"{regions} game data update is queued"
+            if queued_regions
+            else "Game data update is already queued"
+        )
+    else:
+        background_tasks.add_task(pull_and_update, region_pathes, async_engines, redis)
+        regions = ", ".join(region.name for region in region_pathes)
+        message = f"{regions} game data is being updated in the background"
     secret_info = await get_secret_info(redis)
-    regions = ", ".join(region.name for region in region_pathes)
-    response_data = dict(
-        message=f"{regions} game data is being updated in the background", **secret_info
-    )
+    response_data = dict(message=message, **secret_info)
     return pretty_print_response(response_data)
 
 
@@ -0,0 +1,133 @@
+import os
+from email.utils import formatdate
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Optional, Union
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+from ..schemas.common import RepoInfo
+
+
+# Content-Encoding and file extension of the precompressed export files
+# in the order of preference
+PRECOMPRESSED_ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+
+def get_accepted_encodings(accept_encoding: str) -> set[str]:
+    """Parse the Accept-Encoding header into the set of accepted encodings.
+
+    Encodings with `q=0` are not accepted. `*` accepts all encodings not listed.
+    """
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    accepted = {coding for coding, quality in qualities.items() if quality > 0}
+    if "*" in accepted:
+        accepted.update(
+            encoding
+            for encoding, _ in PRECOMPRESSED_ENCODINGS
+            if encoding not in qualities
+        )
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves the precompressed `.br` and `.gz` siblings of a file
+    if the client accepts them.
+
+    The ETag of the files in a region folder includes the data repo commit in the
+    folder's `info.json`.
+    """
+
+    def __init__(self, *, directory: Union[str, "os.PathLike[str]"]) -> None:
+        super().__init__(directory=directory)
+        self.repo_infos: dict[Path, tuple[int, RepoInfo]] = {}
+
+    def get_repo_info(self, info_path: Path) -> Optional[RepoInfo]:
+        try:
+            mtime = info_path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+        cached = self.repo_infos.get(info_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            repo_info = RepoInfo.parse_file(info_path)
+        except ValueError:
+            return None
+
+        self.repo_infos[info_path] = (mtime, repo_info)
+        return repo_info
+
+    def file_response(
+        self,
+        full_path: Union[str, "os.PathLike[str]"],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        file_path = Path(full_path)
+        file_mtime = stat_result.st_mtime
+
+        accepted_encodings = get_accepted_encodings(
+            request_headers.get("accept-encoding", "")
+        )
+        content_encoding: Optional[str] = None
+        for encoding, extension in PRECOMPRESSED_ENCODINGS:
+            if encoding not in accepted_encodings:
+                continue
+            compressed_path = file_path.with_name(file_path.name + extension)
+            try:
+                compressed_stat = compressed_path.stat()
+            except OSError:
+                continue
+            # Skip compressed files older than the file being served
+            if compressed_stat.st_mtime >= file_mtime:
+                full_path, stat_result = compressed_path, compressed_stat
+                content_encoding = encoding
+                break
+
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            method=scope["method"],
+            media_type=guess_type(file_path.name)[0] or "text/plain",
+        )
+        response.headers["vary"] = "Accept-Encoding"
+        response.headers["last-modified"] = formatdate(file_mtime, usegmt=True)
+        if content_encoding is not None:
+            response.headers["content-encoding"] = content_encoding
+
+        # The export time is included since the same data can be exported again
+        # with a different result by a newer version of the API
+        repo_info = self.get_repo_info(file_path.parent / "info.json")
+        if repo_info is not None:
+            response.headers["etag"] = (
+                f'"{repo_info.hash}-{int(file_mtime):x}-'
+                f'{content_encoding or "identity"}"'
+            )
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -28,6 +28,14 @@ class Region(StrEnum):
     TW = "TW"
 
 
+class LoadManifest(BaseModelORJson):
+    """What the last completed `load_and_export` loaded"""
+
+    repo_hashes: dict[Region, str]
+    app_version: str
+    options: dict[str, Any]
+
+
 class Language(StrEnum):
     """Language Enum"""
 
@@ -1,16 +1,42 @@
+import asyncio
+import gzip
+import hashlib
+import inspect
+import multiprocessing
+import shutil
 import time
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from functools import cache, partial
+from itertools import islice
+from operator import attrgetter
 from pathlib import Path
-from typing import Any, Iterable, Union
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Iterable,
+    Iterator,
+    Optional,
+    TypeVar,
+    Union,
+)
 
 import aiofiles
 import httpx
 import orjson
 from fastapi.concurrency import run_in_threadpool
 from git import Repo  # type: ignore
+from git.exc import BadName  # type: ignore
 from pydantic import DirectoryPath
 from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
 
+from .cache import warm_cache
 from .config import Settings, logger, project_root
 from .core.basic import (
     get_all_basic_ccs,
@@ -32,21 +58,37 @@ from .core.nice.nice import get_nice_equip_model, get_nice_servant_model
 from .core.nice.war import get_nice_war
 from .core.raw import get_all_bgm_entities, get_servant_entity
 from .core.utils import get_translation
-from .data.extra import get_extra_svt_data
-from .db.engine import engines
+from .data.extra import EXTRA_SVT_DEPENDENCIES, get_extra_svt_data
+from .data.snapshot import get_snapshot_path
+from .data.utils import ChangedFiles, get_changed_file_names, is_changed
+from .db.engine import async_engines, engines
 from .db.helpers import fetch
+from .db.helpers.fan_out import use_one_snapshot
+from .db.helpers.loader import request_scope
 from .db.helpers.svt import get_all_equips
 from .db.load import load_pydantic_to_db, update_db
 from .models.raw import mstSvtExtra
 from .redis import Redis
-from .redis.helpers.repo_version import get_repo_version, set_repo_version
-from .redis.load import load_redis_data, load_svt_extra_redis
-from .routers.utils import list_string
+from .redis.helpers.cache_generation import (
+    bump_cache_generations,
+    unlink_old_cache_generations,
+)
+from .redis.helpers.repo_version import (
+    bump_data_version,
+    bump_master_data_version,
+    delete_load_manifest,
+    get_load_manifest,
+    get_repo_version,
+    set_load_manifest,
+    set_repo_version,
+)
+from .redis.helpers.update_queue import publish_update_event
+from .redis.load import load_redis_data, load_svt_extra_redis, write_master_snapshots
 from .schemas.base import BaseModelORJson
-from .schemas.common import Language, Region, RepoInfo
+from .schemas.common import Language, LoadManifest, Region, RepoInfo
 from .schemas.enums import ALL_ENUMS, TRAIT_NAME
 from .schemas.gameenums import SvtType
-from .schemas.nice import NiceEquip, NiceServant
+from .schemas.nice import NiceEquip, NiceEvent, NiceServant, NiceWar
 from .schemas.raw import (
     AssetStorageLine,
     BgmEntity,
@@ -65,23 +107,264 @@ from .schemas.raw import (
 )
 
 
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover
+    brotli = None
+
 settings = Settings()
 
 
+T = TypeVar("T")
+
+
+# Keep references to the fire-and-forget tasks so they are not garbage collected
+background_tasks: set["asyncio.Task[None]"] = set()
+
+
+def run_in_background(coro: Coroutine[Any, Any, None]) -> None:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+# Master files the nice servant and CE exports are built from
+SVT_EXPORT_DEPENDENCIES = [
+    "mstSvt*",
+    "mstCombine*",
+    "mstCommonRelease",
+    "mstFriendship",
+    "mstSkill*",
+    "mstTreasureDevice*",
+    "mstFunc*",
+    "mstBuff*",
+    "mstClassRelationOverwrite",
+    "mstItem*",
+    "mstGift*",
+    "mstVoice*",
+    "globalNewMstSubtitle",
+    "mstIllustrator",
+    "mstCv",
+    "mstEvent",
+    "mstShop*",
+    "mstQuest",
+    "mstConstant",
+    "mstAi*",
+]
+# Master files the nice war and event exports are built from
+WAR_EVENT_EXPORT_DEPENDENCIES = [
+    "mstWar*",
+    "mstEvent*",
+    "mstQuest*",
+    "mstSpot*",
+    "mstMap*",
+    "mstStage*",
+    "mstShop*",
+    "mstGift*",
+    "mstItem*",
+    "mstSetItem",
+    "mstBgm*",
+    "mstBoxGacha*",
+    "mstTreasureBox*",
+    "mstCommon*",
+    "mstClosedMessage",
+    "mstMasterMission",
+    "mstSvt",
+    "mstSvtGroup",
+    "mstSvtLimit",
+    "mstSvtLimitAdd",
+    "mstSvtCostume",
+    "mstSvtVoice",
+    "mstVoice*",
+    "globalNewMstSubtitle",
+    "mstCombine*",
+    "mstClassRelationOverwrite",
+    *EXTRA_SVT_DEPENDENCIES,
+    "mstEnemyMaster*",
+    "mstConstant",
+    "mstSkill*",
+    "mstFunc*",
+    "mstBuff*",
+    "mstAi*",
+    "npc*",
+]
+
+
+def get_temp_path(out_path: Path) -> Path:
+    return out_path.with_name(f".{out_path.name}.tmp")
+
+
+class JsonArrayWriter:
+    """Write a JSON array to a file element by element.
+
+    The array is written to a temp file that replaces the output file once the
+    writer exits without error so a half written file is never served.
+    """
+
+    BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, out_path: Path) -> None:
+        self.out_path = out_path
+        self.temp_path = get_temp_path(out_path)
+        self.buffer: list[str] = []
+        self.buffer_size = 0
+        self.empty = True
+
+    async def __aenter__(self) -> "JsonArrayWriter":
+        self.fp = await aiofiles.open(self.temp_path, "w", encoding="utf-8")
+        self.buffer.append("[")
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        try:
+            if exc_type is None:
+                self.buffer.append("]")
+                await self.flush()
+        finally:
+            await self.fp.close()
+
+        if exc_type is None:
+            self.temp_path.replace(self.out_path)
+        else:
+            self.temp_path.unlink(missing_ok=True)
+
+    async def flush(self) -> None:
+        await self.fp.write("".join(self.buffer))
+        self.buffer.clear()
+        self.buffer_size = 0
+
+    async def write(self, item_json: str) -> None:
+        if not self.empty:
+            self.buffer.append(",")
+        self.buffer.append(item_json)
+        self.empty = False
+
+        self.buffer_size += len(item_json)
+        if self.buffer_size >= self.BUFFER_SIZE:
+            await self.flush()
+
+    async def write_model(self, item: BaseModelORJson) -> None:
+        await self.write(item.json(exclude_unset=True, exclude_none=True))
+
+
+async def iter_in_order(
+    aws: Iterable[Awaitable[T]], window: Optional[int] = None
+) -> AsyncIterator[T]:
+    """Run the awaitables concurrently and yield the results in order.
+
+    At most `window` awaitables, `EXPORT_WORKERS` by default, are running or
+    holding their results at a time. The next awaitable is only taken from `aws`
+    when the oldest result is yielded, so the memory used doesn't depend on the
+    number of awaitables like with `asyncio.gather`.
+    """
+    window = max(window or settings.export_workers, 1)
+    aws_iter = iter(aws)
+    tasks = deque(asyncio.ensure_future(aw) for aw in islice(aws_iter, window))
+    try:
+        while tasks:
+            result = await tasks.popleft()
+            next_aw = next(aws_iter, None)
+            if next_aw is not None:
+                tasks.append(asyncio.ensure_future(next_aw))
+            yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+        for aw in aws_iter:
+            if inspect.iscoroutine(aw):
+                aw.close()
+
+
+GZIP_COMPRESS_LEVEL = 9
+# Quality 10 and 11 are a lot slower for the big export files
+BROTLI_QUALITY = 9
+COMPRESS_CHUNK_SIZE = 1024 * 1024
+
+
+def compress_gzip(in_path: Path, out_path: Path) -> None:  # pragma: no cover
+    with in_path.open("rb") as fin, gzip.open(
+        out_path, "wb", compresslevel=GZIP_COMPRESS_LEVEL
+    ) as fout:
+        shutil.copyfileobj(fin, fout, COMPRESS_CHUNK_SIZE)
+
+
+def compress_brotli(in_path: Path, out_path: Path) -> None:  # pragma: no cover
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    with in_path.open("rb") as fin, out_path.open("wb") as fout:
+        while chunk := fin.read(COMPRESS_CHUNK_SIZE):
+            fout.write(compressor.process(chunk))
+        fout.write(compressor.finish())
+
+
+def precompress_file(file_path: Path) -> None:  # pragma: no cover
+    """Write the `.gz` and, if brotli is installed, `.br` siblings of the file.
+
+    Siblings newer than the file are kept.
+    """
+    compressors: list[tuple[str, Callable[[Path, Path], None]]] = [
+        (".gz", compress_gzip)
+    ]
+    if brotli is not None:
+        compressors.append((".br", compress_brotli))
+
+    file_mtime = file_path.stat().st_mtime
+    for extension, compress in compressors:
+        out_path = file_path.with_name(file_path.name + extension)
+        if out_path.exists() and out_path.stat().st_mtime >= file_mtime:
+            continue
+        temp_path = get_temp_path(out_path)
+        compress(file_path, temp_path)
+        temp_path.replace(out_path)
+
+
+@cache
+def warn_missing_brotli() -> None:  # pragma: no cover
+    logger.warning(
+        "EXPORT_PRECOMPRESSED is set but the brotli package isn't installed, "
+        "only the .gz export files are generated. "
+        "Install the brotli extra to generate the .br files."
+    )
+
+
+async def precompress_export_files(export_path: Path) -> None:  # pragma: no cover
+    if brotli is None:
+        warn_missing_brotli()
+    await asyncio.gather(
+        *(
+            run_in_threadpool(precompress_file, file_path)
+            for file_path in export_path.glob("*.json")
+        )
+    )
+
+
 async def dump_normal(
     export_path: Path, file_name: str, data: Any
 ) -> None:  # pragma: no cover
-    async with aiofiles.open(export_path / f"{file_name}.json", "wb") as fp:
+    out_path = export_path / f"{file_name}.json"
+    temp_path = get_temp_path(out_path)
+    async with aiofiles.open(temp_path, "wb") as fp:
         await fp.write(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS))
+    temp_path.replace(out_path)
 
 
 async def dump_orjson(
-    export_path: Path, file_name: str, data: Iterable[BaseModelORJson]
+    export_path: Path,
+    file_name: str,
+    data: Union[Iterable[BaseModelORJson], AsyncIterable[BaseModelORJson]],
 ) -> None:  # pragma: no cover
-    async with aiofiles.open(
-        export_path / f"{file_name}.json", "w", encoding="utf-8"
-    ) as fp:
-        await fp.write(list_string(data))
+    async with JsonArrayWriter(export_path / f"{file_name}.json") as writer:
+        if isinstance(data, AsyncIterable):
+            async for item in data:
+                await writer.write_model(item)
+        else:
+            for item in data:
+                await writer.write_model(item)
+
+
+def get_export_file_name(file_name: str, lang: Language) -> str:
+    if lang == Language.en:
+        return file_name + "_lang_en"
+    return file_name
 
 
 @dataclass
@@ -93,16 +376,90 @@ class ExportUtil:
     lang: Language = Language.jp
 
     def append_file_name(self, file_name: str) -> str:  # pragma: no cover
-        if self.lang == Language.en:
-            return file_name + "_lang_en"
-        return file_name
+        return get_export_file_name(file_name, self.lang)
 
     async def dump_orjson(
-        self, file_name: str, data: Iterable[BaseModelORJson]
+        self,
+        file_name: str,
+        data: Union[Iterable[BaseModelORJson], AsyncIterable[BaseModelORJson]],
     ) -> None:  # pragma: no cover
         await dump_orjson(self.export_path, self.append_file_name(file_name), data)
 
 
+@dataclass
+class ExportScheduler:
+    """Run the exports of a region concurrently.
+
+    Each export gets its own connection and at most `workers` connections are used
+    at the same time.
+    """
+
+    engine: AsyncEngine
+    redis: Redis
+    region: Region
+    export_path: Path
+    workers: int
+    timings: dict[str, float] = field(default_factory=dict)
+    exports: list[Coroutine[Any, Any, None]] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self.semaphore = asyncio.Semaphore(max(self.workers, 1))
+
+    @asynccontextmanager
+    async def util(
+        self, lang: Language = Language.jp
+    ) -> AsyncIterator[ExportUtil]:  # pragma: no cover
+        async with self.semaphore, self.engine.connect() as conn, request_scope(conn):
+            await use_one_snapshot(conn)
+            yield ExportUtil(conn, self.redis, self.region, self.export_path, lang)
+
+    def add(
+        self,
+        file_name: str,
+        export: Callable[[ExportUtil], Awaitable[None]],
+        lang: Language = Language.jp,
+    ) -> None:  # pragma: no cover
+        async def run_export() -> None:
+            start_time = time.perf_counter()
+            async with self.util(lang) as util:
+                await export(util)
+            self.timings[util.append_file_name(file_name)] = (
+                time.perf_counter() - start_time
+            )
+
+        self.exports.append(run_export())
+
+    def add_items(
+        self,
+        file_name: str,
+        export: Callable[["ExportScheduler"], Awaitable[None]],
+        lang: Language = Language.jp,
+    ) -> None:  # pragma: no cover
+        """Add an export that gets connections from the scheduler for each item."""
+
+        async def run_export() -> None:
+            start_time = time.perf_counter()
+            await export(self)
+            self.timings[get_export_file_name(file_name, lang)] = (
+                time.perf_counter() - start_time
+            )
+
+        self.exports.append(run_export())
+
+    async def run(self) -> None:  # pragma: no cover
+        exports, self.exports = self.exports, []
+        await asyncio.gather(*exports)
+
+    def log_timings(self) -> None:  # pragma: no cover
+        timings = sorted(self.timings.items(), key=lambda x: x[1], reverse=True)
+        logger.info(
+            f"{self.region} export times: "
+            + ", ".join(
+                f"{file_name} {run_time:.2f}s" for file_name, run_time in timings
+            )
+        )
+
+
 async def get_nice_svt(
     conn: AsyncConnection,
     region: Region,
@@ -130,54 +487,154 @@ async def get_nice_svt(
         )
 
 
+@dataclass
+class NiceSvtJson:
+    lore: str
+    no_lore: str
+    lore_en: str = ""
+    no_lore_en: str = ""
+
+
+async def render_nice_svt(
+    conn: AsyncConnection, region: Region, raw_svt: ServantEntity
+) -> NiceSvtJson:  # pragma: no cover
+    nice_svt = await get_nice_svt(conn, region, Language.jp, True, raw_svt)
+    svt_json = NiceSvtJson(
+        lore=nice_svt.json(exclude_unset=True, exclude_none=True),
+        no_lore=nice_svt.json(
+            exclude={"profile"}, exclude_unset=True, exclude_none=True
+        ),
+    )
+
+    if region == Region.JP:
+        nice_svt_en = await get_nice_svt(conn, region, Language.en, True, raw_svt)
+        svt_json.lore_en = nice_svt_en.json(exclude_unset=True, exclude_none=True)
+        svt_json.no_lore_en = nice_svt_en.json(
+            exclude={"profile"}, exclude_unset=True, exclude_none=True
+        )
+
+    return svt_json
+
+
+async def write_nice_svts(
+    export_path: Path,
+    region: Region,
+    file_name: str,
+    svt_jsons: AsyncIterable[NiceSvtJson],
+) -> None:  # pragma: no cover
+    out_files = {f"{file_name}_lore": "lore", file_name: "no_lore"}
+    if region == Region.JP:
+        out_files |= {
+            f"{file_name}_lore_lang_en": "lore_en",
+            f"{file_name}_lang_en": "no_lore_en",
+        }
+
+    async with AsyncExitStack() as stack:
+        writers = [
+            (
+                await stack.enter_async_context(
+                    JsonArrayWriter(export_path / f"{out_name}.json")
+                ),
+                attrgetter(attr),
+            )
+            for out_name, attr in out_files.items()
+        ]
+        async for svt_json in svt_jsons:
+            for writer, get_json in writers:
+                await writer.write(get_json(svt_json))
+
+
 async def dump_svt(
     util: ExportUtil, file_name: str, svts: list[MstSvt]
 ) -> None:  # pragma: no cover
-    conn = util.conn
-    region = util.region
-    export_path = util.export_path
-
-    with_lore: list[str] = []
-    without_lore: list[str] = []
-    with_lore_en: list[str] = []
-    without_lore_en: list[str] = []
-
-    for svt in svts:
-        raw_svt = await get_servant_entity(
-            conn, svt.id, expand=True, lore=True, mstSvt=svt
-        )
+    async def render_svts() -> AsyncIterator[NiceSvtJson]:
+        for svt in svts:
+            raw_svt = await get_servant_entity(
+                util.conn, svt.id, expand=True, lore=True, mstSvt=svt
+            )
+            yield await render_nice_svt(util.conn, util.region, raw_svt)
 
-        nice_svt = await get_nice_svt(conn, region, Language.jp, True, raw_svt)
-        with_lore.append(nice_svt.json(exclude_unset=True, exclude_none=True))
-        without_lore.append(
-            nice_svt.json(exclude={"profile"}, exclude_unset=True, exclude_none=True)
-        )
+    await write_nice_svts(util.export_path, util.region, file_name, render_svts())
 
-        if region == Region.JP:
-            nice_svt_en = await get_nice_svt(conn, region, Language.en, True, raw_svt)
-            with_lore_en.append(nice_svt_en.json(exclude_unset=True, exclude_none=True))
-            without_lore_en.append(
-                nice_svt_en.json(
-                    exclude={"profile"}, exclude_unset=True, exclude_none=True
-                )
+
+SVT_RENDER_CHUNK_SIZE = 20
+# Event loop of a svt render worker process. It's kept between tasks because
+# the connections in the worker's engine pool are tied to it.
+svt_render_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def init_svt_render_worker() -> None:  # pragma: no cover
+    global svt_render_loop
+    svt_render_loop = asyncio.new_event_loop()
+
+
+def render_nice_svts(
+    region: Region, raw_svts: list[ServantEntity]
+) -> list[NiceSvtJson]:  # pragma: no cover
+    """Render the nice svts in a svt render worker process.
+
+    The workers are spawned so `async_engines` here doesn't share any connection
+    with the main process.
+    """
+
+    async def render_all() -> list[NiceSvtJson]:
+        async with async_engines[region].connect() as conn, request_scope(conn):
+            await use_one_snapshot(conn)
+            return [
+                await render_nice_svt(conn, region, raw_svt) for raw_svt in raw_svts
+            ]
+
+    if svt_render_loop is None:
+        init_svt_render_worker()
+    return svt_render_loop.run_until_complete(render_all())  # type: ignore[union-attr]
+
+
+@contextmanager
+def get_svt_render_pool() -> Iterator[Optional[ProcessPoolExecutor]]:
+    if settings.export_svt_processes <= 0:
+        yield None
+        return
+
+    with ProcessPoolExecutor(
+        settings.export_svt_processes,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_svt_render_worker,
+    ) as pool:
+        yield pool
+
+
+async def dump_svt_process_pool(
+    scheduler: ExportScheduler,
+    pool: ProcessPoolExecutor,
+    file_name: str,
+    svts: list[MstSvt],
+) -> None:  # pragma: no cover
+    async def get_raw_svt(svt: MstSvt) -> ServantEntity:
+        async with scheduler.util() as util:
+            return await get_servant_entity(
+                util.conn, svt.id, expand=True, lore=True, mstSvt=svt
             )
 
-    out_name = export_path / f"{file_name}.json"
-    out_lore_name = export_path / f"{file_name}_lore.json"
+    loop = asyncio.get_running_loop()
 
-    async with aiofiles.open(out_lore_name, "w", encoding="utf-8") as fp:
-        await fp.write("[" + ",".join(with_lore) + "]")
-    async with aiofiles.open(out_name, "w", encoding="utf-8") as fp:
-        await fp.write("[" + ",".join(without_lore) + "]")
+    async def render_chunk(chunk: list[MstSvt]) -> list[NiceSvtJson]:
+        raw_svts = await asyncio.gather(*(get_raw_svt(svt) for svt in chunk))
+        return await loop.run_in_executor(
+            pool, render_nice_svts, scheduler.region, raw_svts
+        )
 
-    if region == Region.JP:
-        out_name_en = export_path / f"{file_name}_lang_en.json"
-        out_lore_name_en = export_path / f"{file_name}_lore_lang_en.json"
+    async def render_svts() -> AsyncIterator[NiceSvtJson]:
+        chunks = (
+            render_chunk(svts[i : i + SVT_RENDER_CHUNK_SIZE])
+            for i in range(0, len(svts), SVT_RENDER_CHUNK_SIZE)
+        )
+        async for chunk in iter_in_order(chunks, settings.export_svt_processes):
+            for svt_json in chunk:
+                yield svt_json
 
-        async with aiofiles.open(out_lore_name_en, "w", encoding="utf-8") as fp:
-            await fp.write("[" + ",".join(with_lore_en) + "]")
-        async with aiofiles.open(out_name_en, "w", encoding="utf-8") as fp:
-            await fp.write("[" + ",".join(without_lore_en) + "]")
+    await write_nice_svts(
+        scheduler.export_path, scheduler.region, file_name, render_svts()
+    )
 
 
 async def dump_nice_items(
@@ -225,22 +682,31 @@ async def dump_nice_mms(
 
 
 async def dump_nice_wars(
-    util: ExportUtil, wars: list[MstWar]
+    scheduler: ExportScheduler, lang: Language, wars: list[MstWar]
 ) -> None:  # pragma: no cover
-    all_war_data = [
-        await get_nice_war(util.conn, util.region, war.id, util.lang) for war in wars
-    ]
-    await util.dump_orjson("nice_war", all_war_data)
+    async def get_war(war_id: int) -> NiceWar:
+        async with scheduler.util(lang) as util:
+            return await get_nice_war(util.conn, util.region, war_id, lang)
+
+    await dump_orjson(
+        scheduler.export_path,
+        get_export_file_name("nice_war", lang),
+        iter_in_order(get_war(war.id) for war in wars),
+    )
 
 
 async def dump_nice_events(
-    util: ExportUtil, events: list[MstEvent]
+    scheduler: ExportScheduler, lang: Language, events: list[MstEvent]
 ) -> None:  # pragma: no cover
-    all_event_data = [
-        await get_nice_event(util.conn, util.region, event.id, util.lang)
-        for event in events
-    ]
-    await util.dump_orjson("nice_event", all_event_data)
+    async def get_event(event_id: int) -> NiceEvent:
+        async with scheduler.util(lang) as util:
+            return await get_nice_event(util.conn, util.region, event_id, lang)
+
+    await dump_orjson(
+        scheduler.export_path,
+        get_export_file_name("nice_event", lang),
+        iter_in_order(get_event(event.id) for event in events),
+    )
 
 
 async def dump_nice_shops(
@@ -332,100 +798,256 @@ async def generate_exports(
     redis: Redis,
     region_path: dict[Region, DirectoryPath],
     async_engines: dict[Region, AsyncEngine],
+    changed_files: Optional[ChangedFiles] = None,
 ) -> None:  # pragma: no cover
     if settings.export_all_nice:
-        for region in region_path:
-            start_time = time.perf_counter()
-            export_path = project_root / "export" / region.value
-
-            async with async_engines[region].connect() as conn:
+        with get_svt_render_pool() as svt_render_pool:
+            for region in region_path:
+                if not is_changed(changed_files, region, ["*"]):
+                    logger.info(f"No {region} data changes, skipping exports.")
+                    continue
+
+                start_time = time.perf_counter()
+                export_path = project_root / "export" / region.value
                 logger.info(f"Exporting {region} data …")
 
-                util = ExportUtil(conn, redis, region, export_path)
+                async with async_engines[region].connect() as conn:
+                    all_svts = await fetch.get_everything(conn, MstSvt)
+                    all_equips = await get_all_equips(conn)
+                    mstCcs = await fetch.get_everything(conn, MstCommandCode)
+                    mstWars = await fetch.get_everything(conn, MstWar)
+                    mstEvents = await fetch.get_everything(conn, MstEvent)
+                    mstEquips = await fetch.get_everything(conn, MstEquip)
+                    mstIllustrators = await fetch.get_everything(conn, MstIllustrator)
+                    mstCvs = await fetch.get_everything(conn, MstCv)
+                    bgms = await get_all_bgm_entities(conn)
+                    mstItems = await fetch.get_everything(conn, MstItem)
+                    mstMasterMissions = await fetch.get_everything(
+                        conn, MstMasterMission
+                    )
+                    mstShops = await fetch.get_all(conn, MstShop, 0)
+                    mstEnemyMasters = await fetch.get_everything(conn, MstEnemyMaster)
+                    asset_storage = await fetch.get_everything(conn, AssetStorageLine)
 
-                all_svts = await fetch.get_everything(conn, MstSvt)
                 all_servants = [
                     svt for svt in all_svts if svt.collectionNo != 0 and svt.isServant()
                 ]
-                await dump_basic_servants(util, "basic_servant", all_servants)
-
-                all_equips = await get_all_equips(conn)
-                await dump_basic_equips(util, all_equips)
-
-                mstCcs = await fetch.get_everything(conn, MstCommandCode)
-                await dump_basic_ccs(util, mstCcs)
-
-                mstWars = await fetch.get_everything(conn, MstWar)
-                await dump_basic_wars(util, mstWars)
-
-                mstEvents = await fetch.get_everything(conn, MstEvent)
-                await dump_basic_events(util, mstEvents)
-
-                mstEquips = await fetch.get_everything(conn, MstEquip)
-                await dump_basic_mcs(util, mstEquips)
 
                 await dump_normal(export_path, "nice_trait", TRAIT_NAME)
                 await dump_normal(export_path, "nice_enums", ALL_ENUMS)
 
-                mstIllustrators = await fetch.get_everything(conn, MstIllustrator)
-                await dump_illustrators(util, mstIllustrators)
-
-                mstCvs = await fetch.get_everything(conn, MstCv)
-                await dump_cvs(util, mstCvs)
-
-                bgms = await get_all_bgm_entities(conn)
-                mstItems = await fetch.get_everything(conn, MstItem)
-                mstMasterMissions = await fetch.get_everything(conn, MstMasterMission)
-                mstShops = await fetch.get_all(conn, MstShop, 0)
-                mstEnemyMasters = await fetch.get_everything(conn, MstEnemyMaster)
-
-                asset_storage = await fetch.get_everything(conn, AssetStorageLine)
-                await util.dump_orjson("asset_storage", asset_storage)
-
-                await dump_basic_servants(util, "basic_svt", all_svts)
-
-                await dump_nice_items(util, mstItems)
-                await dump_nice_mcs(util, mstEquips)
-                await dump_nice_ccs(util, mstCcs)
-                await dump_nice_mms(util, mstMasterMissions)
-                await dump_nice_bgms(util, bgms)
-                await dump_nice_shops(util, mstShops)
-                await dump_nice_enemy_masters(util, mstEnemyMasters)
-
-                util_en = ExportUtil(conn, redis, region, export_path, Language.en)
-                if region == Region.JP:
-                    await dump_basic_servants(util_en, "basic_servant", all_servants)
-                    await dump_basic_equips(util_en, all_equips)
-                    await dump_basic_ccs(util_en, mstCcs)
-                    await dump_basic_wars(util_en, mstWars)
-                    await dump_basic_events(util_en, mstEvents)
-                    await dump_basic_mcs(util_en, mstEquips)
-
-                    await dump_illustrators(util_en, mstIllustrators)
-                    await dump_cvs(util_en, mstCvs)
+                scheduler = ExportScheduler(
+                    async_engines[region],
+                    redis,
+                    region,
+                    export_path,
+                    settings.export_workers,
+                )
 
-                    await dump_basic_servants(util_en, "basic_svt", all_svts)
-                    await dump_nice_items(util_en, mstItems)
-                    await dump_nice_mcs(util_en, mstEquips)
-                    await dump_nice_ccs(util_en, mstCcs)
-                    await dump_nice_bgms(util_en, bgms)
+                # The nice servant exports take the longest so they are started first
+                if svt_render_pool is not None and is_changed(
+                    changed_files, region, SVT_EXPORT_DEPENDENCIES
+                ):
+                    for file_name, svts in (
+                        ("nice_servant", all_servants),
+                        ("nice_equip", all_equips),
+                    ):
+                        scheduler.add_items(
+                            file_name,
+                            partial(
+                                dump_svt_process_pool,
+                                pool=svt_render_pool,
+                                file_name=file_name,
+                                svts=svts,
+                            ),
+                        )
+                elif is_changed(changed_files, region, SVT_EXPORT_DEPENDENCIES):
+                    scheduler.add(
+                        "nice_servant",
+                        partial(dump_svt, file_name="nice_servant", svts=all_servants),
+                    )
+                    scheduler.add(
+                        "nice_equip",
+                        partial(dump_svt, file_name="nice_equip", svts=all_equips),
+                    )
+
+                langs = (
+                    [Language.jp, Language.en] if region == Region.JP else [Language.jp]
+                )
 
-                await dump_svt(util, "nice_servant", all_servants)
-                await dump_svt(util, "nice_equip", all_equips)
+                if is_changed(changed_files, region, WAR_EVENT_EXPORT_DEPENDENCIES):
+                    for lang in langs:
+                        scheduler.add_items(
+                            "nice_war",
+                            partial(dump_nice_wars, lang=lang, wars=mstWars),
+                            lang,
+                        )
+                        scheduler.add_items(
+                            "nice_event",
+                            partial(dump_nice_events, lang=lang, events=mstEvents),
+                            lang,
+                        )
+
+                scheduler.add(
+                    "asset_storage",
+                    partial(
+                        ExportUtil.dump_orjson,
+                        file_name="asset_storage",
+                        data=asset_storage,
+                    ),
+                )
+                scheduler.add(
+                    "nice_master_mission", partial(dump_nice_mms, mms=mstMasterMissions)
+                )
+                scheduler.add("nice_shop", partial(dump_nice_shops, shops=mstShops))
+                scheduler.add(
+                    "nice_enemy_master",
+                    partial(dump_nice_enemy_masters, mcs=mstEnemyMasters),
+                )
 
-                await dump_nice_wars(util, mstWars)
-                await dump_nice_events(util, mstEvents)
+                for lang in langs:
+                    scheduler.add(
+                        "basic_servant",
+                        partial(
+                            dump_basic_servants,
+                            file_name="basic_servant",
+                            svts=all_servants,
+                        ),
+                        lang,
+                    )
+                    scheduler.add(
+                        "basic_svt",
+                        partial(
+                            dump_basic_servants, file_name="basic_svt", svts=all_svts
+                        ),
+                        lang,
+                    )
+                    scheduler.add(
+                        "basic_equip",
+                        partial(dump_basic_equips, equips=all_equips),
+                        lang,
+                    )
+                    scheduler.add(
+                        "basic_command_code", partial(dump_basic_ccs, ccs=mstCcs), lang
+                    )
+                    scheduler.add(
+                        "basic_war", partial(dump_basic_wars, wars=mstWars), lang
+                    )
+                    scheduler.add(
+                        "basic_event",
+                        partial(dump_basic_events, events=mstEvents),
+                        lang,
+                    )
+                    scheduler.add(
+                        "basic_mystic_code",
+                        partial(dump_basic_mcs, mcs=mstEquips),
+                        lang,
+                    )
+                    scheduler.add(
+                        "nice_illustrator",
+                        partial(dump_illustrators, illustrators=mstIllustrators),
+                        lang,
+                    )
+                    scheduler.add("nice_cv", partial(dump_cvs, cvs=mstCvs), lang)
+                    scheduler.add(
+                        "nice_item", partial(dump_nice_items, items=mstItems), lang
+                    )
+                    scheduler.add(
+                        "nice_mystic_code", partial(dump_nice_mcs, mcs=mstEquips), lang
+                    )
+                    scheduler.add(
+                        "nice_command_code", partial(dump_nice_ccs, ccs=mstCcs), lang
+                    )
+                    scheduler.add("nice_bgm", partial(dump_nice_bgms, bgms=bgms), lang)
+
+                await scheduler.run()
+                scheduler.log_timings()
+
+                repo_info = await get_repo_version(redis, region)
+                if repo_info is not None:
+                    await dump_normal(export_path, "info", repo_info.dict())
+
+                if settings.export_precompressed:
+                    compress_start_time = time.perf_counter()
+                    await precompress_export_files(export_path)
+                    compress_time = time.perf_counter() - compress_start_time
+                    logger.info(f"Compressed {region} exports in {compress_time:.2f}s.")
+
+                run_time = time.perf_counter() - start_time
+                logger.info(f"Exported {region} data in {run_time:.2f}s.")
+
+
+def get_repo_hash(gamedata: DirectoryPath) -> Optional[str]:
+    if (gamedata / ".git").exists():
+        commit_hash: str = Repo(gamedata).commit().hexsha
+        return commit_hash
+    return None
+
+
+@cache
+def get_app_version() -> str:
+    """Hash of the app's code and mapping files.
+
+    The exports and some of the loaded data depend on the code so a deploy with
+    a different app version reloads everything.
+    """
+    app_folder = project_root / "app"
+    hasher = hashlib.blake2b(digest_size=16)
+    for file_path in sorted(app_folder.rglob("*")):
+        if file_path.is_file() and "__pycache__" not in file_path.parts:
+            hasher.update(file_path.relative_to(app_folder).as_posix().encode())
+            hasher.update(file_path.read_bytes())
+    return hasher.hexdigest()
+
+
+def get_load_options() -> dict[str, Any]:
+    """Settings that change what `load_and_export` writes"""
+    return {
+        "write_postgres_data": settings.write_postgres_data,
+        "write_redis_data": settings.write_redis_data,
+        "export_all_nice": settings.export_all_nice,
+        "export_precompressed": settings.export_precompressed,
+        "master_snapshot": settings.master_snapshot,
+        "asset_url": settings.asset_url,
+    }
+
+
+def get_current_load_manifest(
+    region_path: dict[Region, DirectoryPath]
+) -> Optional[LoadManifest]:
+    """The manifest of loading the current gamedata, None if a gamedata folder
+    is not a git repo so whether it changed can't be known."""
+    repo_hashes: dict[Region, str] = {}
+    for region, gamedata in region_path.items():
+        repo_hash = get_repo_hash(gamedata)
+        if repo_hash is None:
+            return None
+        repo_hashes[region] = repo_hash
+    return LoadManifest(
+        repo_hashes=repo_hashes,
+        app_version=get_app_version(),
+        options=get_load_options(),
+    )
 
-                if region == Region.JP:
-                    await dump_nice_wars(util_en, mstWars)
-                    await dump_nice_events(util_en, mstEvents)
 
+async def is_already_loaded(
+    redis: Redis, region_path: dict[Region, DirectoryPath], manifest: LoadManifest
+) -> bool:  # pragma: no cover
+    if await get_load_manifest(redis) != manifest:
+        return False
+    for region in region_path:
+        if settings.write_redis_data:
             repo_info = await get_repo_version(redis, region)
-            if repo_info is not None:
-                await dump_normal(export_path, "info", repo_info.dict())
-
-            run_time = time.perf_counter() - start_time
-            logger.info(f"Exported {region} data in {run_time:.2f}s.")
+            if repo_info is None or not manifest.repo_hashes[region].startswith(
+                repo_info.hash
+            ):
+                return False
+        if settings.export_all_nice:
+            if not (project_root / "export" / region.value / "info.json").exists():
+                return False
+        if settings.master_snapshot and not get_snapshot_path(region).exists():
+            return False
+    return True
 
 
 async def update_master_repo_info(
@@ -445,28 +1067,40 @@ async def update_master_repo_info(
 async def clear_redis_cache(
     redis: Redis, region_path: dict[Region, DirectoryPath]
 ) -> None:  # pragma: no cover
-    key_count = 0
+    # Responses not specific to a region are cached under the empty region
+    regions = [*(region.value for region in region_path), ""]
+    generations = await bump_cache_generations(redis, regions)
+    await bump_data_version(redis)
 
-    for region in region_path:
-        key_pattern = f"{settings.redis_prefix}:cache:{region.value}*"
-        async for key in redis.scan_iter(match=key_pattern):
-            await redis.delete(key)
-            key_count += 1
+    logger.info(f"Bumped the cache generations to {generations}.")
 
-    async for key in redis.scan_iter(match=f"{settings.redis_prefix}:cache::*"):
-        await redis.delete(key)
-        key_count += 1
+    run_in_background(unlink_old_cache_keys(redis, generations))
 
-    logger.info(f"Cleared {key_count} cache redis keys.")
+
+async def unlink_old_cache_keys(
+    redis: Redis, generations: dict[str, int]
+) -> None:  # pragma: no cover
+    try:
+        key_count = await unlink_old_cache_generations(
+            redis, f"{settings.redis_prefix}:cache", generations
+        )
+    except Exception:
+        logger.exception("Failed to delete the old cache keys.")
+    else:
+        logger.info(f"Deleted {key_count} old cache redis keys.")
 
 
 async def load_svt_extra(
-    redis: Redis, region_path: dict[Region, DirectoryPath]
+    redis: Redis,
+    region_path: dict[Region, DirectoryPath],
+    changed_files: Optional[ChangedFiles] = None,
 ) -> None:  # pragma: no cover
     logger.info("Loading extra svt data …")
     start_loading_time = time.perf_counter()
 
     for region, gamedata_path in region_path.items():
+        if not is_changed(changed_files, region, EXTRA_SVT_DEPENDENCIES):
+            continue
         svtExtras = get_extra_svt_data(region, gamedata_path)
         if settings.write_postgres_data:
             with engines[region].begin() as conn:
@@ -483,24 +1117,62 @@ async def load_and_export(
     region_path: dict[Region, DirectoryPath],
     async_engines: dict[Region, AsyncEngine],
     enable_webhook: bool,
+    changed_files: Optional[ChangedFiles] = None,
 ) -> None:  # pragma: no cover
+    """Load the gamedata into the db and redis and generate the export files.
+
+    If `changed_files` is given, only the data depending on the changed files of
+    the given regions is reloaded. Regions not in it are fully reloaded.
+    """
+    # A load that doesn't finish shouldn't be skipped by the next startup
+    await delete_load_manifest(redis)
+
     if settings.write_postgres_data:
-        update_db(region_path)
+        # In a thread so the event loop keeps running, e.g. to renew the load lock
+        await run_in_threadpool(update_db, region_path, changed_files)
     if settings.write_redis_data:
-        await load_redis_data(redis, region_path)
+        await load_redis_data(redis, region_path, changed_files)
         await update_master_repo_info(redis, region_path)
+        await bump_master_data_version(redis)
     if settings.write_postgres_data or settings.write_redis_data:
-        await load_svt_extra(redis, region_path)
+        await load_svt_extra(redis, region_path, changed_files)
+        if settings.master_snapshot:
+            await write_master_snapshots(redis, region_path)
         if enable_webhook:
             await report_webhooks(region_path, "load")
+            await publish_update_event(redis, region_path, "load")
 
     if settings.clear_redis_cache:
         await clear_redis_cache(redis, region_path)
+        if settings.cache_warmer_size > 0:
+            run_in_background(warm_cache(redis))
 
     if settings.export_all_nice:
-        await generate_exports(redis, region_path, async_engines)
+        await generate_exports(redis, region_path, async_engines, changed_files)
         if enable_webhook:
             await report_webhooks(region_path, "export")
+            await publish_update_event(redis, region_path, "export")
+
+    manifest = get_current_load_manifest(region_path)
+    if manifest is not None:
+        await set_load_manifest(redis, manifest)
+
+
+async def load_and_export_if_changed(
+    redis: Redis,
+    region_path: dict[Region, DirectoryPath],
+    async_engines: dict[Region, AsyncEngine],
+) -> None:  # pragma: no cover
+    """`load_and_export` unless `SKIP_UNCHANGED_LOAD` is set and the gamedata,
+    the app and the load settings are the same as the last completed load."""
+    if settings.skip_unchanged_load:
+        manifest = get_current_load_manifest(region_path)
+        if manifest is not None and await is_already_loaded(
+            redis, region_path, manifest
+        ):
+            logger.info("Gamedata unchanged since the last load, skipping it.")
+            return
+    await load_and_export(redis, region_path, async_engines, False)
 
 
 def update_data_repo(
@@ -515,6 +1187,52 @@ def update_data_repo(
                     logger.info(f"Updated {fetch_info.ref} to {commit_hash}")
 
 
+async def get_changed_files(
+    redis: Redis, region_path: dict[Region, DirectoryPath]
+) -> ChangedFiles:  # pragma: no cover
+    """Diff the commit of each gamedata repo loaded by the last completed load with
+    the current commit.
+
+    The full commit hashes are taken from the load manifest. Regions without a
+    loaded commit or a git repo are left out so they are fully reloaded, as are
+    all the regions if the app or the load options changed since that load.
+    """
+    changed_files: ChangedFiles = {}
+    manifest = await get_load_manifest(redis)
+    if manifest is None:
+        return changed_files
+    if (
+        manifest.app_version != get_app_version()
+        or manifest.options != get_load_options()
+    ):
+        logger.info("The app changed since the last load, reloading everything.")
+        return changed_files
+
+    for region, gamedata in region_path.items():
+        loaded_hash = manifest.repo_hashes.get(region)
+        if loaded_hash is None or not (gamedata / ".git").exists():
+            continue
+
+        repo = Repo(gamedata)
+        try:
+            loaded_commit = repo.commit(loaded_hash)
+        except (BadName, ValueError):
+            logger.warning(f"Can't find the loaded {region} commit {loaded_hash}")
+            continue
+
+        changed_paths: set[str] = set()
+        for diff in loaded_commit.diff(repo.commit()):
+            changed_paths.update(path for path in (diff.a_path, diff.b_path) if path)
+        changed_files[region] = get_changed_file_names(changed_paths)
+
+        logger.info(
+            f"Found {len(changed_files[region])} changed {region} files since "
+            f"{loaded_hash[:6]}: {', '.join(sorted(changed_files[region])[:20])}"
+        )
+
+    return changed_files
+
+
 async def report_webhooks(
     region_path: dict[Region, DirectoryPath],
     event: str,
@@ -535,4 +1253,9 @@ async def pull_and_update(
     redis: Redis,
 ) -> None:  # pragma: no cover
     await run_in_threadpool(lambda: update_data_repo(region_path))
-    await load_and_export(redis, region_path, async_engines, True)
+    changed_files = (
+        await get_changed_files(redis, region_path)
+        if settings.incremental_data_update
+        else None
+    )
+    await load_and_export(redis, region_path, async_engines, True, changed_files)
@@ -0,0 +1,68 @@
+"""Run the gamedata updates queued by the `/update` webhook.
+
+Start it with `python -m app.worker` next to the API server when
+`UPDATE_WORKER` is set so the updates don't slow down the API workers.
+"""
+import asyncio
+
+from .config import Settings, logger
+from .db.engine import async_engines
+
+# The cached functions are registered for the cache warmer when the routers are
+# imported
+from .main import init_cache
+from .redis import Redis
+from .redis.helpers.update_queue import (
+    ack_update_job,
+    create_update_group,
+    get_consumer_name,
+    publish_update_event,
+    read_update_job,
+)
+from .tasks import pull_and_update
+
+
+settings = Settings()
+
+
+UPDATE_JOB_BLOCK_MS = 5000
+
+
+async def main() -> None:  # pragma: no cover
+    redis: Redis = await Redis.from_url(settings.redisdsn)
+    # For the cache warmer that runs after the updates. The worker doesn't serve
+    # the cached responses so it doesn't need a local cache.
+    await init_cache(redis, 0)
+    await create_update_group(redis)
+    consumer = get_consumer_name()
+    logger.info(f"Update worker {consumer} waiting for update jobs …")
+
+    try:
+        while True:
+            job = await read_update_job(redis, consumer, UPDATE_JOB_BLOCK_MS)
+            if job is None:
+                continue
+            job_id, regions = job
+            region_path = {
+                region: settings.data[region].gamedata
+                for region in regions
+                if region in settings.data
+            }
+            logger.info(f"Updating {', '.join(regions)} for job {job_id} …")
+            await publish_update_event(redis, regions, "started", job_id)
+            try:
+                await pull_and_update(region_path, async_engines, redis)
+            except Exception:
+                logger.exception(f"Failed update job {job_id}")
+                await publish_update_event(redis, regions, "failed", job_id)
+            else:
+                await publish_update_event(redis, regions, "completed", job_id)
+            await ack_update_job(redis, job_id)
+    finally:
+        await redis.close()
+        for engine in async_engines.values():
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+import argparse
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from sqlalchemy import Table
+from sqlalchemy.engine import Connection
+
+from app.db.engine import engines
+from app.db.load import copy_db, read_master_table, recreate_table
+from app.models.raw import TABLES_TO_BE_LOADED
+from app.schemas.common import Region
+
+
+def executemany_db(conn: Connection, table: Table, db_data: Any) -> None:
+    conn.execute(table.insert(), db_data)
+
+
+def run_benchmark(
+    region: Region,
+    tables: list[tuple[Table, list[dict[str, Any]]]],
+    load_func: Callable[[Connection, Table, Any], None],
+) -> float:
+    """Load all tables in a transaction that is rolled back and return the run time."""
+    with engines[region].connect() as conn:
+        transaction = conn.begin()
+        try:
+            start_time = time.perf_counter()
+            for table, db_data in tables:
+                recreate_table(conn, table)
+                load_func(conn, table, db_data)
+            return time.perf_counter() - start_time
+        finally:
+            transaction.rollback()
+
+
+def main(region: Region, gamedata: Path, repeat: int) -> None:
+    master_folder = gamedata / "master"
+    tables = [
+        (table, read_master_table(master_folder, table))
+        for table_group in TABLES_TO_BE_LOADED
+        for table in table_group
+        if (master_folder / f"{table.name}.json").exists()
+    ]
+    row_count = sum(len(db_data) for _, db_data in tables)
+    print(f"Loading {len(tables)} tables, {row_count} rows from {master_folder}")
+
+    for name, load_func in (("executemany", executemany_db), ("COPY", copy_db)):
+        run_times = [run_benchmark(region, tables, load_func) for _ in range(repeat)]
+        print(
+            f"{name}: best {min(run_times):.3f}s, "
+            f"average {sum(run_times) / len(run_times):.3f}s over {repeat} runs"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare executemany and COPY loading of the master data."
+        " The tables are loaded in transactions that are rolled back."
+    )
+    parser.add_argument(
+        "--region",
+        "-r",
+        help="Region whose db is used for the benchmark",
+        type=Region,
+        default=Region.NA,
+    )
+    parser.add_argument(
+        "--gamedata",
+        "-g",
+        help="Gamedata folder to load",
+        type=Path,
+        default=Path(__file__).resolve().parents[1] / "tests" / "test_data_gamedata",
+    )
+    parser.add_argument(
+        "--repeat", "-n", help="Number of runs per backend", type=int, default=5
+    )
+
+    args = parser.parse_args()
+
+    main(args.region, args.gamedata, args.repeat)
@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import time
+from typing import Type
+
+from app.db.engine import async_engines
+from app.db.helpers import fetch, utils
+from app.schemas.base import BaseModelORJson
+from app.schemas.common import Region
+from app.schemas.raw import (
+    AssetStorageLine,
+    MstCommandCode,
+    MstCv,
+    MstEnemyMaster,
+    MstEquip,
+    MstEvent,
+    MstIllustrator,
+    MstItem,
+    MstMasterMission,
+    MstSvt,
+    MstWar,
+)
+
+
+EXPORT_SCHEMAS: list[Type[BaseModelORJson]] = [
+    MstSvt,
+    MstCommandCode,
+    MstWar,
+    MstEvent,
+    MstEquip,
+    MstIllustrator,
+    MstCv,
+    MstItem,
+    MstMasterMission,
+    MstEnemyMaster,
+    AssetStorageLine,
+]
+
+
+async def main(region: Region, repeat: int) -> None:
+    async with async_engines[region].connect() as conn:
+        for validate_db_rows in (True, False):
+            utils.settings.validate_db_rows = validate_db_rows
+            run_times: list[float] = []
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                for schema in EXPORT_SCHEMAS:
+                    await fetch.get_everything(conn, schema)
+                run_times.append(time.perf_counter() - start_time)
+            print(
+                f"validate_db_rows={validate_db_rows}: best {min(run_times):.3f}s, "
+                f"average {sum(run_times) / len(run_times):.3f}s over {repeat} runs"
+            )
+
+        utils.settings.validate_db_rows = True
+        validated = [await fetch.get_everything(conn, s) for s in EXPORT_SCHEMAS]
+        utils.settings.validate_db_rows = False
+        trusted = [await fetch.get_everything(conn, s) for s in EXPORT_SCHEMAS]
+        for schema, validated_rows, trusted_rows in zip(
+            EXPORT_SCHEMAS, validated, trusted, strict=True
+        ):
+            if validated_rows != trusted_rows:
+                print(f"Different {schema.__name__} rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare fetching the tables read by the export pipeline with"
+        " and without validating the db rows."
+    )
+    parser.add_argument(
+        "--region",
+        "-r",
+        help="Region whose db is used for the benchmark",
+        type=Region,
+        default=Region.NA,
+    )
+    parser.add_argument(
+        "--repeat", "-n", help="Number of runs per benchmark", type=int, default=5
+    )
+
+    args = parser.parse_args()
+
+    asyncio.run(main(args.region, args.repeat))
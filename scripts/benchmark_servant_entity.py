@@ -0,0 +1,159 @@
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.raw import get_servant_entity
+from app.db.engine import async_engines
+from app.db.helpers import fetch, skill, td
+from app.db.helpers.svt import SvtEntityTables, get_svt_entity_tables
+from app.schemas.common import Region
+from app.schemas.raw import (
+    MstCombineAppendPassiveSkill,
+    MstCombineCostume,
+    MstCombineLimit,
+    MstCombineMaterial,
+    MstCombineSkill,
+    MstFriendship,
+    MstSvt,
+    MstSvtAdd,
+    MstSvtAppendPassiveSkill,
+    MstSvtAppendPassiveSkillUnlock,
+    MstSvtCard,
+    MstSvtCardAdd,
+    MstSvtChange,
+    MstSvtCoin,
+    MstSvtCostume,
+    MstSvtExp,
+    MstSvtExtra,
+    MstSvtIndividuality,
+    MstSvtLimit,
+    MstSvtLimitAdd,
+    MstSvtLimitImage,
+    MstSvtMultiPortrait,
+    MstSvtPassiveSkill,
+)
+
+
+async def get_svt_entity_tables_sequential(
+    conn: AsyncConnection, svt_id: int
+) -> SvtEntityTables:
+    """The servant entity tables fetched with one query per table like
+    get_servant_entity used to."""
+    mstSvt = await fetch.get_one(conn, MstSvt, svt_id)
+    assert mstSvt is not None
+    return SvtEntityTables(
+        mstSvt=mstSvt,
+        mstSvtIndividuality=await fetch.get_all(conn, MstSvtIndividuality, svt_id),
+        mstSvtCard=await fetch.get_all(conn, MstSvtCard, svt_id),
+        mstSvtCardAdd=await fetch.get_all(conn, MstSvtCardAdd, svt_id),
+        mstSvtLimit=await fetch.get_all(conn, MstSvtLimit, svt_id),
+        mstCombineSkill=await fetch.get_all(
+            conn, MstCombineSkill, mstSvt.combineSkillId
+        ),
+        mstCombineLimit=await fetch.get_all(
+            conn, MstCombineLimit, mstSvt.combineLimitId
+        ),
+        mstCombineCostume=await fetch.get_all(conn, MstCombineCostume, svt_id),
+        mstCombineMaterial=await fetch.get_all(
+            conn, MstCombineMaterial, mstSvt.combineMaterialId
+        ),
+        mstSvtLimitAdd=await fetch.get_all(conn, MstSvtLimitAdd, svt_id),
+        mstSvtLimitImage=await fetch.get_all(conn, MstSvtLimitImage, svt_id),
+        mstSvtChange=await fetch.get_all(conn, MstSvtChange, svt_id),
+        mstSvtCostume=await fetch.get_all(conn, MstSvtCostume, svt_id),
+        mstSvtExp=await fetch.get_all(conn, MstSvtExp, mstSvt.expType),
+        mstFriendship=await fetch.get_all(conn, MstFriendship, mstSvt.friendshipId),
+        mstSvtPassiveSkill=await fetch.get_all(conn, MstSvtPassiveSkill, svt_id),
+        mstSvtAppendPassiveSkill=await fetch.get_all(
+            conn, MstSvtAppendPassiveSkill, svt_id
+        ),
+        mstSvtAppendPassiveSkillUnlock=await fetch.get_all(
+            conn, MstSvtAppendPassiveSkillUnlock, svt_id
+        ),
+        mstCombineAppendPassiveSkill=await fetch.get_all(
+            conn, MstCombineAppendPassiveSkill, svt_id
+        ),
+        mstSvtMultiPortrait=await fetch.get_all(conn, MstSvtMultiPortrait, svt_id),
+        mstSvtExtra=await fetch.get_one(conn, MstSvtExtra, svt_id),
+        mstSvtCoin=await fetch.get_one(conn, MstSvtCoin, svt_id),
+        mstSvtAdd=await fetch.get_one(conn, MstSvtAdd, svt_id),
+        skillIds=[
+            svt_skill.skillId
+            for svt_skill in await skill.get_mstSvtSkill(conn, svt_id=svt_id)
+        ],
+        tdIds=[
+            svt_td.treasureDeviceId
+            for svt_td in await td.get_mstSvtTreasureDevice(conn, svt_id=svt_id)
+        ],
+    )
+
+
+async def run_benchmark(
+    conn: AsyncConnection,
+    svt_ids: list[int],
+    get_tables: Callable[[AsyncConnection, int], Awaitable[object]],
+    repeat: int,
+) -> list[float]:
+    """Return the run time of fetching all the servants for each run."""
+    run_times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for svt_id in svt_ids:
+            await get_tables(conn, svt_id)
+        run_times.append(time.perf_counter() - start_time)
+    return run_times
+
+
+async def main(region: Region, svt_ids: list[int], repeat: int) -> None:
+    async with async_engines[region].connect() as conn:
+        for svt_id in svt_ids:
+            single_statement = await get_svt_entity_tables(conn, svt_id)
+            sequential = await get_svt_entity_tables_sequential(conn, svt_id)
+            if single_statement != sequential:
+                print(f"Different servant entity tables for {svt_id}")
+
+        benchmarks: list[
+            tuple[str, Callable[[AsyncConnection, int], Awaitable[object]]]
+        ] = [
+            ("tables, query per table", get_svt_entity_tables_sequential),
+            ("tables, single statement", get_svt_entity_tables),
+            ("get_servant_entity", get_servant_entity),
+        ]
+        for name, get_tables in benchmarks:
+            run_times = await run_benchmark(conn, svt_ids, get_tables, repeat)
+            print(
+                f"{name}: best {min(run_times):.3f}s, "
+                f"average {sum(run_times) / len(run_times):.3f}s "
+                f"for {len(svt_ids)} servants over {repeat} runs"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare fetching the servant entity tables with one query per"
+        " table and with a single statement."
+    )
+    parser.add_argument(
+        "--region",
+        "-r",
+        help="Region whose db is used for the benchmark",
+        type=Region,
+        default=Region.NA,
+    )
+    parser.add_argument(
+        "svt_ids",
+        help="Servant IDs to fetch",
+        type=int,
+        nargs="*",
+        default=[100100, 202900, 304800, 500800, 800100],
+    )
+    parser.add_argument(
+        "--repeat", "-n", help="Number of runs per benchmark", type=int, default=5
+    )
+
+    args = parser.parse_args()
+
+    asyncio.run(main(args.region, args.svt_ids, args.repeat))
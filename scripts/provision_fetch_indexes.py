@@ -0,0 +1,30 @@
+import argparse
+
+from app.db.load import provision_fetch_indexes
+from app.schemas.common import Region
+
+
+def main(regions: list[Region]) -> None:
+    for region in regions:
+        print(f"Creating the missing {region} fetch indexes …")
+        provision_fetch_indexes(region)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Create the indexes used by the fetch helpers on the live tables"
+        " with CREATE INDEX CONCURRENTLY. The db load already creates them on the"
+        " tables it loads."
+    )
+    parser.add_argument(
+        "--region",
+        "-r",
+        help="Region whose tables are indexed",
+        type=Region,
+        action="append",
+        required=True,
+    )
+
+    args = parser.parse_args()
+
+    main(args.region)
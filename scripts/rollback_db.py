@@ -0,0 +1,29 @@
+import argparse
+
+from app.db.load import rollback_db
+from app.schemas.common import Region
+
+
+def main(regions: list[Region]) -> None:
+    for region in regions:
+        print(f"Rolling back {region} tables …")
+        rollback_db(region)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Swap the live tables with the tables kept from the previous"
+        " staging load. Running it again undoes the rollback."
+    )
+    parser.add_argument(
+        "--region",
+        "-r",
+        help="Region to roll back",
+        type=Region,
+        action="append",
+        required=True,
+    )
+
+    args = parser.parse_args()
+
+    main(args.region)
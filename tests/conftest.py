@@ -10,11 +10,14 @@ from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
 
 from app.config import Settings
+from app.db.helpers import utils as db_utils
 from app.main import app
 from app.schemas.common import Region
 
 
 settings = Settings()
+# Validate the rows fetched from the db so the tests catch schema mismatches
+db_utils.settings.validate_db_rows = True
 
 
 @pytest.fixture(scope="session")
@@ -1,20 +1,103 @@
+import asyncio
+import gzip
+import re
+from contextlib import asynccontextmanager
 from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Optional, Type, Union, cast
 
 import orjson
 import pytest
-from fastapi import HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.testclient import TestClient
+from fastapi_cache import FastAPICache
+from sqlalchemy import ColumnElement, Select, event, select
 from sqlalchemy.ext.asyncio import AsyncConnection
 
+from app.cache import (
+    LocalCache,
+    RedisBackend,
+    ResponseCoder,
+    TwoTierBackend,
+    cache,
+    dump_call,
+    get_function_name,
+    is_cache_bypassed,
+    load_call,
+    settings,
+)
+from app.core.nice.event.event import get_nice_event
 from app.core.nice.func import parse_dataVals
+from app.core.nice.war import get_nice_war
+from app.core.raw import get_servant_entity
 from app.core.utils import get_voice_name
 from app.data.custom_mappings import Translation
 from app.data.script import get_script_path, get_script_text_only, remove_brackets
-from app.db.load import get_SkillID_from_sval, get_Value_from_sval
+from app.data.snapshot import MasterSnapshot, dump_snapshot
+from app.data.utils import get_changed_file_names, is_changed
+from app.db.helpers import fetch as loader_fetch
+from app.db.helpers import utils as db_utils
+from app.db.helpers.fetch import (
+    get_everything,
+    get_fetch_indexes,
+    schema_map_fetch_everything,
+    schema_map_fetch_one,
+    schema_table_fetch_all,
+    schema_table_fetch_all_multiple,
+)
+from app.db.helpers.loader import DataLoader
+from app.db.helpers.utils import get_trusted_fields
+from app.db.load import (
+    DERIVED_TABLE_DEPENDENCIES,
+    get_copy_rows,
+    get_SkillID_from_sval,
+    get_Value_from_sval,
+)
+from app.main import custom_key_builder
+from app.models.base import metadata
+from app.models.raw import mstBuff, mstConstant, mstSvtLimit, mstSvtScript
+from app.models.rayshift import rayshiftQuest
+from app.redis import Redis
+from app.redis.helpers import update_queue
+from app.redis.helpers.cache_generation import is_current_generation, unlink_keys
+from app.redis.helpers.columnar import ColumnarTable, build_master_store
+from app.redis.helpers.pydantic_object import select_mstSvtLimit
+from app.redis.helpers.update_queue import (
+    create_update_group,
+    enqueue_update,
+    get_update_events_key,
+    get_update_jobs_key,
+    get_update_queued_key,
+    parse_regions,
+    read_update_job,
+)
+from app.routers.nice import get_servant, warm_quest_phase
+from app.routers.static import PrecompressedStaticFiles, get_accepted_encodings
 from app.routers.utils import list_string_exclude
-from app.schemas.common import Language, Region, ReverseDepth
+from app.schemas.common import Language, LoadManifest, Region, ReverseDepth
 from app.schemas.gameenums import FuncType
 from app.schemas.nice import NiceServant
-from app.schemas.raw import ScriptJsonInfo, get_subtitle_svtId
+from app.schemas.raw import (
+    BuffEntityNoReverse,
+    MstBuff,
+    MstFunc,
+    MstItem,
+    MstSvt,
+    MstSvtLimit,
+    MstSvtScript,
+    ScriptJsonInfo,
+    get_subtitle_svtId,
+)
+from app.tasks import (
+    SVT_EXPORT_DEPENDENCIES,
+    WAR_EVENT_EXPORT_DEPENDENCIES,
+    JsonArrayWriter,
+    get_app_version,
+    get_load_options,
+    iter_in_order,
+    render_nice_svt,
+)
 
 from .utils import get_response_data, get_text_data
 
@@ -147,3 +230,581 @@ def test_get_SkillID_from_sval() -> None:
         )
         == 961313
     )
+
+
+def test_get_copy_rows() -> None:
+    constant_rows = list(get_copy_rows(mstConstant, [{"name": "MAX_LV", "value": 90}]))
+    assert constant_rows == [["MAX_LV", 90, 0]]
+
+    script = {"relationId": 1}
+    buff_rows = list(get_copy_rows(mstBuff, [{"id": 1, "vals": [2], "script": script}]))
+    columns = [column.name for column in mstBuff.columns]
+    buff_row = dict(zip(columns, buff_rows[0], strict=True))
+    assert buff_row["vals"] == [2]
+    assert buff_row["script"].obj == script
+    assert buff_row["name"] is None
+
+
+def test_is_changed() -> None:
+    changed_names = get_changed_file_names(
+        ["master/mstSvt.json", "AssetStorage.txt", "ScriptActionEncrypt/01/0100.txt"]
+    )
+    assert changed_names == {"mstSvt", "AssetStorage", "ScriptActionEncrypt"}
+
+    changed_files = {Region.JP: changed_names}
+    assert is_changed(changed_files, Region.JP, ["mstSvt*"])
+    assert not is_changed(changed_files, Region.JP, ["mstBuff", "mstFunc"])
+    assert is_changed(changed_files, Region.NA, ["mstBuff"])
+    assert is_changed(None, Region.JP, ["mstBuff"])
+
+
+@asynccontextmanager
+async def record_read_tables(conn: AsyncConnection) -> AsyncIterator[set[str]]:
+    """Names of the gamedata tables in the statements run on the connection"""
+    table_names = metadata.tables.keys() - {rayshiftQuest.name}
+    read_tables: set[str] = set()
+
+    def record(*args: Any) -> None:
+        statement: str = args[2]
+        read_tables.update(set(re.findall(r"\w+", statement)) & table_names)
+
+    sync_conn = conn.sync_connection
+    assert sync_conn is not None
+    event.listen(sync_conn, "before_cursor_execute", record)
+    try:
+        yield read_tables
+    finally:
+        event.remove(sync_conn, "before_cursor_execute", record)
+
+
+def get_missing_dependencies(
+    read_tables: set[str], dependencies: list[str]
+) -> set[str]:
+    return {
+        file_name
+        for table_name in read_tables
+        for file_name in DERIVED_TABLE_DEPENDENCIES.get(table_name, [table_name])
+        if not is_changed({Region.NA: {file_name}}, Region.NA, dependencies)
+    }
+
+
+@pytest.mark.asyncio
+async def test_export_dependencies(na_db_conn: AsyncConnection) -> None:
+    async with record_read_tables(na_db_conn) as svt_tables:
+        for svt_id in (201000, 9400340):
+            raw_svt = await get_servant_entity(
+                na_db_conn, svt_id, expand=True, lore=True
+            )
+            await render_nice_svt(na_db_conn, Region.NA, raw_svt)
+    assert get_missing_dependencies(svt_tables, SVT_EXPORT_DEPENDENCIES) == set()
+
+    async with record_read_tables(na_db_conn) as war_event_tables:
+        await get_nice_war(na_db_conn, Region.NA, 203, Language.jp)
+        await get_nice_event(na_db_conn, Region.NA, 80119, Language.jp)
+    assert (
+        get_missing_dependencies(war_event_tables, WAR_EVENT_EXPORT_DEPENDENCIES)
+        == set()
+    )
+
+
+async def test_json_array_writer(tmp_path: Path) -> None:
+    async def delayed(value: int) -> int:
+        await asyncio.sleep(0.01 * (3 - value))
+        return value
+
+    out_path = tmp_path / "out.json"
+    async with JsonArrayWriter(out_path) as writer:
+        async for value in iter_in_order(delayed(value) for value in range(3)):
+            await writer.write(orjson.dumps({"id": value}).decode())
+    assert orjson.loads(out_path.read_bytes()) == [{"id": 0}, {"id": 1}, {"id": 2}]
+
+    async def write_and_fail() -> None:
+        async with JsonArrayWriter(out_path) as writer:
+            await writer.write("[]")
+            raise ValueError("Export failed")
+
+    with pytest.raises(ValueError, match="Export failed"):
+        await write_and_fail()
+    assert orjson.loads(out_path.read_bytes()) == [{"id": 0}, {"id": 1}, {"id": 2}]
+    assert list(tmp_path.iterdir()) == [out_path]
+
+    async with JsonArrayWriter(out_path):
+        pass
+    assert orjson.loads(out_path.read_bytes()) == []
+
+
+def test_get_accepted_encodings() -> None:
+    assert get_accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert get_accepted_encodings("br;q=0, gzip;q=0.5") == {"gzip"}
+    assert get_accepted_encodings("*;q=0.1, gzip;q=0") == {"*", "br"}
+    assert get_accepted_encodings("") == set()
+
+
+def test_precompressed_static_files(tmp_path: Path) -> None:
+    region_path = tmp_path / "JP"
+    region_path.mkdir()
+    (region_path / "info.json").write_text('{"hash": "abcdef", "timestamp": 0}')
+    (region_path / "nice_trait.json").write_text("[1]")
+    (region_path / "nice_trait.json.gz").write_bytes(gzip.compress(b"[1]"))
+
+    app = FastAPI()
+    app.mount("/export", PrecompressedStaticFiles(directory=tmp_path))
+    client = TestClient(app)
+
+    response = client.get(
+        "/export/JP/nice_trait.json", headers={"Accept-Encoding": "br, gzip"}
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["etag"].startswith('"abcdef-')
+    assert response.json() == [1]
+
+    response = client.get(
+        "/export/JP/nice_trait.json",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]},
+    )
+    assert response.status_code == 304
+
+    response = client.get(
+        "/export/JP/nice_trait.json", headers={"Accept-Encoding": "identity"}
+    )
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"].endswith('-identity"')
+    assert response.content == b"[1]"
+
+
+def test_select_mstSvtLimit() -> None:
+    limits = [
+        MstSvtLimit.parse_obj(
+            {name: 0 for name in MstSvtLimit.__fields__}
+            | {"strParam": "", "svtId": 100100, "limitCount": limit_count}
+        )
+        for limit_count in (1, 2, 4, 5)
+    ]
+
+    def select_limit_count(
+        svt_limit: Optional[int], prefer_lower: bool
+    ) -> Optional[int]:
+        limit = select_mstSvtLimit(limits, svt_limit, prefer_lower)
+        return limit.limitCount if limit else None
+
+    assert select_limit_count(5, False) == 5
+    assert select_limit_count(3, False) == 2
+    assert select_limit_count(None, True) == 1
+    assert select_mstSvtLimit(limits[2:], None, False) == limits[2]
+
+
+def test_local_cache() -> None:
+    local_cache = LocalCache(max_bytes=10)
+    local_cache.set("a", b"1234", 60)
+    local_cache.set("b", b"5678", 60)
+    assert local_cache.get("a") == (60, b"1234")
+
+    # "b" is the least recently used entry
+    local_cache.set("c", b"90", 60)
+    local_cache.set("d", b"12", 60)
+    assert local_cache.get("b") is None
+    assert local_cache.get("a") is not None
+    assert local_cache.size == 8
+
+    local_cache.set("e", b"too long value", 60)
+    local_cache.set("f", b"1", 0)
+    assert local_cache.get("e") is None
+    assert local_cache.get("f") is None
+    assert local_cache.stats.hits == 2
+    assert local_cache.stats.misses == 3
+
+
+def test_response_coder(monkeypatch: pytest.MonkeyPatch) -> None:
+    assert ResponseCoder.decode(ResponseCoder.encode({"id": 1})) == {"id": 1}
+
+    monkeypatch.setattr(settings, "cache_compression", True)
+    original = Response(b'{"id":1}', media_type="application/json")
+    encoded = ResponseCoder.encode(original)
+    etag = original.headers["etag"]
+
+    app = FastAPI()
+
+    @app.get("/cached")
+    async def cached() -> Response:
+        return ResponseCoder.decode(encoded)  # type: ignore[no-any-return]
+
+    client = TestClient(app)
+
+    response = client.get("/cached", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == f'{etag[:-1]}-gzip"'
+    assert response.json() == {"id": 1}
+
+    response = client.get("/cached", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == etag
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == b'{"id":1}'
+
+    response = client.get(
+        "/cached", headers={"Accept-Encoding": "identity", "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+
+def test_is_current_generation() -> None:
+    key_prefix = "fgoapi:cache:JP:"
+    assert is_current_generation("fgoapi:cache:JP:3::abc", key_prefix, 3)
+    assert is_current_generation("fgoapi:cache:JP:4::abc", key_prefix, 3)
+    assert not is_current_generation("fgoapi:cache:JP:2::abc", key_prefix, 3)
+    assert not is_current_generation("fgoapi:cache:JP::abc", key_prefix, 3)
+
+
+def test_dump_load_call() -> None:
+    call = dump_call(
+        "app.routers.nice:get_servant",
+        {
+            "region": Region.JP,
+            "servant_id": 100100,
+            "lang": Language.en,
+            "lore": True,
+            "request": None,
+        },
+    )
+    assert call is not None
+    loaded_call = load_call(call)
+    assert loaded_call is not None
+    func, kwargs = loaded_call
+    assert func is get_servant
+    assert kwargs == {
+        "region": Region.JP,
+        "servant_id": 100100,
+        "lang": Language.en,
+        "lore": True,
+    }
+    assert isinstance(kwargs["region"], Region)
+
+    assert (
+        dump_call("app.routers.nice:find_servant", {"search_param": object()}) is None
+    )
+    assert load_call('{"func": "app.routers.nice:missing", "kwargs": {}}') is None
+
+    # The redis dependency isn't dumped and is passed by the cache warmer
+    redis = cast(Redis, object())
+    call = dump_call(
+        get_function_name(warm_quest_phase),
+        {"region": Region.JP, "quest_id": 1000001, "phase": 1, "lang": Language.jp}
+        | {"redis": redis},
+    )
+    assert call is not None
+    assert load_call(call) is None
+    assert load_call(call, redis) == (
+        warm_quest_phase,
+        {
+            "region": Region.JP,
+            "quest_id": 1000001,
+            "phase": 1,
+            "lang": Language.jp,
+            "redis": redis,
+        },
+    )
+
+
+def test_get_fetch_indexes() -> None:
+    fetch_indexes = {
+        (fetch_index.table.name, fetch_index.columns)
+        for fetch_index in get_fetch_indexes()
+    }
+    assert ("mstSvtCard", ("svtId", "cardId")) in fetch_indexes
+    # mstVoice is filtered and ordered by its primary key
+    assert not any(table_name == "mstVoice" for table_name, _ in fetch_indexes)
+
+
+def get_where_value(where_col: ColumnElement) -> int | str:  # type: ignore[type-arg]
+    return "" if where_col.type.python_type is str else 1
+
+
+def get_fetch_paths() -> list[tuple[str, Select]]:  # type: ignore[type-arg]
+    fetch_paths: list[tuple[str, Select]] = []  # type: ignore[type-arg]
+    for schema, (table, where_col) in schema_map_fetch_one.items():
+        stmt = select(table).where(where_col == get_where_value(where_col))
+        fetch_paths.append((f"get_one {schema.__name__}", stmt))
+    for schema, (table, where_col, order_col) in schema_table_fetch_all.items():
+        stmt = (
+            select(table)
+            .where(where_col == get_where_value(where_col))
+            .order_by(order_col)
+        )
+        fetch_paths.append((f"get_all {schema.__name__}", stmt))
+    for schema, (
+        table,
+        where_col,
+        order_cols,
+    ) in schema_table_fetch_all_multiple.items():
+        stmt = (
+            select(table)
+            .where(where_col.in_([get_where_value(where_col)]))
+            .order_by(*order_cols)
+        )
+        fetch_paths.append((f"get_all_multiple {schema.__name__}", stmt))
+    for schema, (table, order_col) in schema_map_fetch_everything.items():
+        stmt = select(table).order_by(order_col)
+        fetch_paths.append((f"get_everything {schema.__name__}", stmt))
+    return fetch_paths
+
+
+@pytest.mark.asyncio
+async def test_fetch_paths_use_index(na_db_conn: AsyncConnection) -> None:
+    seq_scan_paths: list[str] = []
+    async with na_db_conn.engine.connect() as conn, conn.begin():
+        # Tables in the test db are small enough that a sequential scan would
+        # otherwise be picked even when an index exists
+        await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for name, stmt in get_fetch_paths():
+            compiled = stmt.compile(
+                dialect=conn.dialect, compile_kwargs={"literal_binds": True}
+            )
+            plan = await conn.exec_driver_sql(f"EXPLAIN {compiled}")
+            if any("Seq Scan" in line for line, in plan):
+                seq_scan_paths.append(name)
+    assert seq_scan_paths == []
+
+
+def test_get_trusted_fields() -> None:
+    trusted_fields = get_trusted_fields(MstSvtLimit, tuple(mstSvtLimit.c.keys()))
+    assert trusted_fields is not None
+    assert ("svtId", mstSvtLimit.c.keys().index("svtId")) in trusted_fields
+    # The Decimal scale needs validation
+    assert get_trusted_fields(MstSvtScript, tuple(mstSvtScript.c.keys())) is None
+    # Required fields missing from the row
+    assert get_trusted_fields(MstSvtLimit, ("svtId",)) is None
+
+
+@pytest.mark.asyncio
+async def test_trusted_rows_match_validated_rows(
+    monkeypatch: pytest.MonkeyPatch, na_db_conn: AsyncConnection
+) -> None:
+    validated_svts = await get_everything(na_db_conn, MstSvt)
+    monkeypatch.setattr(db_utils.settings, "validate_db_rows", False)
+    trusted_svts = await get_everything(na_db_conn, MstSvt)
+    assert trusted_svts == validated_svts
+
+
+def test_load_manifest_round_trip() -> None:
+    manifest = LoadManifest(
+        repo_hashes={Region.NA: "0123456789abcdef"},
+        app_version=get_app_version(),
+        options=get_load_options(),
+    )
+    # The manifest read back from redis must compare equal for the load to be skipped
+    assert LoadManifest.parse_raw(manifest.json()) == manifest
+
+
+def test_parse_regions() -> None:
+    assert parse_regions(b"NA,JP") == [Region.NA, Region.JP]
+    assert parse_regions(b"") == []
+
+
+async def test_enqueue_update(redis: Redis, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(update_queue.settings, "redis_prefix", "test_update_queue")
+    keys = [get_update_jobs_key(), get_update_queued_key(), get_update_events_key()]
+    await redis.delete(*keys)
+    try:
+        assert await enqueue_update(redis, [Region.NA, Region.JP]) == [
+            Region.NA,
+            Region.JP,
+        ]
+        # Regions with a queued update aren't queued again
+        assert await enqueue_update(redis, [Region.JP, Region.KR]) == [Region.KR]
+        assert await enqueue_update(redis, [Region.NA]) == []
+        jobs = await redis.xrange(get_update_jobs_key())
+        assert [parse_regions(fields[b"regions"]) for _, fields in jobs] == [
+            [Region.NA, Region.JP],
+            [Region.KR],
+        ]
+
+        # A region can be queued again once its update starts
+        await create_update_group(redis)
+        job = await read_update_job(redis, "test_consumer", 1)
+        assert job is not None
+        assert job[1] == [Region.NA, Region.JP]
+        assert await enqueue_update(redis, [Region.NA, Region.KR]) == [Region.NA]
+    finally:
+        await redis.delete(*keys)
+
+
+def test_master_snapshot() -> None:
+    tables: dict[str, dict[int, bytes]] = {
+        "mstSvt": {100100: b'{"id":100100}', 2: b'{"id":2}'},
+        "mstSvtlimit": {},
+    }
+    snapshot = MasterSnapshot(dump_snapshot(tables))
+    assert snapshot.get("mstSvt", 2) == b'{"id":2}'
+    assert snapshot.get("mstSvt", 100100) == b'{"id":100100}'
+    assert snapshot.get("mstSvt", 3) is None
+    assert snapshot.get("mstSvtlimit", 2) is None
+    assert snapshot.get("mstSkill", 2) is None
+
+
+def test_columnar_table() -> None:
+    buff = BuffEntityNoReverse(
+        mstBuff=MstBuff.parse_obj(
+            {name: 0 for name in MstBuff.__fields__}
+            | {"vals": [], "tvals": [], "ckSelfIndv": [], "ckOpIndv": [], "script": {}}
+            | {"name": "", "detail": ""}
+        )
+    )
+    mstFuncs = [
+        MstFunc(
+            vals=[func_id],
+            expandedVals=[buff],
+            tvals=[],
+            questTvals=[94000015],
+            effectList=[],
+            popupTextColor=2,
+            id=func_id,
+            funcType=16,
+            targetType=0,
+            applyTarget=3,
+            popupIconId=0,
+            popupText="",
+        )
+        for func_id in (657, 1, 100)
+    ]
+    table = ColumnarTable(MstFunc, "id", mstFuncs)
+    assert table.get(100) == mstFuncs[2]
+    assert table.get(2) is None
+
+    # Changing a returned row doesn't change the stored values
+    row = table.get(100)
+    assert row is not None
+    row.vals.append(1)
+    row.expandedVals.append(buff)
+    assert table.get(100) == mstFuncs[2]
+
+    mstSvtLimits = [
+        MstSvtLimit.parse_obj(
+            {name: 0 for name in MstSvtLimit.__fields__}
+            | {"strParam": "", "svtId": svt_id, "limitCount": limit_count}
+        )
+        for svt_id, limit_count in ((100100, 0), (2, 0), (100100, 1))
+    ]
+    limit_table = ColumnarTable(MstSvtLimit, "svtId", mstSvtLimits)
+    assert limit_table.get_all(100100) == [mstSvtLimits[0], mstSvtLimits[2]]
+    assert limit_table.get_all(3) == []
+
+    store = build_master_store(
+        {
+            MstFunc: [mstFunc.json().encode() for mstFunc in mstFuncs],
+            MstSvtLimit: [
+                orjson.dumps([mstSvtLimits[0].dict(), mstSvtLimits[2].dict()]),
+                orjson.dumps([mstSvtLimits[1].dict()]),
+            ],
+        }
+    )
+    assert store[MstFunc].get(1) == mstFuncs[1]
+    assert store[MstSvtLimit].get_all(100100) == limit_table.get_all(100100)
+
+
+async def test_data_loader(monkeypatch: pytest.MonkeyPatch) -> None:
+    batches: list[list[Union[int, str]]] = []
+
+    async def get_all_multiple(
+        _conn: AsyncConnection, _schema: Type[Any], where_ids: list[Union[int, str]]
+    ) -> list[SimpleNamespace]:
+        batches.append(where_ids)
+        if -1 in where_ids:
+            raise ValueError("Failed fetch")
+        return [
+            SimpleNamespace(id=where_id)
+            for where_id in where_ids
+            if isinstance(where_id, int) and where_id > 0
+        ]
+
+    monkeypatch.setattr(loader_fetch, "get_all_multiple", get_all_multiple)
+    loader = DataLoader(cast(AsyncConnection, None))
+
+    # Loads of the same tick are batched into one fetch
+    items = await asyncio.gather(
+        loader.load_one(MstItem, 1), loader.load_many(MstItem, [2, 0, 1])
+    )
+    assert batches == [[1, 2, 0]]
+    assert [item.id if item else None for item in items[1]] == [2, None, 1]
+
+    # Loaded IDs are memoized
+    assert await loader.load_many(MstItem, [2, 1]) == items[1][::2]
+    assert len(batches) == 1
+
+    # The exception is raised by every load of the batch and isn't memoized
+    results = await asyncio.gather(
+        loader.load(MstItem, -1), loader.load(MstItem, 3), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    item = await loader.load_one(MstItem, 3)
+    assert item is not None
+    assert item.id == 3
+    assert batches[1:] == [[-1, 3], [3]]
+
+
+async def test_single_flight_generation_change(
+    redis: Redis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    prefix = "test_single_flight"
+    backend = TwoTierBackend(RedisBackend(redis), redis, 0)
+    fastapi_cache_attributes = {
+        "_backend": backend,
+        "_prefix": prefix,
+        "_expire": 60,
+        "_coder": ResponseCoder,
+        "_key_builder": custom_key_builder,
+        "_enable": True,
+    }
+    for name, value in fastapi_cache_attributes.items():
+        monkeypatch.setattr(FastAPICache, name, value)
+    await backend.check_versions(force=True)
+    get_with_ttl = backend.get_with_ttl
+
+    async def get_with_ttl_after_reload(key: str) -> tuple[int, Any]:
+        # A reload bumps the generation after fastapi_cache built the key
+        backend.generations[Region.NA.value] = backend.get_generation("NA") + 1
+        return await get_with_ttl(key)
+
+    monkeypatch.setattr(backend, "get_with_ttl", get_with_ttl_after_reload)
+
+    @cache()
+    async def get_value(region: Region) -> int:
+        return region.value.count("N")
+
+    try:
+        assert await get_value(region=Region.NA) == 1
+        # The value is set with the key the lock was taken on
+        assert await redis.keys(f"{prefix}:*:lock") == []
+        assert len(await redis.keys(f"{prefix}:*")) == 1
+    finally:
+        await unlink_keys(redis, f"{prefix}:*")
+
+
+def test_is_cache_bypassed() -> None:
+    def make_request(method: str, cache_control: Optional[str] = None) -> Request:
+        headers = [(b"cache-control", cache_control.encode())] if cache_control else []
+        return Request({"type": "http", "method": method, "headers": headers})
+
+    assert not is_cache_bypassed(None)
+    assert not is_cache_bypassed(make_request("GET"))
+    assert not is_cache_bypassed(make_request("GET", "max-age=0"))
+    assert is_cache_bypassed(make_request("GET", "no-store"))
+    assert is_cache_bypassed(make_request("GET", "no-cache"))
+    assert is_cache_bypassed(make_request("POST"))
+
+
+async def test_iter_in_order_window() -> None:
+    running = 0
+    max_running = 0
+
+    async def delayed(value: int) -> int:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01 * (3 - value % 3))
+        running -= 1
+        return value
+
+    results = [value async for value in iter_in_order(map(delayed, range(10)), 3)]
+    assert results == list(range(10))
+    assert max_running == 3